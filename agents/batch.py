@@ -0,0 +1,317 @@
+"""
+Offline batch processing of archived meeting transcripts.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+from agents.summarizer import MapReduceSummarizer, complete_with_scrum_master
+from api.notion_handler import append_to_notion_page
+from templates.meeting_notes import MEETING_TITLES, NOTE_FORMATS
+from templates.meeting_parser import MEETING_SECTIONS, format_meeting_notes
+from utils.intent_detector import MEETING_TYPES, IntentDetector
+from utils.tokens import count_tokens
+
+TRANSCRIPT_EXTENSIONS = (".txt", ".md")
+
+MEETING_ID_PATTERN = re.compile(r"[^A-Za-z0-9_-]")
+
+def meeting_file_name(meeting_id):
+    """Build a filesystem-safe file name (without extension) for a meeting ID"""
+    return MEETING_ID_PATTERN.sub("_", meeting_id)
+
+def iter_meetings(source):
+    """
+    Reads archived meetings one at a time.
+    
+    Args:
+        source (str): A directory of .txt/.md transcripts (one meeting per
+            file, named by its ID; files sharing a name, like a.txt and
+            a.md, keep their extension in the ID), or a JSONL file whose
+            lines hold "id", "transcript" and optionally "meeting_type" and "date"
+    
+    Yields:
+        dict: Meetings with "id", "transcript", "meeting_type" and "date" keys
+    """
+    if os.path.isdir(source):
+        names = [
+            name for name in sorted(os.listdir(source))
+            if name.endswith(TRANSCRIPT_EXTENSIONS) and os.path.isfile(os.path.join(source, name))
+        ]
+        stems = {}
+        for name in names:
+            stem = os.path.splitext(name)[0]
+            stems[stem] = stems.get(stem, 0) + 1
+        
+        for name in names:
+            path = os.path.join(source, name)
+            meeting_id = os.path.splitext(name)[0]
+            if stems[meeting_id] > 1:
+                print(f"⚠️ Several transcripts are named {meeting_id}; using {name} as this meeting's ID")
+                meeting_id = name
+            
+            with open(path, "r", encoding="utf-8") as f:
+                transcript = f.read()
+            yield {
+                "id": meeting_id,
+                "transcript": transcript,
+                "meeting_type": None,
+                "date": datetime.fromtimestamp(os.path.getmtime(path)).strftime("%Y-%m-%d %H:%M:%S")
+            }
+        return
+    
+    with open(source, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            
+            try:
+                record = json.loads(line)
+            except ValueError:
+                print(f"⚠️ Skipping invalid JSON on line {number} of {source}")
+                continue
+            
+            yield {
+                "id": str(record.get("id", number)),
+                "transcript": record.get("transcript") or record.get("text", ""),
+                "meeting_type": record.get("meeting_type"),
+                "date": record.get("date")
+            }
+
+class Checkpoint:
+    """
+    Append-only log of processed meetings.
+    
+    Each finished meeting is recorded as a JSON line as soon as it is done,
+    so a run that is interrupted resumes by skipping the meetings the log
+    marks as done. Failed meetings are logged too and retried next run.
+    """
+    
+    def __init__(self, path):
+        """
+        Open the checkpoint, loading meetings already done.
+        
+        Args:
+            path (str): Path of the checkpoint file
+        """
+        self.path = path
+        self.done = set()
+        self._lock = threading.Lock()
+        
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A line cut short by an interrupted run
+                        continue
+                    if entry.get("status") == "done":
+                        self.done.add(entry["id"])
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+    
+    def record(self, meeting_id, status, **details):
+        """Append the outcome of a meeting to the log"""
+        entry = {"id": meeting_id, "status": status, "time": time.time(), **details}
+        with self._lock:
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            if status == "done":
+                self.done.add(meeting_id)
+    
+    def close(self):
+        self._file.close()
+
+class BatchProcessor:
+    """
+    Turns an archive of meeting transcripts into meeting notes.
+    
+    Meetings run on a worker pool. Calls to the language model and to
+    Notion each pass through their own semaphore, so their concurrency
+    can be capped independently of the number of workers (for example,
+    many workers waiting on a few Notion writes at Notion's rate limit).
+    """
+    
+    def __init__(self, workers=4, llm_concurrency=4, notion_concurrency=1, output_dir=None, notion_page_id=None,
+                 notion_sync=None, checkpoint_path="data/batch_checkpoint.jsonl", meeting_type=None, summarize_input_tokens=6000,
+                 summary_chunk_tokens=3000, complete=None, intent_detector=None):
+        """
+        Initialize the processor.
+        
+        Args:
+            workers (int): Meetings processed at once
+            llm_concurrency (int): Language model calls in flight at once
+            notion_concurrency (int): Notion writes in flight at once
+            output_dir (str): Directory to write Markdown notes to, if any
+            notion_page_id (str): Notion page to append notes to, if any
+            notion_sync (NotionPageSync): When set, each meeting's notes are
+                synced to the page, so reprocessing a meeting updates its
+                notes instead of appending them again
+            checkpoint_path (str): Path of the checkpoint log
+            meeting_type (str): Meeting type for every transcript; detected
+                per meeting when None
+            summarize_input_tokens (int): Transcripts longer than this are
+                summarized in parts first
+            summary_chunk_tokens (int): Tokens per part when summarizing
+            complete (callable): `complete(prompt, context, use_cache=True)`
+                returning the model's text; defaults to the Scrum Master agent
+            intent_detector (IntentDetector): Detects meeting types, e.g.
+                with the team's keywords; defaults to the built-in keywords
+        """
+        self.workers = workers
+        self.output_dir = output_dir
+        self.notion_page_id = notion_page_id
+        self.notion_sync = notion_sync
+        self.checkpoint_path = checkpoint_path
+        self.meeting_type = meeting_type
+        self.summarize_input_tokens = summarize_input_tokens
+        
+        self._llm_slots = threading.BoundedSemaphore(max(llm_concurrency, 1))
+        self._notion_slots = threading.BoundedSemaphore(max(notion_concurrency, 1))
+        self._complete = complete or complete_with_scrum_master
+        self._intent_detector = intent_detector or IntentDetector()
+        
+        # Parts of a long transcript share the LLM cap with every other call
+        self.summarizer = MapReduceSummarizer(
+            complete=self._complete_limited,
+            chunk_tokens=summary_chunk_tokens,
+            reduce_tokens=summary_chunk_tokens * 2,
+            max_workers=max(llm_concurrency, 1)
+        )
+    
+    def run(self, source):
+        """
+        Processes every meeting in an archive not already marked done.
+        
+        Args:
+            source (str): Directory or JSONL file of transcripts (see `iter_meetings`)
+        
+        Returns:
+            dict: Counts of processed, skipped, duplicate and failed
+                meetings, elapsed seconds and throughput in meetings per minute
+        """
+        if self.output_dir:
+            os.makedirs(self.output_dir, exist_ok=True)
+        
+        checkpoint = Checkpoint(self.checkpoint_path)
+        stats = {"processed": 0, "skipped": 0, "duplicates": 0, "failed": 0}
+        # Meetings whose notes would land in the same file
+        seen = set()
+        start = time.perf_counter()
+        
+        try:
+            with ThreadPoolExecutor(max_workers=max(self.workers, 1)) as executor:
+                pending = set()
+                
+                for meeting in iter_meetings(source):
+                    file_name = meeting_file_name(meeting["id"])
+                    if file_name in seen:
+                        print(f"\n⚠️ Skipping meeting {meeting['id']}: another meeting in {source} has the same ID")
+                        stats["duplicates"] += 1
+                        continue
+                    seen.add(file_name)
+                    
+                    if meeting["id"] in checkpoint.done:
+                        stats["skipped"] += 1
+                        continue
+                    
+                    # Keep only a few meetings queued so large archives are not read into memory
+                    if len(pending) >= self.workers * 2:
+                        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        self._collect(finished, stats, start)
+                    
+                    pending.add(executor.submit(self._process, meeting, checkpoint))
+                
+                self._collect(pending, stats, start)
+        finally:
+            checkpoint.close()
+        
+        elapsed = time.perf_counter() - start
+        stats["seconds"] = elapsed
+        stats["meetings_per_minute"] = stats["processed"] / elapsed * 60 if elapsed else 0.0
+        return stats
+    
+    def _collect(self, futures, stats, start):
+        """Count finished meetings and report progress"""
+        for future in futures:
+            stats["processed" if future.result() else "failed"] += 1
+        
+        done = stats["processed"] + stats["failed"]
+        rate = stats["processed"] / (time.perf_counter() - start) * 60
+        print(f"\r📦 {done} meetings ({stats['failed']} failed), {rate:.1f} meetings/min", end="", flush=True)
+    
+    def _process(self, meeting, checkpoint):
+        """Process one meeting, recording the outcome; returns True on success"""
+        started = time.perf_counter()
+        try:
+            meeting_type = self.meeting_type or meeting["meeting_type"] or self._detect_meeting_type(meeting)
+            timestamp = meeting["date"] or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            
+            response = self._generate_notes(meeting["transcript"], meeting_type)
+            content = self._format(response, meeting_type, timestamp, meeting["id"])
+            outputs = self._write(meeting["id"], content)
+        except Exception as e:
+            print(f"\n❌ Meeting {meeting['id']} failed: {str(e)}")
+            checkpoint.record(meeting["id"], "failed", error=str(e))
+            return False
+        
+        checkpoint.record(meeting["id"], "done", meeting_type=meeting_type, outputs=outputs,
+                          seconds=round(time.perf_counter() - started, 3))
+        return True
+    
+    def _detect_meeting_type(self, meeting):
+        """Detect the meeting type from the transcript, or "general" if unclear"""
+        scores = self._intent_detector.detect(meeting["transcript"], MEETING_TYPES)
+        return self._intent_detector.best(scores, MEETING_TYPES) or "general"
+    
+    def _generate_notes(self, transcript, meeting_type):
+        """Ask the agent for notes, summarizing in parts when the transcript is too long"""
+        if count_tokens(transcript) > self.summarize_input_tokens:
+            return self.summarizer.summarize(transcript, meeting_type)
+        
+        title = MEETING_TITLES.get(meeting_type, "meeting")
+        formatting = NOTE_FORMATS.get(meeting_type, "Summarize the decisions, action items and open questions "
+                                                    "as '- ' bullet items.")
+        prompt = f"Here is a {title} transcript. Turn it into meeting notes. {formatting}\n\n{transcript}"
+        return self._complete_limited(prompt, "")
+    
+    def _format(self, response, meeting_type, timestamp, meeting_id):
+        """Render the agent's notes with the meeting formatters"""
+        if meeting_type in MEETING_SECTIONS:
+            return format_meeting_notes(response, meeting_type, timestamp)
+        return f"# Meeting Notes: {meeting_id} ({timestamp})\n\n{response}"
+    
+    def _write(self, meeting_id, content):
+        """Write the notes to the configured outputs, returning where they went"""
+        outputs = []
+        
+        if self.output_dir:
+            path = os.path.join(self.output_dir, f"{meeting_file_name(meeting_id)}.md")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+            outputs.append(path)
+        
+        if self.notion_page_id:
+            with self._notion_slots:
+                if self.notion_sync is not None:
+                    self.notion_sync.sync(self.notion_page_id, f"batch-{meeting_id}", content)
+                elif not append_to_notion_page(self.notion_page_id, content):
+                    raise RuntimeError("could not append to Notion")
+            outputs.append(f"notion:{self.notion_page_id}")
+        
+        return outputs
+    
+    def _complete_limited(self, prompt, context, use_cache=True):
+        """Call the model, waiting for a free LLM slot"""
+        with self._llm_slots:
+            return self._complete(prompt, context, use_cache=use_cache)
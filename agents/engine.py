@@ -0,0 +1,141 @@
+"""
+Asyncio engine for Agilow Scrum Master chat sessions.
+"""
+
+import asyncio
+import threading
+
+from agents.openai_client import create_async_openai_client, get_async_client_settings
+from agents.scrum_master import async_get_scrum_master_response, async_stream_scrum_master_response
+from utils.metrics import get_metrics
+
+class ScrumMasterEngine:
+    """
+    Async core for a chat session.
+    
+    Agent calls run on the event loop, while memory writes are started as
+    background tasks so they overlap with the user's next turn and the next
+    agent call instead of blocking the conversation. Notion saves go through
+    the write-behind queue in `api.notion_queue`.
+    """
+    
+    def __init__(self, memory_manager, client=None):
+        """
+        Initialize the engine.
+        
+        Args:
+            memory_manager (MemoryManager): Memory for this session
+            client (AsyncOpenAI): Optional client; one is created from the
+                configured pool settings on first use otherwise
+        """
+        self.memory_manager = memory_manager
+        self._client = client
+        self._memory_task = None
+    
+    @property
+    def client(self):
+        """The async OpenAI client, created lazily on the engine's loop"""
+        if self._client is None:
+            self._client = create_async_openai_client(**get_async_client_settings())
+        return self._client
+    
+    async def respond(self, user_input, context="", use_cache=True):
+        """Get the agent's full response"""
+        return await async_get_scrum_master_response(self.client, user_input, context, use_cache=use_cache)
+    
+    def stream(self, user_input, context="", stats=None, use_cache=True):
+        """Stream the agent's response as an async generator of text pieces"""
+        return async_stream_scrum_master_response(
+            self.client, user_input, context, stats=stats, use_cache=use_cache
+        )
+    
+    async def record_exchange(self, user_input, ai_response, meeting_type=None):
+        """Persist an exchange in the background, keeping writes in order"""
+        previous = self._memory_task
+        
+        async def write():
+            if previous is not None:
+                # A failed write is reported once; it must not block the ones after it
+                try:
+                    await previous
+                except Exception as e:
+                    print(f"\n⚠️ Could not save an earlier exchange to memory: {str(e)}")
+            with get_metrics().span("memory_persist"):
+                await asyncio.to_thread(self.memory_manager.add_exchange, user_input, ai_response, meeting_type)
+        
+        self._memory_task = asyncio.create_task(write())
+    
+    async def wait_for_memory(self):
+        """Wait until all background memory writes have finished"""
+        task = self._memory_task
+        if task is None:
+            return
+        
+        try:
+            await task
+        finally:
+            # Only clear the task that was awaited; a newer write may have been queued meanwhile
+            if self._memory_task is task:
+                self._memory_task = None
+    
+    async def drain(self):
+        """Wait for every background task to finish, reporting instead of raising failures"""
+        try:
+            await self.wait_for_memory()
+        except Exception as e:
+            print(f"\n⚠️ Could not save an exchange to memory: {str(e)}")
+    
+    async def close(self):
+        """Drain background work and close the HTTP pool"""
+        await self.drain()
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+class SyncScrumMasterEngine:
+    """
+    Blocking wrapper around `ScrumMasterEngine` for the command-line interface.
+    
+    The engine's event loop runs on a daemon thread for the lifetime of the
+    wrapper, so background tasks keep running between blocking calls.
+    """
+    
+    def __init__(self, memory_manager, client=None):
+        """Start the event loop thread and create the engine on it"""
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        
+        self.engine = ScrumMasterEngine(memory_manager, client)
+    
+    def _run(self, coroutine):
+        """Run a coroutine on the engine loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+    
+    def respond(self, user_input, context="", use_cache=True):
+        return self._run(self.engine.respond(user_input, context, use_cache=use_cache))
+    
+    def stream(self, user_input, context="", stats=None, use_cache=True):
+        """Iterate over the streamed response from the calling thread"""
+        generator = self.engine.stream(user_input, context, stats=stats, use_cache=use_cache)
+        while True:
+            try:
+                yield self._run(generator.__anext__())
+            except StopAsyncIteration:
+                return
+    
+    def record_exchange(self, user_input, ai_response, meeting_type=None):
+        self._run(self.engine.record_exchange(user_input, ai_response, meeting_type))
+    
+    def wait_for_memory(self):
+        self._run(self.engine.wait_for_memory())
+    
+    def drain(self):
+        self._run(self.engine.drain())
+    
+    def close(self):
+        """Drain background work and stop the event loop thread"""
+        self._run(self.engine.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
@@ -0,0 +1,136 @@
+"""
+Shared OpenAI client for Agilow Scrum Master.
+"""
+
+import os
+import threading
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+_client = None
+_client_lock = threading.Lock()
+
+_async_client_settings = {}
+
+def create_openai_client(api_key=None, max_connections=10, max_keepalive_connections=5,
+                         keepalive_expiry=60.0, timeout=60.0, connect_timeout=10.0):
+    """
+    Creates an OpenAI client backed by a pooled HTTP connection.
+    
+    Args:
+        api_key (str): OpenAI API key, defaults to OPENAI_API_KEY
+        max_connections (int): Maximum open connections in the pool
+        max_keepalive_connections (int): Idle connections kept alive for reuse
+        keepalive_expiry (float): Seconds an idle connection is kept open
+        timeout (float): Overall request timeout in seconds
+        connect_timeout (float): Connection timeout in seconds
+    
+    Returns:
+        OpenAI: The configured client
+    """
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        ),
+        timeout=httpx.Timeout(timeout, connect=connect_timeout)
+    )
+    
+    return OpenAI(
+        api_key=api_key or os.getenv("OPENAI_API_KEY"),
+        http_client=http_client,
+        timeout=timeout,
+        max_retries=0  # Retries are handled by agents.resilience
+    )
+
+def get_openai_client():
+    """
+    Gets the shared OpenAI client, creating it with defaults on first use.
+    
+    The client keeps its connection pool open between calls and is safe
+    to use from multiple threads.
+    
+    Returns:
+        OpenAI: The shared client
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = create_openai_client()
+    return _client
+
+def set_openai_client(client):
+    """
+    Replaces the shared OpenAI client, closing the previous one.
+    
+    Args:
+        client (OpenAI): The client to use for all agent calls
+    """
+    global _client
+    with _client_lock:
+        previous, _client = _client, client
+    
+    if previous is not None and previous is not client:
+        previous.close()
+
+def create_async_openai_client(api_key=None, max_connections=10, max_keepalive_connections=5,
+                               keepalive_expiry=60.0, timeout=60.0, connect_timeout=10.0):
+    """
+    Creates an AsyncOpenAI client backed by a pooled HTTP connection.
+    
+    Async clients are bound to the event loop they are first used on, so
+    each loop should create its own (see `agents.engine`).
+    
+    Args:
+        api_key (str): OpenAI API key, defaults to OPENAI_API_KEY
+        max_connections (int): Maximum open connections in the pool
+        max_keepalive_connections (int): Idle connections kept alive for reuse
+        keepalive_expiry (float): Seconds an idle connection is kept open
+        timeout (float): Overall request timeout in seconds
+        connect_timeout (float): Connection timeout in seconds
+        
+    Returns:
+        AsyncOpenAI: The configured client
+    """
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        ),
+        timeout=httpx.Timeout(timeout, connect=connect_timeout)
+    )
+    
+    return AsyncOpenAI(
+        api_key=api_key or os.getenv("OPENAI_API_KEY"),
+        http_client=http_client,
+        timeout=timeout,
+        max_retries=0  # Retries are handled by agents.resilience
+    )
+
+def get_async_client_settings():
+    """Get the pool settings that async clients should be created with"""
+    return dict(_async_client_settings)
+
+def configure_openai_client(config):
+    """
+    Creates the shared OpenAI client from configuration.
+    
+    Args:
+        config (ConfigManager): The application configuration
+    """
+    settings = {
+        "api_key": config.get_openai_api_key(),
+        "max_connections": config.get_openai_max_connections(),
+        "max_keepalive_connections": config.get_openai_max_keepalive_connections(),
+        "keepalive_expiry": config.get_openai_keepalive_expiry(),
+        "timeout": config.get_openai_timeout()
+    }
+    
+    _async_client_settings.clear()
+    _async_client_settings.update(settings)
+    
+    set_openai_client(create_openai_client(**settings))
@@ -0,0 +1,83 @@
+"""
+Prompt assembly for the Scrum Master agent.
+"""
+
+from utils.tokens import count_tokens, normalize_whitespace
+
+# Tokens the chat format adds around each message, and to prime the reply
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+# Built once and sent unchanged at the start of every request, so providers
+# that cache prompt prefixes can reuse it
+SYSTEM_PROMPT = normalize_whitespace("""
+    You are an expert Agile Scrum Master assistant with Notion integration capabilities.
+    
+    Your role is to help the team with:
+    1. Sprint planning
+    2. Daily standups
+    3. Sprint reviews
+    4. Sprint retrospectives
+    5. Backlog refinement
+    
+    You have the ability to save conversations, epics, user stories, and other Agile artifacts directly to Notion.
+    When users mention wanting to add items to Notion or their backlog, acknowledge that you can help with this
+    and that the information will be automatically saved to their Notion workspace.
+    
+    Provide helpful, concise responses based on Agile best practices.
+    Format your responses appropriately based on the type of meeting or request.
+""")
+
+SYSTEM_PROMPT_TOKENS = count_tokens(SYSTEM_PROMPT)
+
+def build_messages(user_input, context=""):
+    """
+    Builds the chat messages sent to the Scrum Master model.
+    
+    The system prompt always comes first and never changes, followed by
+    the per-turn context and the user's input.
+    
+    Args:
+        user_input (str): The user's input
+        context (str): Additional context for the agent
+    
+    Returns:
+        list: Chat completion messages
+    """
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    
+    if context:
+        messages.append({"role": "system", "content": f"Context:\n{context}"})
+    
+    messages.append({"role": "user", "content": user_input})
+    return messages
+
+def count_prompt_tokens(messages):
+    """
+    Counts the tokens of a prompt by component.
+    
+    Args:
+        messages (list): Messages built by build_messages
+    
+    Returns:
+        dict: Tokens in the "system" prompt, the "context", the "user"
+            input and the chat format "overhead", plus the "total"
+    """
+    counts = {"system": 0, "context": 0, "user": 0}
+    
+    for index, message in enumerate(messages):
+        if message["role"] == "user":
+            component = "user"
+        elif index == 0:
+            component = "system"
+        else:
+            component = "context"
+        
+        if component == "system" and message["content"] is SYSTEM_PROMPT:
+            counts["system"] += SYSTEM_PROMPT_TOKENS
+        else:
+            counts[component] += count_tokens(message["content"])
+    
+    counts["overhead"] = TOKENS_PER_MESSAGE * len(messages) + TOKENS_PER_REPLY
+    counts["total"] = sum(counts.values())
+    return counts
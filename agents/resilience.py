@@ -0,0 +1,244 @@
+"""
+Resilient chat completion calls for the Scrum Master agent.
+"""
+
+import asyncio
+import time
+
+import openai
+
+from utils.resilience import CircuitBreaker, CircuitOpenError, TokenBucket, backoff_delay, parse_retry_after
+from utils.tokens import count_tokens
+
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+# Not worth retrying, but another model in the chain may work
+MODEL_ERROR_STATUS_CODES = {403, 404}
+
+def is_retryable(error):
+    """Check whether an OpenAI error is worth retrying"""
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    
+    status_code = getattr(error, "status_code", None)
+    return status_code in RETRYABLE_STATUS_CODES or (status_code is not None and status_code >= 500)
+
+def is_model_error(error):
+    """Check whether an OpenAI error means the model itself is unusable, e.g. not found"""
+    return getattr(error, "status_code", None) in MODEL_ERROR_STATUS_CODES
+
+def retry_after(error):
+    """Get the server-requested retry delay from an OpenAI error, if any"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    return parse_retry_after(response.headers.get("retry-after"))
+
+class ResilientChatCaller:
+    """
+    Makes chat completion calls with retries, rate limiting and fallbacks.
+    
+    Each call waits on client-side request and token budgets, retries
+    transient failures with jittered exponential backoff (honoring
+    Retry-After), and moves on to the next model in the chain when a
+    model keeps failing or its circuit breaker is open.
+    """
+    
+    def __init__(self, models=("gpt-4",), max_retries=4, base_delay=1.0, max_delay=30.0,
+                 requests_per_minute=0, tokens_per_minute=0, expected_completion_tokens=500,
+                 failure_threshold=5, recovery_timeout=30.0):
+        """
+        Initialize the caller.
+        
+        Args:
+            models (tuple): Models to try in order
+            max_retries (int): Retries per model for transient failures
+            base_delay (float): Backoff delay in seconds for the first retry
+            max_delay (float): Upper bound on a single backoff delay
+            requests_per_minute (int): Client-side request limit (0 disables)
+            tokens_per_minute (int): Client-side token limit (0 disables)
+            expected_completion_tokens (int): Completion size assumed when
+                charging the token limit
+            failure_threshold (int): Consecutive failures that open a model's breaker
+            recovery_timeout (float): Seconds a breaker stays open
+        """
+        self.models = tuple(models)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.expected_completion_tokens = expected_completion_tokens
+        
+        self.request_limiter = TokenBucket.per_minute(requests_per_minute)
+        self.token_limiter = TokenBucket.per_minute(tokens_per_minute)
+        self.breakers = {model: CircuitBreaker(failure_threshold, recovery_timeout) for model in self.models}
+    
+    def create(self, client, messages, **kwargs):
+        """
+        Create a chat completion, retrying and falling back as needed.
+        
+        Args:
+            client (OpenAI): The client to call
+            messages (list): Chat completion messages
+            **kwargs: Extra arguments for `chat.completions.create`, e.g. stream=True
+        
+        Returns:
+            The completion (or stream) from the first model that succeeds
+        """
+        plan = _CallPlan(self)
+        cost = self._estimate_tokens(messages)
+        
+        for model, attempt in plan:
+            if self.request_limiter:
+                self.request_limiter.acquire()
+            if self.token_limiter:
+                self.token_limiter.acquire(cost)
+            
+            try:
+                response = client.chat.completions.create(model=model, messages=messages, **kwargs)
+            except Exception as e:
+                delay = plan.failed(model, e, attempt)
+                if delay:
+                    time.sleep(delay)
+            else:
+                plan.succeeded(model)
+                return response
+            finally:
+                plan.finished(model)
+        
+        raise plan.last_error
+    
+    async def create_async(self, client, messages, **kwargs):
+        """Async version of `create` for AsyncOpenAI clients"""
+        plan = _CallPlan(self)
+        cost = self._estimate_tokens(messages)
+        
+        for model, attempt in plan:
+            if self.request_limiter:
+                await self.request_limiter.acquire_async()
+            if self.token_limiter:
+                await self.token_limiter.acquire_async(cost)
+            
+            try:
+                response = await client.chat.completions.create(model=model, messages=messages, **kwargs)
+            except Exception as e:
+                delay = plan.failed(model, e, attempt)
+                if delay:
+                    await asyncio.sleep(delay)
+            else:
+                plan.succeeded(model)
+                return response
+            finally:
+                plan.finished(model)
+        
+        raise plan.last_error
+    
+    def _delay(self, error, attempt):
+        """Get the wait before the next attempt, preferring the server's Retry-After"""
+        delay = retry_after(error)
+        if delay is not None:
+            return min(delay, self.max_delay)
+        return backoff_delay(attempt, self.base_delay, self.max_delay)
+    
+    def _estimate_tokens(self, messages):
+        """Estimate the tokens a call will use for the token limiter"""
+        return sum(count_tokens(message["content"]) for message in messages) + self.expected_completion_tokens
+
+class _CallPlan:
+    """
+    The models and attempts of one call, shared by the sync and async paths.
+    
+    Iterating yields (model, attempt) pairs. Transient failures are retried
+    on the same model; any other error, an open breaker or running out of
+    retries moves on to the next model in the chain.
+    """
+    
+    def __init__(self, caller):
+        """Plan a call through the caller's model chain"""
+        self.caller = caller
+        self.last_error = None
+        self._next_model = False
+        self._token = None  # What the breaker's `allow` returned for the current attempt
+    
+    def __iter__(self):
+        for model in self.caller.models:
+            breaker = self.caller.breakers[model]
+            self._next_model = False
+            
+            for attempt in range(self.caller.max_retries + 1):
+                self._token = breaker.allow()
+                if not self._token:
+                    self.last_error = CircuitOpenError(f"Circuit breaker open for {model}")
+                    break
+                
+                yield model, attempt
+                if self._next_model:
+                    break
+            
+            if model != self.caller.models[-1]:
+                print(f"\n⚠️ {model} unavailable ({self.last_error}), trying next model")
+    
+    def succeeded(self, model):
+        """Record a successful attempt"""
+        self.caller.breakers[model].record_success()
+    
+    def failed(self, model, error, attempt):
+        """
+        Record a failed attempt.
+        
+        Args:
+            model (str): The model that was called
+            error (Exception): What the call raised
+            attempt (int): The attempt number on this model, from 0
+        
+        Returns:
+            float: Seconds to wait before retrying the same model, or None
+                to move on
+        """
+        self.last_error = error
+        breaker = self.caller.breakers[model]
+        
+        if is_retryable(error):
+            breaker.record_failure()
+            if attempt < self.caller.max_retries:
+                return self.caller._delay(error, attempt)
+        elif is_model_error(error):
+            breaker.record_failure()
+        else:
+            # The service answered, it just refused this request
+            breaker.record_success()
+        
+        self._next_model = True
+        return None
+    
+    def finished(self, model):
+        """Release a trial call that ended without an outcome, e.g. when cancelled"""
+        self.caller.breakers[model].release(self._token)
+
+_chat_caller = ResilientChatCaller()
+
+def get_chat_caller():
+    """Get the shared resilient chat caller"""
+    return _chat_caller
+
+def set_chat_caller(caller):
+    """Replace the shared resilient chat caller"""
+    global _chat_caller
+    _chat_caller = caller
+
+def configure_chat_caller(config):
+    """
+    Creates the shared resilient chat caller from configuration.
+    
+    Args:
+        config (ConfigManager): The application configuration
+    """
+    set_chat_caller(ResilientChatCaller(
+        models=config.get_openai_model_chain(),
+        max_retries=config.get_openai_max_retries(),
+        base_delay=config.get_openai_backoff_base(),
+        max_delay=config.get_openai_backoff_max(),
+        requests_per_minute=config.get_openai_requests_per_minute(),
+        tokens_per_minute=config.get_openai_tokens_per_minute(),
+        failure_threshold=config.get_circuit_breaker_threshold(),
+        recovery_timeout=config.get_circuit_breaker_reset()
+    ))
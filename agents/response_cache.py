@@ -0,0 +1,188 @@
+"""
+Response cache for the Scrum Master agent.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+def make_cache_key(messages, model):
+    """
+    Builds a cache key from the messages sent to the model.
+    
+    Text is lowercased and whitespace is collapsed, so prompts that differ
+    only in case or spacing share a key.
+    
+    Args:
+        messages (list): Chat completion messages
+        model (str): The model name
+    
+    Returns:
+        str: A hex digest identifying the request
+    """
+    normalized = [
+        [message["role"], WHITESPACE_PATTERN.sub(" ", message["content"]).strip().lower()]
+        for message in messages
+    ]
+    payload = json.dumps([model, normalized], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """
+    Two-tier cache of agent responses.
+    
+    An in-memory LRU tier is backed by an optional SQLite file on disk.
+    Entries expire after `ttl` seconds and each tier is capped by entry
+    count. Hit/miss counts and the model latency saved by hits are kept in
+    `stats`.
+    """
+    
+    def __init__(self, max_entries=256, ttl=7 * 24 * 3600, disk_path=None, max_disk_entries=10000):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_entries (int): Maximum entries in the memory tier
+            ttl (float): Seconds before an entry expires
+            disk_path (str): Path of the SQLite file for the disk tier, or None
+            max_disk_entries (int): Maximum entries in the disk tier
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self.stats = {"hits": 0, "misses": 0, "saved_seconds": 0.0}
+        
+        self._entries = OrderedDict()  # key -> (response, created, latency)
+        self._lock = threading.Lock()
+        self._db = None
+        
+        if disk_path:
+            os.makedirs(os.path.dirname(disk_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT, created REAL, latency REAL, last_used REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            self._db.commit()
+    
+    def get(self, key):
+        """Get a cached response, or None on a miss"""
+        now = time.time()
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] > self.ttl:
+                del self._entries[key]
+                entry = None
+            
+            if entry is None and self._db is not None:
+                entry = self._get_from_disk(key, now)
+                if entry is not None:
+                    self._remember(key, entry)
+            
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            self.stats["saved_seconds"] += entry[2]
+            return entry[0]
+    
+    def put(self, key, response, latency=0.0):
+        """
+        Store a response.
+        
+        Args:
+            key (str): Key from `make_cache_key`
+            response (str): The agent's response
+            latency (float): Seconds the model took, credited on later hits
+        """
+        now = time.time()
+        entry = (response, now, latency)
+        
+        with self._lock:
+            self._remember(key, entry)
+            
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, created, latency, last_used) VALUES (?, ?, ?, ?, ?)",
+                    (key, response, now, latency, now)
+                )
+                self._db.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,)
+                )
+                self._db.commit()
+    
+    def hit_ratio(self):
+        """Get the fraction of lookups served from the cache"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+    
+    def clear(self):
+        """Remove every entry from both tiers"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+    
+    def close(self):
+        """Close the disk tier"""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+    
+    def _remember(self, key, entry):
+        """Add an entry to the memory tier, evicting the least recently used"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def _get_from_disk(self, key, now):
+        """Look an entry up in the disk tier, dropping it if expired"""
+        row = self._db.execute(
+            "SELECT response, created, latency FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        
+        if now - row[1] > self.ttl:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._db.commit()
+            return None
+        
+        self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        self._db.commit()
+        return tuple(row)
+
+def create_response_cache(config):
+    """
+    Creates the response cache from configuration.
+    
+    Args:
+        config (ConfigManager): The application configuration
+    
+    Returns:
+        ResponseCache: The cache, or None if caching is disabled
+    """
+    if not config.get_response_cache_enabled():
+        return None
+    
+    return ResponseCache(
+        max_entries=config.get_response_cache_max_entries(),
+        ttl=config.get_response_cache_ttl(),
+        disk_path=config.get_response_cache_path()
+    )
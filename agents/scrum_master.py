@@ -2,65 +2,202 @@
 Scrum Master agent for Agilow Scrum Master.
 """
 
-import os
 import time
 import sys
-from openai import OpenAI
 
-def get_scrum_master_response(user_input, context=""):
+from agents.openai_client import get_openai_client
+from agents.prompt_builder import build_messages, count_prompt_tokens
+from agents.resilience import get_chat_caller
+from agents.response_cache import make_cache_key
+from utils.metrics import get_metrics
+from utils.tokens import count_tokens
+
+_response_cache = None
+
+ERROR_RESPONSE = "I'm sorry, I encountered an error while processing your request. Please try again."
+
+def set_response_cache(cache):
+    """
+    Sets the cache used for agent responses.
+    
+    Args:
+        cache (ResponseCache): The cache to use, or None to disable caching
+    """
+    global _response_cache
+    _response_cache = cache
+
+def get_response_cache():
+    """Get the cache used for agent responses, or None if caching is disabled"""
+    return _response_cache
+
+def _lookup_cache(messages, use_cache):
+    """Look the messages up in the response cache, returning (key, cached response)"""
+    if not use_cache or _response_cache is None:
+        return None, None
+    
+    key = make_cache_key(messages, ",".join(get_chat_caller().models))
+    return key, _response_cache.get(key)
+
+def _store_in_cache(key, response, latency):
+    """Store a successful response in the response cache"""
+    if key is not None and _response_cache is not None and response != ERROR_RESPONSE:
+        _response_cache.put(key, response, latency)
+
+def _record_metrics(mode, messages, content, seconds, cached, time_to_first_token=None):
+    """Record an agent call's latency and, for calls that reached the model, its tokens"""
+    metrics = get_metrics()
+    metrics.observe("llm", seconds, mode=mode, source="cache" if cached else "model")
+    if cached:
+        return
+    
+    if time_to_first_token is not None:
+        metrics.observe("llm_first_token", time_to_first_token, mode=mode)
+    metrics.count("llm_tokens_in", count_prompt_tokens(messages)["total"])
+    metrics.count("llm_tokens_out", count_tokens(content))
+
+def _start_call(mode, user_input, context, use_cache):
+    """Build a call's messages and look them up in the cache, returning (messages, start, key, cached)"""
+    messages = build_messages(user_input, context)
+    start = time.perf_counter()
+    cache_key, cached = _lookup_cache(messages, use_cache)
+    if cached is not None:
+        _record_metrics(mode, messages, cached, time.perf_counter() - start, cached=True)
+    return messages, start, cache_key, cached
+
+def _finish_call(mode, messages, cache_key, start, content, time_to_first_token=None):
+    """Cache a complete response from the model and record its metrics"""
+    elapsed = time.perf_counter() - start
+    _store_in_cache(cache_key, content, elapsed)
+    _record_metrics(mode, messages, content, elapsed, cached=False, time_to_first_token=time_to_first_token)
+
+def get_scrum_master_response(user_input, context="", show_progress=True, use_cache=True):
     """
     Gets a response from the Scrum Master agent.
     
     Args:
         user_input (str): The user's input
         context (str): Additional context for the agent
+        show_progress (bool): Show a loading indicator on the terminal
+        use_cache (bool): Allow the response to come from, and be stored in,
+            the response cache; pass False for turns that must reach the model
         
     Returns:
         str: The agent's response
     """
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    messages, start, cache_key, cached = _start_call("complete", user_input, context, use_cache)
+    if cached is not None:
+        return cached
     
-    system_prompt = """
-    You are an expert Agile Scrum Master assistant with Notion integration capabilities.
+    # Show a loading indicator
+    if show_progress:
+        print("\nThinking", end="")
+        sys.stdout.flush()
     
-    Your role is to help the team with:
-    1. Sprint planning
-    2. Daily standups
-    3. Sprint reviews
-    4. Sprint retrospectives
-    5. Backlog refinement
+    try:
+        # Make the API call with retries, rate limiting and model fallback
+        response = get_chat_caller().create(get_openai_client(), messages)
+        content = response.choices[0].message.content
+    except Exception as e:
+        if show_progress:
+            print("\r" + " " * 20 + "\r", end="")  # Clear the loading indicator
+        print(f"\n❌ Error getting response: {str(e)}")
+        return ERROR_RESPONSE
     
-    You have the ability to save conversations, epics, user stories, and other Agile artifacts directly to Notion.
-    When users mention wanting to add items to Notion or their backlog, acknowledge that you can help with this
-    and that the information will be automatically saved to their Notion workspace.
+    if show_progress:
+        print("\r" + " " * 20 + "\r", end="")  # Clear the loading indicator
     
-    Provide helpful, concise responses based on Agile best practices.
-    Format your responses appropriately based on the type of meeting or request.
+    _finish_call("complete", messages, cache_key, start, content)
+    return content
+
+async def async_get_scrum_master_response(client, user_input, context="", use_cache=True):
     """
+    Gets a response from the Scrum Master agent without blocking the event loop.
     
-    messages = [
-        {"role": "system", "content": system_prompt},
-    ]
-    
-    if context:
-        messages.append({"role": "system", "content": f"Context: {context}"})
+    Args:
+        client (AsyncOpenAI): The async client to use
+        user_input (str): The user's input
+        context (str): Additional context for the agent
+        use_cache (bool): Allow the response to come from, and be stored in,
+            the response cache
         
-    messages.append({"role": "user", "content": user_input})
+    Returns:
+        str: The agent's response
+    """
+    messages, start, cache_key, cached = _start_call("complete", user_input, context, use_cache)
+    if cached is not None:
+        return cached
     
-    # Show a loading indicator
-    print("\nThinking", end="")
-    sys.stdout.flush()
+    try:
+        response = await get_chat_caller().create_async(client, messages)
+        content = response.choices[0].message.content
+    except Exception as e:
+        print(f"\n❌ Error getting response: {str(e)}")
+        return ERROR_RESPONSE
+    
+    _finish_call("complete", messages, cache_key, start, content)
+    return content
+
+async def async_stream_scrum_master_response(client, user_input, context="", stats=None, use_cache=True):
+    """
+    Streams a response from the Scrum Master agent without blocking the event loop.
+    
+    Args:
+        client (AsyncOpenAI): The async client to use
+        user_input (str): The user's input
+        context (str): Additional context for the agent
+        stats (dict): Optional dict that receives "time_to_first_token",
+            "total_time" in seconds, "cached", "complete" (False if the
+            stream broke off, leaving a partial or error response) and
+            "prompt_tokens" (counts per component, see count_prompt_tokens)
+            once the stream finishes
+        use_cache (bool): Allow the response to come from, and be stored in,
+            the response cache
+        
+    Yields:
+        str: Pieces of the agent's response in order
+    """
+    messages, start, cache_key, cached = _start_call("stream", user_input, context, use_cache)
+    first_token_at = None
+    pieces = []
+    completed = False
     
     try:
-        # Make the API call with a timeout
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=messages,
-            timeout=60  # 60 second timeout
-        )
-        print("\r" + " " * 20 + "\r", end="")  # Clear the loading indicator
-        return response.choices[0].message.content
+        if cached is not None:
+            first_token_at = time.perf_counter()
+            completed = True
+            yield cached
+            return
+        
+        stream = await get_chat_caller().create_async(client, messages, stream=True)
+        
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            
+            text = chunk.choices[0].delta.content
+            if not text:
+                continue
+            
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            pieces.append(text)
+            yield text
+        
+        completed = True
     except Exception as e:
-        print("\r" + " " * 20 + "\r", end="")  # Clear the loading indicator
         print(f"\n❌ Error getting response: {str(e)}")
-        return "I'm sorry, I encountered an error while processing your request. Please try again with a shorter message."
\ No newline at end of file
+        if first_token_at is None:
+            first_token_at = time.perf_counter()
+            yield ERROR_RESPONSE
+    finally:
+        end = time.perf_counter()
+        # Only streams that ran to the end are cached and counted
+        if completed and cached is None and pieces:
+            _finish_call("stream", messages, cache_key, start, "".join(pieces), (first_token_at or end) - start)
+        
+        if stats is not None:
+            stats["time_to_first_token"] = (first_token_at or end) - start
+            stats["total_time"] = end - start
+            stats["cached"] = cached is not None
+            stats["complete"] = completed
+            stats["prompt_tokens"] = count_prompt_tokens(messages)
@@ -0,0 +1,183 @@
+"""
+Map-reduce summarization of long inputs for the Scrum Master agent.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from agents.scrum_master import ERROR_RESPONSE, get_scrum_master_response
+from templates.meeting_notes import MEETING_TITLES, NOTE_FORMATS
+from utils.tokens import count_tokens, truncate_to_tokens
+
+def split_into_chunks(text, max_tokens):
+    """
+    Splits text into chunks of at most `max_tokens` tokens.
+    
+    Lines are kept whole where possible; a single line longer than the
+    limit is split between words.
+    
+    Args:
+        text (str): The text to split
+        max_tokens (int): Maximum tokens per chunk
+    
+    Returns:
+        list: Chunks of text, in order
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+    
+    def flush():
+        nonlocal current_tokens
+        if current:
+            chunks.append("\n".join(current))
+            current.clear()
+            current_tokens = 0
+    
+    for piece in _pieces(text, max_tokens):
+        tokens = count_tokens(piece) + 1
+        if current_tokens + tokens > max_tokens:
+            flush()
+        current.append(piece)
+        current_tokens += tokens
+    flush()
+    
+    return chunks
+
+def _pieces(text, max_tokens):
+    """Yield lines of text, splitting any line longer than `max_tokens` between words"""
+    for line in text.splitlines():
+        if count_tokens(line) < max_tokens:
+            yield line
+            continue
+        
+        words = []
+        tokens = 0
+        for word in line.split():
+            word_tokens = count_tokens(word) + 1
+            if words and tokens + word_tokens >= max_tokens:
+                yield " ".join(words)
+                words, tokens = [], 0
+            words.append(word)
+            tokens += word_tokens
+        if words:
+            yield " ".join(words)
+
+class MapReduceSummarizer:
+    """
+    Turns inputs too long for one request into a single Scrum artifact.
+    
+    The input is split into token-bounded chunks that are summarized in
+    parallel (map). The summaries are then combined into the requested
+    artifact (reduce); if they are still too long for one request they
+    are summarized again, level by level, until they fit.
+    """
+    
+    def __init__(self, complete=None, chunk_tokens=3000, reduce_tokens=6000, max_workers=4):
+        """
+        Initialize the summarizer.
+        
+        Args:
+            complete (callable): `complete(prompt, context, use_cache=True)`
+                returning the model's text; defaults to the Scrum Master agent
+            chunk_tokens (int): Maximum input tokens per map request
+            reduce_tokens (int): Maximum summary tokens in the final request
+            max_workers (int): Map requests in flight at once
+        """
+        self.complete = complete or complete_with_scrum_master
+        self.chunk_tokens = chunk_tokens
+        self.reduce_tokens = reduce_tokens
+        self.max_workers = max_workers
+    
+    def summarize(self, text, meeting_type="general", instructions="", context="", on_progress=None,
+                  use_cache=True):
+        """
+        Summarizes a long input into one artifact.
+        
+        Args:
+            text (str): The input, e.g. a pasted meeting transcript
+            meeting_type (str): "sprint_planning", "standup", "retrospective" or "general"
+            instructions (str): The user's request, if any, to honor in the result
+            context (str): Conversation context passed to the final request
+            on_progress (callable): Called as `on_progress(done, total)` as map
+                requests finish
+            use_cache (bool): Allow every request to be answered from, and
+                stored in, the response cache
+        
+        Returns:
+            str: The artifact
+        """
+        summaries = split_into_chunks(text, self.chunk_tokens) or [text]
+        
+        # Summarize level by level until everything fits in one request
+        while len(summaries) > 1 or count_tokens(summaries[0]) > self.reduce_tokens:
+            summaries = self._map(summaries, meeting_type, on_progress, use_cache)
+            if sum(count_tokens(summary) for summary in summaries) <= self.reduce_tokens:
+                break
+            summaries = split_into_chunks("\n\n".join(summaries), self.chunk_tokens)
+        
+        return self.complete(self._reduce_prompt(summaries, meeting_type, instructions), context,
+                             use_cache=use_cache)
+    
+    def _map(self, chunks, meeting_type, on_progress=None, use_cache=True):
+        """Summarize chunks in parallel, keeping their order"""
+        title = MEETING_TITLES.get(meeting_type, "meeting")
+        total = len(chunks)
+        done = 0
+        
+        def summarize_chunk(numbered_chunk):
+            index, chunk = numbered_chunk
+            prompt = (
+                f"This is part {index} of {total} of a long {title} input. Summarize it as concise "
+                "'- ' bullet points, keeping every decision, task, owner, status, blocker and date. "
+                f"Do not add anything that is not in the text.\n\n{chunk}"
+            )
+            # Keep a runaway summary from growing the next level
+            summary = self.complete(prompt, "", use_cache=use_cache)
+            return truncate_to_tokens(summary, max(self.chunk_tokens // 2, 1))
+        
+        summaries = []
+        with ThreadPoolExecutor(max_workers=max(self.max_workers, 1)) as executor:
+            for summary in executor.map(summarize_chunk, enumerate(chunks, 1)):
+                summaries.append(summary)
+                done += 1
+                if on_progress is not None:
+                    on_progress(done, total)
+        
+        return summaries
+    
+    def _reduce_prompt(self, summaries, meeting_type, instructions):
+        """Build the request that combines the summaries into the artifact"""
+        title = MEETING_TITLES.get(meeting_type, "meeting notes")
+        formatting = NOTE_FORMATS.get(
+            meeting_type,
+            "Organize it into decisions, action items with owners, and open questions as '- ' bullet items."
+        )
+        request = f"The user asked: {instructions}\n\n" if instructions else ""
+        
+        return (
+            f"{request}Below are summaries of consecutive parts of a long input. Combine them into a "
+            f"single {title} document, merging duplicates. {formatting}\n\n" + "\n\n".join(summaries)
+        )
+
+def complete_with_scrum_master(prompt, context, use_cache=True):
+    """Get a completion from the Scrum Master agent, raising if the request failed"""
+    response = get_scrum_master_response(prompt, context, show_progress=False, use_cache=use_cache)
+    if response == ERROR_RESPONSE:
+        raise RuntimeError("the Scrum Master agent could not process part of the input")
+    return response
+
+def create_summarizer(config):
+    """
+    Creates a summarizer from configuration.
+    
+    Args:
+        config (ConfigManager): The application configuration
+    
+    Returns:
+        MapReduceSummarizer: The summarizer
+    """
+    return MapReduceSummarizer(
+        chunk_tokens=config.get_summary_chunk_tokens(),
+        reduce_tokens=config.get_summary_chunk_tokens() * 2,
+        max_workers=config.get_summary_max_workers()
+    )
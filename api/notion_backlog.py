@@ -0,0 +1,487 @@
+"""
+Backlog sync from sprint planning notes to a Notion database.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from api.notion_blocks import MAX_TEXT_LENGTH, rich_text
+from api.notion_client import get_notion_client
+from memory.retrieval import STOPWORDS
+from templates.meeting_parser import parse_meeting_notes
+
+# Logical fields and the database properties that hold them
+BACKLOG_PROPERTIES = {
+    "title": "Name",
+    "key": "Story ID",
+    "description": "Description",
+    "epic": "Epic",
+    "priority": "Priority",
+    "status": "Status",
+}
+
+DEFAULT_STATUS = "To Do"
+PRIORITY_LEVELS = ("High", "Medium", "Low")
+
+STORY_ID_PATTERN = re.compile(r"\b([A-Z][A-Z0-9]{1,9}-\d+)\b")
+EPIC_NUMBER_PATTERN = re.compile(r"\bepic\s*#?(\d+)\b", re.IGNORECASE)
+FIELD_PATTERN = re.compile(r"^\W*(priority|status)\W*:\s*(.+)$", re.IGNORECASE)
+NAME_END_PATTERN = re.compile(r"\s*(?::|\s[-–—]\s)")
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+class BacklogItem:
+    """A user story destined for one row of the backlog database"""
+    
+    def __init__(self, key, title, description, epic=None, priority=None, status=None):
+        self.key = key
+        self.title = title
+        self.description = description
+        self.epic = epic
+        self.priority = priority
+        self.status = status
+    
+    def fields(self):
+        """Get the fields the planning notes determine; a status is only set when the notes give one"""
+        fields = {"key": self.key, "title": self.title, "description": self.description}
+        for name in ("epic", "priority", "status"):
+            if getattr(self, name):
+                # Select option names are limited to 100 characters without commas
+                fields[name] = getattr(self, name).replace(",", " ")[:100]
+        return fields
+
+def extract_backlog_items(content):
+    """
+    Extracts user stories from sprint planning notes.
+    
+    Each story becomes one item. Its key is a story ID found in the text
+    (e.g. "US-12") or else a hash of its first line, so the same story
+    maps to the same row every time it is saved. The epic is the one the
+    story names by number ("Epic 2") or by name, or else the epic sharing
+    the most words with it. The priority comes from a "Priority:" line
+    in the story or else from the rank of the first prioritization item
+    naming it or its epic, split into thirds of High, Medium and Low.
+    
+    Args:
+        content (str): Sprint planning notes or an assistant response
+    
+    Returns:
+        list: BacklogItem objects in the order the stories appear
+    """
+    notes = parse_meeting_notes(content)
+    epics = [(_name(epic), epic) for epic in notes.items("epics")]
+    priorities = [_name(priority).lower() for priority in notes.items("priorities")]
+    
+    items = {}
+    for story in notes.stories:
+        lines = [line.strip() for line in story.splitlines() if line.strip()]
+        if not lines:
+            continue
+        
+        fields = {}
+        text = []
+        for line in lines:
+            field = FIELD_PATTERN.match(line)
+            if field:
+                fields[field.group(1).lower()] = field.group(2).strip()
+            else:
+                text.append(line)
+        if not text:
+            continue
+        
+        title = text[0].replace("**", "")[:MAX_TEXT_LENGTH]
+        story_id = STORY_ID_PATTERN.search(story)
+        key = story_id.group(1) if story_id else hashlib.sha1(title.lower().encode("utf-8")).hexdigest()[:12]
+        
+        epic = _match_epic(story, epics)
+        priority = fields.get("priority") or _rank_priority(title, epic, priorities)
+        
+        # A story repeated later in the notes replaces the earlier version
+        items[key] = BacklogItem(key, title, "\n".join(text), epic, priority, fields.get("status"))
+    
+    return list(items.values())
+
+def _name(item):
+    """Get the name of a list item: the text before a colon or dash, if any"""
+    return NAME_END_PATTERN.split(item.replace("**", ""), maxsplit=1)[0].strip()
+
+def _match_epic(story, epics):
+    """Find the epic a story belongs to"""
+    if not epics:
+        return None
+    
+    number = EPIC_NUMBER_PATTERN.search(story)
+    if number and 1 <= int(number.group(1)) <= len(epics):
+        return epics[int(number.group(1)) - 1][0]
+    
+    lowered = story.lower()
+    for name, _ in epics:
+        if name and name.lower() in lowered:
+            return name
+    
+    words = _words(lowered)
+    best, best_overlap = None, 0
+    for name, epic in epics:
+        overlap = len(words & _words(epic.lower()))
+        if overlap > best_overlap:
+            best, best_overlap = name, overlap
+    return best
+
+def _words(text):
+    """Get the distinct words of a text that say something about its topic"""
+    return {word for word in WORD_PATTERN.findall(text) if word not in STOPWORDS and word != "epic"}
+
+def _rank_priority(title, epic, priorities):
+    """Map a story's rank in the prioritization list to a priority level"""
+    lowered = title.lower()
+    words = _words(lowered)
+    for rank, name in enumerate(priorities):
+        # Match the story, its epic, or at least half the words of the list item
+        names = _words(name)
+        if name and (name in lowered or (epic and name == epic.lower()) or 2 * len(names & words) >= len(names) > 0):
+            # Split the list into equal thirds
+            return PRIORITY_LEVELS[rank * len(PRIORITY_LEVELS) // len(priorities)]
+    return None
+
+class NotionBacklog:
+    """
+    Upserts backlog items as rows of a Notion database.
+    
+    An append-only ID map records which page holds each story key and a
+    hash of what was last written, so unchanged stories cost no requests
+    and changed ones are updated rather than duplicated. Writes run in
+    batches on a small thread pool, sharing the Notion client's rate
+    limit; the map is synced to disk after every batch.
+    
+    A local mirror of the database's rows answers lookups without
+    querying Notion. It is refreshed from Notion when it is older than
+    `mirror_ttl` and a story is missing from the map, so rows created
+    elsewhere (or before the map was lost) are adopted instead of
+    duplicated.
+    """
+    
+    def __init__(self, database_id, directory="data/notion_backlog", max_workers=3, batch_size=50,
+                 mirror_ttl=3600.0, properties=None):
+        """
+        Initialize the backlog and load its ID map and mirror.
+        
+        Args:
+            database_id (str): The ID of the Notion database
+            directory (str): Directory holding the ID map and mirror
+            max_workers (int): Writes in flight at once
+            batch_size (int): Writes per batch
+            mirror_ttl (float): Seconds before the mirror is considered stale
+            properties (dict): Database property names, defaults to BACKLOG_PROPERTIES
+        """
+        self.database_id = database_id
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.mirror_ttl = mirror_ttl
+        self.properties = dict(BACKLOG_PROPERTIES, **(properties or {}))
+        
+        # Both are per database, so switching databases never updates rows of the old one
+        self.map_path = os.path.join(directory, f"id_map_{database_id}.jsonl")
+        self.mirror_path = os.path.join(directory, f"mirror_{database_id}.json")
+        os.makedirs(directory, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._ids = {}  # story key -> {"page_id", "hash"}
+        self._map_lines = 0
+        self._mirror = {"synced_at": 0.0, "rows": {}}
+        self._mirror_keys = {}  # story key -> page ID, for rows of the mirror
+        
+        self._load_map()
+        self._load_mirror()
+        self._map_file = open(self.map_path, "a", encoding="utf-8")
+    
+    def upsert(self, items, on_progress=None):
+        """
+        Creates or updates a row for each item.
+        
+        Args:
+            items (list): BacklogItem objects
+            on_progress (callable): Called as `on_progress(done, total)` after each batch
+        
+        Returns:
+            dict: Counts of rows "created", "updated", "unchanged" and "failed",
+                and of API "requests" made
+        """
+        stats = {"created": 0, "updated": 0, "unchanged": 0, "failed": 0, "requests": 0}
+        
+        writes = []
+        for item in items:
+            fields = item.fields()
+            content_hash = _hash(fields)
+            
+            known = self._ids.get(item.key) or self._adopt(item.key, fields, stats)
+            if known is not None and known["hash"] == content_hash:
+                stats["unchanged"] += 1
+                continue
+            writes.append((item, fields, content_hash, known))
+        
+        with ThreadPoolExecutor(max_workers=max(self.max_workers, 1)) as executor:
+            for start in range(0, len(writes), self.batch_size):
+                batch = writes[start:start + self.batch_size]
+                for outcome in executor.map(lambda write: self._write(*write), batch):
+                    stats[outcome] += 1
+                stats["requests"] += len(batch)
+                
+                self._map_file.flush()
+                os.fsync(self._map_file.fileno())
+                if on_progress is not None:
+                    on_progress(min(start + len(batch), len(writes)), len(writes))
+        
+        self._save_mirror()
+        self._compact_map()
+        return stats
+    
+    def find(self, key):
+        """
+        Looks up a story's row in the local mirror.
+        
+        Args:
+            key (str): The story key
+        
+        Returns:
+            dict: The row's fields plus "page_id", or None if it is not known
+        """
+        with self._lock:
+            known = self._ids.get(key)
+            if known is not None and known["page_id"] in self._mirror["rows"]:
+                return dict(self._mirror["rows"][known["page_id"]], page_id=known["page_id"])
+            
+            page_id = self._mirror_keys.get(key)
+            if page_id in self._mirror["rows"]:
+                return dict(self._mirror["rows"][page_id], page_id=page_id)
+        return None
+    
+    def rows(self, epic=None):
+        """Get the mirrored rows, optionally only those of one epic"""
+        with self._lock:
+            return [
+                dict(row, page_id=page_id) for page_id, row in self._mirror["rows"].items()
+                if epic is None or row.get("epic") == epic
+            ]
+    
+    def refresh_mirror(self, stats=None):
+        """
+        Reloads the mirror from the database.
+        
+        Args:
+            stats (dict): Stats whose "requests" count the queries made
+        
+        Returns:
+            int: The number of rows mirrored
+        """
+        rows = {}
+        body = {"page_size": 100}
+        
+        while True:
+            response = get_notion_client().post(f"databases/{self.database_id}/query", json=body)
+            if stats is not None:
+                stats["requests"] += 1
+            response.raise_for_status()
+            data = response.json()
+            
+            for page in data.get("results", []):
+                if not page.get("archived"):
+                    rows[page["id"]] = self._parse_row(page)
+            
+            if not data.get("has_more") or not data.get("next_cursor"):
+                break
+            body["start_cursor"] = data["next_cursor"]
+        
+        with self._lock:
+            self._mirror = {"synced_at": time.time(), "rows": rows}
+            self._index_mirror()
+        self._save_mirror()
+        return len(rows)
+    
+    def close(self):
+        """Close the ID map"""
+        self._map_file.close()
+    
+    def _adopt(self, key, fields, stats):
+        """Find a row for a key missing from the map in the mirror, refreshing a stale mirror once"""
+        if time.time() - self._mirror["synced_at"] > self.mirror_ttl:
+            try:
+                self.refresh_mirror(stats)
+            except Exception as e:
+                print(f"⚠️ Could not refresh the backlog mirror: {str(e)}")
+                # Don't retry for every story in this run
+                self._mirror["synced_at"] = time.time()
+        
+        row = self.find(key)
+        if row is None:
+            return None
+        
+        # Compare only the fields the notes set, so e.g. a status changed in Notion is kept
+        known = {"page_id": row["page_id"], "hash": _hash({name: row.get(name) for name in fields})}
+        self._record(key, known)
+        return known
+    
+    def _write(self, item, fields, content_hash, known):
+        """Create or update one row, returning the outcome for the stats"""
+        properties = self._properties(fields, new=known is None)
+        client = get_notion_client()
+        
+        try:
+            if known is None:
+                response = client.post("pages", json={"parent": {"database_id": self.database_id},
+                                                      "properties": properties})
+            else:
+                response = client.patch(f"pages/{known['page_id']}", json={"properties": properties})
+            
+            if response.status_code >= 400:
+                print(f"⚠️ Could not save story {item.key} to Notion: HTTP {response.status_code} {response.text[:200]}")
+                return "failed"
+            
+            # A malformed reply fails only this story, not the rest of the upsert
+            page_id = response.json()["id"] if known is None else known["page_id"]
+        except Exception as e:
+            print(f"⚠️ Could not save story {item.key} to Notion: {str(e)}")
+            return "failed"
+        
+        self._record(item.key, {"page_id": page_id, "hash": content_hash})
+        
+        row = dict(fields)
+        if known is None and "status" not in row:
+            row["status"] = DEFAULT_STATUS
+        with self._lock:
+            self._mirror["rows"][page_id] = dict(self._mirror["rows"].get(page_id, {}), **row)
+            self._mirror_keys[item.key] = page_id
+        
+        return "created" if known is None else "updated"
+    
+    def _properties(self, fields, new):
+        """Build the Notion properties for a row's fields"""
+        names = self.properties
+        properties = {
+            names["title"]: {"title": rich_text(fields["title"])},
+            names["key"]: {"rich_text": rich_text(fields["key"])},
+            names["description"]: {"rich_text": rich_text(fields["description"])[:100]},
+        }
+        
+        for field in ("epic", "priority", "status"):
+            if fields.get(field):
+                properties[names[field]] = {"select": {"name": fields[field]}}
+        
+        # New rows start in the default status; existing rows keep the one set in Notion
+        if new and "status" not in fields:
+            properties[names["status"]] = {"select": {"name": DEFAULT_STATUS}}
+        return properties
+    
+    def _parse_row(self, page):
+        """Read a database page's fields for the mirror"""
+        properties = page.get("properties", {})
+        row = {}
+        
+        for field, name in self.properties.items():
+            prop = properties.get(name)
+            if not prop:
+                continue
+            
+            if prop.get("type") in ("title", "rich_text"):
+                value = "".join(item.get("plain_text", "") for item in prop[prop["type"]])
+            elif prop.get("type") == "select":
+                value = (prop.get("select") or {}).get("name")
+            else:
+                continue
+            
+            if value:
+                row[field] = value
+        return row
+    
+    def _record(self, key, known):
+        """Record a story's row in the ID map"""
+        with self._lock:
+            self._ids[key] = known
+            self._map_file.write(json.dumps({"key": key, **known}) + "\n")
+            self._map_lines += 1
+    
+    def _load_map(self):
+        """Replay the ID map; later lines win"""
+        if not os.path.exists(self.map_path):
+            return
+        
+        with open(self.map_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A line cut short by an interrupted run
+                    continue
+                self._ids[entry["key"]] = {"page_id": entry["page_id"], "hash": entry["hash"]}
+                self._map_lines += 1
+    
+    def _compact_map(self):
+        """Rewrite the ID map without superseded lines once they dominate it"""
+        with self._lock:
+            if self._map_lines <= 2 * len(self._ids) + 100:
+                return
+            
+            temp_path = self.map_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                for key, known in self._ids.items():
+                    f.write(json.dumps({"key": key, **known}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            
+            self._map_file.close()
+            os.replace(temp_path, self.map_path)
+            self._map_file = open(self.map_path, "a", encoding="utf-8")
+            self._map_lines = len(self._ids)
+    
+    def _load_mirror(self):
+        """Load the mirror from disk, if it was saved before"""
+        if not os.path.exists(self.mirror_path):
+            return
+        
+        try:
+            with open(self.mirror_path, "r", encoding="utf-8") as f:
+                self._mirror = json.load(f)
+            self._index_mirror()
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not load the backlog mirror from {self.mirror_path}: {str(e)}")
+    
+    def _index_mirror(self):
+        """Index the mirror's rows by story key"""
+        self._mirror_keys = {row["key"]: page_id for page_id, row in self._mirror["rows"].items() if row.get("key")}
+    
+    def _save_mirror(self):
+        """Write the mirror to disk atomically"""
+        with self._lock:
+            data = json.dumps(self._mirror, ensure_ascii=False)
+        
+        temp_path = self.mirror_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(temp_path, self.mirror_path)
+
+def _hash(fields):
+    """Hash a row's fields"""
+    return hashlib.sha1(json.dumps(fields, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def create_notion_backlog(config):
+    """
+    Creates the backlog sync from configuration.
+    
+    Args:
+        config (ConfigManager): The application configuration
+    
+    Returns:
+        NotionBacklog: The backlog, or None if no backlog database is configured
+    """
+    database_id = config.get_notion_backlog_database_id()
+    if not database_id:
+        return None
+    
+    return NotionBacklog(
+        database_id,
+        directory=config.get_notion_backlog_dir(),
+        max_workers=config.get_notion_backlog_concurrency()
+    )
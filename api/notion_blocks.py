@@ -0,0 +1,167 @@
+"""
+Markdown to Notion block compiler for Agilow Scrum Master.
+"""
+
+import re
+
+# Notion API limits
+MAX_TEXT_LENGTH = 2000
+MAX_RICH_TEXT_ITEMS = 100
+MAX_CHILDREN_PER_REQUEST = 100
+
+HEADING_PATTERN = re.compile(r"^(#{1,3})\s+(.*)$")
+TODO_PATTERN = re.compile(r"^\s*[-*]\s+\[([ xX])\]\s+(.*)$")
+BULLET_PATTERN = re.compile(r"^\s*[-*•●]\s+(.*)$")
+NUMBERED_PATTERN = re.compile(r"^\s*\d+[.)]\s+(.*)$")
+QUOTE_PATTERN = re.compile(r"^>\s?(.*)$")
+DIVIDER_PATTERN = re.compile(r"^\s*(?:-{3,}|\*{3,}|_{3,})\s*$")
+FENCE_PATTERN = re.compile(r"^```(\w*)\s*$")
+BOLD_PATTERN = re.compile(r"\*\*(.+?)\*\*")
+
+# Fence languages passed through to Notion; anything else becomes plain text
+CODE_LANGUAGES = {
+    "bash", "c", "c++", "css", "go", "html", "java", "javascript", "json", "markdown",
+    "python", "ruby", "rust", "shell", "sql", "typescript", "yaml"
+}
+
+def rich_text(text):
+    """
+    Converts text into Notion rich text items.
+    
+    `**bold**` spans become bold annotations and every item is kept within
+    Notion's per-item character limit.
+    
+    Args:
+        text (str): The text to convert
+    
+    Returns:
+        list: Rich text items
+    """
+    items = []
+    position = 0
+    
+    for match in BOLD_PATTERN.finditer(text):
+        items.extend(_text_items(text[position:match.start()]))
+        items.extend(_text_items(match.group(1), bold=True))
+        position = match.end()
+    items.extend(_text_items(text[position:]))
+    
+    return items
+
+def _text_items(text, bold=False):
+    """Split plain text into rich text items of at most MAX_TEXT_LENGTH characters"""
+    items = []
+    for start in range(0, len(text), MAX_TEXT_LENGTH):
+        item = {"type": "text", "text": {"content": text[start:start + MAX_TEXT_LENGTH]}}
+        if bold:
+            item["annotations"] = {"bold": True}
+        items.append(item)
+    return items
+
+def _blocks(block_type, text, **extra):
+    """Build one or more blocks of a type, splitting text that exceeds the rich text item limit"""
+    items = rich_text(text) or [{"type": "text", "text": {"content": ""}}]
+    
+    blocks = []
+    for start in range(0, len(items), MAX_RICH_TEXT_ITEMS):
+        body = {"rich_text": items[start:start + MAX_RICH_TEXT_ITEMS]}
+        body.update(extra)
+        blocks.append({"object": "block", "type": block_type, block_type: body})
+    return blocks
+
+def _code_language(language):
+    """Map a Markdown fence language to a Notion code language"""
+    language = language.lower()
+    return language if language in CODE_LANGUAGES else "plain text"
+
+def markdown_to_blocks(markdown):
+    """
+    Compiles Markdown into Notion blocks.
+    
+    Supports headings (#, ##, ###), bulleted, numbered and to-do list
+    items, quotes, dividers and fenced code. Consecutive plain lines are
+    joined into a single paragraph.
+    
+    Args:
+        markdown (str): The Markdown to compile
+    
+    Returns:
+        list: Notion block objects in document order
+    """
+    blocks = []
+    paragraph = []
+    code = None
+    code_language = ""
+    
+    def flush_paragraph():
+        if paragraph:
+            blocks.extend(_blocks("paragraph", "\n".join(paragraph)))
+            paragraph.clear()
+    
+    for line in markdown.splitlines():
+        fence = FENCE_PATTERN.match(line.strip())
+        
+        if code is not None:
+            if fence:
+                blocks.extend(_blocks("code", "\n".join(code), language=_code_language(code_language)))
+                code = None
+            else:
+                code.append(line)
+            continue
+        
+        if fence:
+            flush_paragraph()
+            code = []
+            code_language = fence.group(1)
+            continue
+        
+        if not line.strip():
+            flush_paragraph()
+            continue
+        
+        heading = HEADING_PATTERN.match(line)
+        todo = TODO_PATTERN.match(line)
+        bullet = BULLET_PATTERN.match(line)
+        numbered = NUMBERED_PATTERN.match(line)
+        quote = QUOTE_PATTERN.match(line)
+        
+        if heading:
+            flush_paragraph()
+            blocks.extend(_blocks(f"heading_{len(heading.group(1))}", heading.group(2).strip()))
+        elif DIVIDER_PATTERN.match(line):
+            flush_paragraph()
+            blocks.append({"object": "block", "type": "divider", "divider": {}})
+        elif todo:
+            flush_paragraph()
+            blocks.extend(_blocks("to_do", todo.group(2).strip(), checked=todo.group(1) != " "))
+        elif bullet:
+            flush_paragraph()
+            blocks.extend(_blocks("bulleted_list_item", bullet.group(1).strip()))
+        elif numbered:
+            flush_paragraph()
+            blocks.extend(_blocks("numbered_list_item", numbered.group(1).strip()))
+        elif quote:
+            flush_paragraph()
+            blocks.extend(_blocks("quote", quote.group(1).strip()))
+        else:
+            paragraph.append(line.strip())
+    
+    # An unterminated fence still keeps its content
+    if code is not None:
+        blocks.extend(_blocks("code", "\n".join(code), language=_code_language(code_language)))
+    flush_paragraph()
+    
+    return blocks
+
+def batch_blocks(blocks, size=MAX_CHILDREN_PER_REQUEST):
+    """
+    Splits blocks into batches small enough for one append request.
+    
+    Args:
+        blocks (list): Notion block objects
+        size (int): Maximum blocks per batch
+    
+    Returns:
+        list: Lists of blocks, in order
+    """
+    return [blocks[start:start + size] for start in range(0, len(blocks), size)]
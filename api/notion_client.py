@@ -0,0 +1,195 @@
+"""
+Shared Notion API client for Agilow Scrum Master.
+"""
+
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from utils.metrics import get_metrics
+from utils.resilience import TokenBucket, backoff_delay, parse_retry_after
+
+NOTION_API_URL = "https://api.notion.com/v1"
+NOTION_VERSION = "2022-06-28"
+
+def connect_failed(error):
+    """
+    Check whether a connection error happened before the request was sent.
+    
+    Args:
+        error (requests.ConnectionError): The error raised by the session
+    
+    Returns:
+        bool: True for connect timeouts and refused or unresolvable connections
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    
+    # requests wraps urllib3's MaxRetryError, whose reason is the underlying error
+    reason = error.args[0] if error.args else None
+    return isinstance(getattr(reason, "reason", reason), NewConnectionError)
+
+class NotionClient:
+    """
+    Notion API client with a pooled session, retries and rate limiting.
+    
+    Requests share one keep-alive connection pool, wait on a client-side
+    limiter sized to Notion's ~3 requests/second budget, and are retried
+    on 429 and 5xx responses (honoring Retry-After) and on connection
+    failures. A GET is retried on any connection failure; other methods
+    only when the connection was never made, since a request that was
+    sent may already have been applied (an append would be duplicated).
+    """
+    
+    def __init__(self, api_key=None, base_url=NOTION_API_URL, timeout=30.0, connect_timeout=5.0,
+                 max_retries=5, base_delay=1.0, max_delay=30.0, requests_per_second=3.0, pool_size=10):
+        """
+        Initialize the client.
+        
+        Args:
+            api_key (str): Notion API key, defaults to NOTION_API_KEY
+            base_url (str): API base URL, e.g. a local stand-in for testing
+            timeout (float): Read timeout in seconds
+            connect_timeout (float): Connection timeout in seconds
+            max_retries (int): Retries for rate-limited or failed requests
+            base_delay (float): Backoff delay in seconds for the first retry
+            max_delay (float): Upper bound on a single backoff delay
+            requests_per_second (float): Client-side request rate (0 disables)
+            pool_size (int): Connections kept in the pool
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, timeout)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.limiter = TokenBucket(requests_per_second) if requests_per_second else None
+        self.stats = {"requests": 0, "retries": 0}
+        self._stats_lock = threading.Lock()
+        
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key or os.getenv('NOTION_API_KEY')}",
+            "Content-Type": "application/json",
+            "Notion-Version": NOTION_VERSION
+        })
+    
+    def request(self, method, path, **kwargs):
+        """
+        Send a request, retrying rate limits and transient failures.
+        
+        Args:
+            method (str): HTTP method
+            path (str): Path relative to the API base URL, e.g. "blocks/<id>/children"
+            **kwargs: Extra arguments for `requests.Session.request`
+        
+        Returns:
+            requests.Response: The final response (which may still be an error)
+        """
+        # Timed as the caller sees it, rate-limit waits and retries included
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = self._send(method, path, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            get_metrics().observe("notion_request", time.perf_counter() - start, method=method, status=status)
+    
+    def _send(self, method, path, **kwargs):
+        """Send a request with retries; see `request`"""
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        kwargs.setdefault("timeout", self.timeout)
+        
+        for attempt in range(self.max_retries + 1):
+            if self.limiter:
+                self.limiter.acquire()
+            
+            with self._stats_lock:
+                self.stats["requests"] += 1
+            
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.ConnectionError as e:
+                # Read timeouts and dropped connections are only retried for reads,
+                # since a write may already have been applied
+                if attempt >= self.max_retries or (method.upper() != "GET" and not connect_failed(e)):
+                    raise
+                self._wait(attempt)
+                continue
+            
+            if response.status_code == 429 or response.status_code >= 500:
+                if attempt >= self.max_retries:
+                    return response
+                self._wait(attempt, response.headers.get("Retry-After"))
+                continue
+            
+            return response
+    
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+    
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+    
+    def patch(self, path, **kwargs):
+        return self.request("PATCH", path, **kwargs)
+    
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+    
+    def close(self):
+        """Close the connection pool"""
+        self.session.close()
+    
+    def _wait(self, attempt, retry_after=None):
+        """Sleep before a retry, preferring the server's Retry-After"""
+        with self._stats_lock:
+            self.stats["retries"] += 1
+        
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = backoff_delay(attempt, self.base_delay, self.max_delay)
+        time.sleep(min(delay, self.max_delay))
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_notion_client():
+    """Get the shared Notion client, creating it with defaults on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = NotionClient(base_url=os.getenv("NOTION_BASE_URL", NOTION_API_URL))
+    return _client
+
+def set_notion_client(client):
+    """Replace the shared Notion client, closing the previous one"""
+    global _client
+    with _client_lock:
+        previous, _client = _client, client
+    
+    if previous is not None and previous is not client:
+        previous.close()
+
+def configure_notion_client(config):
+    """
+    Creates the shared Notion client from configuration.
+    
+    Args:
+        config (ConfigManager): The application configuration
+    """
+    set_notion_client(NotionClient(
+        api_key=config.get_notion_api_key(),
+        base_url=config.get_notion_base_url(),
+        timeout=config.get_notion_timeout(),
+        max_retries=config.get_notion_max_retries(),
+        requests_per_second=config.get_notion_requests_per_second()
+    ))
@@ -2,9 +2,10 @@
 Notion API integration for Agilow Scrum Master.
 """
 
-import os
-import requests
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from api.notion_blocks import batch_blocks, markdown_to_blocks
+from api.notion_client import get_notion_client
 
 def append_to_notion_page(page_id, content):
     """
@@ -17,44 +18,22 @@ def append_to_notion_page(page_id, content):
     Returns:
         bool: True if successful, False otherwise
     """
-    notion_api_key = os.getenv("NOTION_API_KEY")
-    
-    headers = {
-        "Authorization": f"Bearer {notion_api_key}",
-        "Content-Type": "application/json",
-        "Notion-Version": "2022-06-28"
-    }
-    
-    url = f"https://api.notion.com/v1/blocks/{page_id}/children"
-    
-    # Just use a single paragraph block with the entire content
-    blocks = [
-        {
-            "object": "block",
-            "type": "paragraph",
-            "paragraph": {
-                "rich_text": [
-                    {
-                        "type": "text",
-                        "text": {
-                            "content": content
-                        }
-                    }
-                ]
-            }
-        }
-    ]
+    client = get_notion_client()
     
-    data = {"children": blocks}
+    # Compile the Markdown into blocks and send them in batches Notion accepts;
+    # batches are appended one after another so the page keeps their order
+    batches = batch_blocks(markdown_to_blocks(content))
     
     try:
-        response = requests.patch(url, headers=headers, json=data)
-        print(f"Notion API response status: {response.status_code}")
-        
-        if response.status_code >= 400:
-            print(f"Notion API error: {response.text}")
+        for batch in batches:
+            response = client.patch(f"blocks/{page_id}/children", json={"children": batch})
+            print(f"Notion API response status: {response.status_code}")
             
-        return response.status_code >= 200 and response.status_code < 300
+            if response.status_code >= 400:
+                print(f"Notion API error: {response.text}")
+                return False
+        
+        return True
     except Exception as e:
         print(f"Error calling Notion API: {str(e)}")
         return False
@@ -63,25 +42,141 @@ def get_notion_page_content(page_id):
     """
     Gets the content of a Notion page.
     
+    Follows pagination cursors so pages with more than 100 blocks are
+    returned in full. Use `iter_notion_blocks` to process large pages
+    incrementally instead.
+    
     Args:
         page_id (str): The ID of the Notion page
         
     Returns:
-        str: The content of the page
+        dict: A block list object with every top-level block in `results`,
+            or None on error
     """
-    notion_api_key = os.getenv("NOTION_API_KEY")
+    try:
+        return {"object": "list", "results": list(iter_notion_blocks(page_id)), "has_more": False}
+    except Exception as e:
+        print(f"Error getting Notion page content: {str(e)}")
+        return None
+
+def iter_notion_blocks(page_id, recursive=False, max_workers=4, page_size=100):
+    """
+    Yields the blocks of a Notion page in document order.
     
-    headers = {
-        "Authorization": f"Bearer {notion_api_key}",
-        "Notion-Version": "2022-06-28"
-    }
+    Blocks are fetched one page of results at a time, following
+    `next_cursor` until `has_more` is false, so callers can stop early
+    without downloading the rest of the page.
     
-    url = f"https://api.notion.com/v1/blocks/{page_id}/children?page_size=100"
+    Args:
+        page_id (str): The ID of the Notion page (or of a parent block)
+        recursive (bool): Also yield nested child blocks, each directly
+            after its parent
+        max_workers (int): Child block subtrees fetched in parallel
+        page_size (int): Blocks requested per call (Notion allows up to 100)
     
-    response = requests.get(url, headers=headers)
+    Yields:
+        dict: Notion block objects; nested blocks carry a `depth` key
     
-    if response.status_code >= 200 and response.status_code < 300:
-        return response.json()
-    else:
-        print(f"Error getting Notion page content: {response.status_code}")
-        return None
+    Raises:
+        requests.HTTPError: If Notion returns an error response
+    """
+    for depth, block in _iter_blocks(page_id, recursive, max_workers, page_size):
+        if depth:
+            block["depth"] = depth
+        yield block
+
+def iter_notion_page_text(page_id, recursive=False, max_workers=4):
+    """
+    Yields the plain text of each block on a Notion page.
+    
+    Blocks without text (dividers, images, ...) are skipped and nested
+    blocks are indented by two spaces per level.
+    
+    Args:
+        page_id (str): The ID of the Notion page
+        recursive (bool): Include nested child blocks
+        max_workers (int): Child block subtrees fetched in parallel
+    
+    Yields:
+        str: The text of one block
+    """
+    for depth, block in _iter_blocks(page_id, recursive, max_workers):
+        text = block_plain_text(block)
+        if text:
+            yield "  " * depth + text
+
+def block_plain_text(block):
+    """
+    Gets the plain text of a Notion block.
+    
+    Args:
+        block (dict): A Notion block object
+    
+    Returns:
+        str: The block's text, or an empty string if it has none
+    """
+    body = block.get(block.get("type"), {})
+    text = "".join(item.get("plain_text") or item.get("text", {}).get("content", "")
+                   for item in body.get("rich_text", []))
+    
+    if block.get("type") == "to_do" and text:
+        return f"[{'x' if body.get('checked') else ' '}] {text}"
+    return text
+
+def _fetch_block_pages(block_id, page_size=100):
+    """Yield each page of child block results, following pagination cursors"""
+    client = get_notion_client()
+    params = {"page_size": page_size}
+    
+    while True:
+        response = client.get(f"blocks/{block_id}/children", params=params)
+        response.raise_for_status()
+        data = response.json()
+        
+        yield data.get("results", [])
+        
+        if not data.get("has_more") or not data.get("next_cursor"):
+            return
+        params["start_cursor"] = data["next_cursor"]
+
+def _iter_blocks(block_id, recursive, max_workers, page_size=100, depth=0):
+    """
+    Yield (depth, block) pairs for a block's children.
+    
+    When recursing, the subtrees under each page of results are fetched
+    on a bounded thread pool while the page is being yielded; only the
+    current page's subtrees are ever pending, so memory stays bounded by
+    the page size rather than the size of the document.
+    """
+    if not recursive:
+        for results in _fetch_block_pages(block_id, page_size):
+            for block in results:
+                yield depth, block
+        return
+    
+    executor = ThreadPoolExecutor(max_workers=max(max_workers, 1))
+    try:
+        for results in _fetch_block_pages(block_id, page_size):
+            # Start fetching this page's child subtrees before yielding any of it
+            subtrees = {
+                block["id"]: executor.submit(_collect_subtree, block["id"], page_size, depth + 1)
+                for block in results if block.get("has_children")
+            }
+            
+            for block in results:
+                yield depth, block
+                if block["id"] in subtrees:
+                    yield from subtrees[block["id"]].result()
+    finally:
+        # Callers may stop early; drop any subtree fetches that have not started
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def _collect_subtree(block_id, page_size, depth):
+    """Fetch every descendant of a block as (depth, block) pairs, depth first"""
+    pairs = []
+    for results in _fetch_block_pages(block_id, page_size):
+        for block in results:
+            pairs.append((depth, block))
+            if block.get("has_children"):
+                pairs.extend(_collect_subtree(block["id"], page_size, depth + 1))
+    return pairs
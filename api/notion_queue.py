@@ -0,0 +1,491 @@
+"""
+Durable write-behind queue for Notion saves.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+
+from api.notion_backlog import create_notion_backlog, extract_backlog_items
+from api.notion_blocks import MAX_CHILDREN_PER_REQUEST, markdown_to_blocks
+from api.notion_client import get_notion_client
+from api.notion_sync import create_notion_sync
+from utils.metrics import get_metrics
+from utils.resilience import backoff_delay
+
+class NotionSaveQueue:
+    """
+    On-disk queue of pending Notion saves drained by a background worker.
+    
+    Each save is written to its own JSON file before `enqueue` returns, so
+    pending saves survive crashes and restarts. The worker sends them in
+    order, packing consecutive saves for the same page into shared append
+    requests, and records progress after every request so a retry resumes
+    where it stopped instead of appending blocks twice. Saves that keep
+    failing are moved to a `failed` directory rather than dropped.
+    
+    Saves queued with a `sync_key` update the copy of that document
+    already on the page through a `NotionPageSync` instead of appending;
+    when several versions of one document are pending, only the newest
+    is sent. Sprint plans queued with `enqueue_backlog` have their stories
+    upserted into the backlog database.
+    """
+    
+    def __init__(self, directory="data/notion_queue", batch_size=MAX_CHILDREN_PER_REQUEST, max_attempts=8,
+                 base_delay=5.0, max_delay=300.0, sync=None, backlog=None, start=True):
+        """
+        Initialize the queue and start its worker.
+        
+        Args:
+            directory (str): Directory holding pending saves
+            batch_size (int): Maximum blocks per append request
+            max_attempts (int): Failed attempts before a save is moved to `failed`
+            base_delay (float): Delay in seconds before the first retry
+            max_delay (float): Upper bound on the delay between retries
+            sync (NotionPageSync): Sync used for saves queued with a `sync_key`
+            backlog (NotionBacklog): Backlog database for `enqueue_backlog`
+            start (bool): Start the background worker immediately
+        """
+        self.directory = directory
+        self.failed_directory = os.path.join(directory, "failed")
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sync = sync
+        self.backlog = backlog
+        
+        self.stats = {"sent": 0, "failed": 0, "requests": 0, "last_error": None}
+        self._completed = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._busy = False
+        self._retry_at = 0.0
+        
+        os.makedirs(self.failed_directory, exist_ok=True)
+        self._discard_partial_writes()
+        
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        if start:
+            self._thread.start()
+    
+    def enqueue(self, page_id, content, sync_key=None):
+        """
+        Add a save to the queue.
+        
+        Args:
+            page_id (str): The ID of the Notion page
+            content (str): Markdown content to append
+            sync_key (str): Name of the document the content is the latest
+                version of; when set and the queue has a sync, the saved copy
+                is updated instead of a new one appended
+        
+        Returns:
+            str: The ID of the queued save
+        """
+        # Nanosecond timestamps keep file names in enqueue order across restarts
+        save_id = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        self._write_item({
+            "id": save_id,
+            "page_id": page_id,
+            "content": content,
+            "sync_key": sync_key if self.sync is not None else None,
+            "blocks_sent": 0,
+            "attempts": 0,
+            "created": time.time(),
+            "last_error": None
+        })
+        
+        self._wakeup.set()
+        return save_id
+    
+    def enqueue_backlog(self, content):
+        """
+        Queue the stories of a sprint plan to be upserted into the backlog database.
+        
+        Args:
+            content (str): The sprint planning notes
+        
+        Returns:
+            str: The ID of the queued save
+        """
+        save_id = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        self._write_item({
+            "id": save_id,
+            "kind": "backlog",
+            "page_id": None,
+            "content": content,
+            "sync_key": None,
+            "blocks_sent": 0,
+            "attempts": 0,
+            "created": time.time(),
+            "last_error": None
+        })
+        
+        self._wakeup.set()
+        return save_id
+    
+    def pending_count(self):
+        """Get the number of saves waiting to be sent"""
+        return len(self._pending_files())
+    
+    def failed_count(self):
+        """Get the number of saves that gave up after `max_attempts`"""
+        return len([name for name in os.listdir(self.failed_directory) if name.endswith(".json")])
+    
+    def status(self):
+        """
+        Get the queue's state for display.
+        
+        Returns:
+            dict: Pending and failed counts, whether a send is in progress,
+                seconds until the next retry, and the worker's counters
+        """
+        with self._lock:
+            status = dict(self.stats)
+            status["sending"] = self._busy
+            status["retry_in"] = max(self._retry_at - time.time(), 0.0)
+        
+        status["pending"] = self.pending_count()
+        status["failed_saves"] = self.failed_count()
+        return status
+    
+    def pop_completed(self):
+        """Get (save_id, success) results for saves finished since the last call"""
+        with self._lock:
+            completed, self._completed = self._completed, []
+        return completed
+    
+    def retry_failed(self):
+        """
+        Move saves that gave up back into the queue.
+        
+        Returns:
+            int: The number of saves requeued
+        """
+        names = sorted(name for name in os.listdir(self.failed_directory) if name.endswith(".json"))
+        for name in names:
+            path = os.path.join(self.failed_directory, name)
+            with open(path, "r") as f:
+                item = json.load(f)
+            item["attempts"] = 0
+            self._write_item(item)
+            os.remove(path)
+        
+        with self._lock:
+            self._retry_at = 0.0
+        self._wakeup.set()
+        return len(names)
+    
+    def flush(self, timeout=None):
+        """
+        Wait until the queue is empty or a save is waiting to be retried.
+        
+        Args:
+            timeout (float): Maximum seconds to wait
+        
+        Returns:
+            bool: True if every pending save was sent
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self._wakeup.set()
+        
+        while True:
+            with self._lock:
+                waiting_to_retry = self._retry_at > time.time()
+                busy = self._busy
+            
+            if not busy and (not self._pending_files() or waiting_to_retry):
+                return not self._pending_files()
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+    
+    def close(self, timeout=5.0):
+        """
+        Try to send pending saves, then stop the worker.
+        
+        Saves still pending after `timeout` stay on disk and are sent the
+        next time a queue is opened on the same directory.
+        
+        Args:
+            timeout (float): Seconds to spend flushing before stopping
+        
+        Returns:
+            int: The number of saves left pending
+        """
+        if self._thread.is_alive():
+            self.flush(timeout)
+            self._stopping = True
+            self._wakeup.set()
+            self._thread.join(timeout)
+        
+        if self.backlog is not None and not self._thread.is_alive():
+            self.backlog.close()
+        return self.pending_count()
+    
+    def _run(self):
+        """Worker loop: send pending saves, backing off after failures"""
+        while not self._stopping:
+            with self._lock:
+                delay = self._retry_at - time.time()
+            
+            if delay > 0:
+                self._wakeup.wait(delay)
+                self._wakeup.clear()
+                continue
+            
+            items = []
+            with self._lock:
+                self._busy = True
+            try:
+                items = self._next_batch()
+                if items:
+                    self._send(items)
+            except Exception as e:
+                # Anything unexpected, e.g. the disk failing while recording progress,
+                # is retried later instead of stopping the worker
+                self._record_error([item for item, _ in items], f"{type(e).__name__}: {str(e)}")
+                continue
+            finally:
+                with self._lock:
+                    self._busy = False
+            
+            if not items:
+                self._wakeup.wait()
+                self._wakeup.clear()
+    
+    def _next_batch(self):
+        """Load the oldest pending save plus any following saves for the same page, with their blocks"""
+        items = []
+        block_count = 0
+        for path in self._pending_files():
+            try:
+                with open(path, "r") as f:
+                    item = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Skipping unreadable Notion queue entry {path}: {str(e)}")
+                os.replace(path, os.path.join(self.failed_directory, os.path.basename(path)))
+                continue
+            
+            if item.get("kind") == "backlog" or (item.get("sync_key") and self.sync is not None):
+                if items:
+                    break
+                # Synced saves and backlog updates are sent on their own
+                return [(item, None)]
+            
+            if items and item["page_id"] != items[0][0]["page_id"]:
+                break
+            
+            blocks = markdown_to_blocks(item["content"])
+            items.append((item, blocks))
+            
+            # Stop once there are enough blocks to fill a request
+            block_count += len(blocks) - item["blocks_sent"]
+            if block_count >= self.batch_size:
+                break
+        return items
+    
+    def _send(self, pending):
+        """
+        Append the remaining blocks of consecutive saves for one page.
+        
+        Blocks from several saves share requests of up to `batch_size`
+        blocks. After each successful request every affected save records
+        how many of its blocks were sent, and finished saves are removed.
+        """
+        if pending[0][1] is None:
+            if pending[0][0].get("kind") == "backlog":
+                self._send_backlog(pending[0][0])
+            else:
+                self._send_sync(pending[0][0])
+            return
+        
+        page_id = pending[0][0]["page_id"]
+        
+        while pending:
+            # Take up to batch_size blocks, noting how many come from each save
+            batch = []
+            taken = []
+            for item, blocks in pending:
+                room = self.batch_size - len(batch)
+                if room <= 0:
+                    break
+                chunk = blocks[item["blocks_sent"]:item["blocks_sent"] + room]
+                batch.extend(chunk)
+                taken.append((item, len(chunk)))
+            
+            error = None
+            if batch:
+                try:
+                    response = get_notion_client().patch(f"blocks/{page_id}/children", json={"children": batch})
+                    if response.status_code >= 400:
+                        error = f"HTTP {response.status_code}: {response.text[:200]}"
+                except Exception as e:
+                    error = str(e)
+                
+                with self._lock:
+                    self.stats["requests"] += 1
+            
+            if error:
+                self._record_failure([item for item, _ in pending], error)
+                return
+            
+            for item, count in taken:
+                item["blocks_sent"] += count
+            
+            remaining = []
+            for item, blocks in pending:
+                if item["blocks_sent"] >= len(blocks):
+                    self._finish(item, True)
+                else:
+                    self._write_item(item)
+                    remaining.append((item, blocks))
+            pending = remaining
+        
+        with self._lock:
+            self._retry_at = 0.0
+            self.stats["last_error"] = None
+    
+    def _send_sync(self, item):
+        """Sync the newest pending version of a document, finishing older versions unsent"""
+        newest = item
+        superseded = []
+        for path in self._pending_files():
+            try:
+                with open(path, "r") as f:
+                    other = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if other["id"] != item["id"] and other.get("sync_key") == item["sync_key"] \
+                    and other["page_id"] == item["page_id"]:
+                superseded.append(newest)
+                newest = other
+        
+        for old in superseded:
+            self._finish(old, True)
+        
+        try:
+            stats = self.sync.sync(newest["page_id"], newest["sync_key"], newest["content"])
+        except Exception as e:
+            # Older versions are already finished, so only the newest may be retried
+            self._record_failure([newest], str(e))
+            return
+        
+        with self._lock:
+            self.stats["requests"] += stats["requests"]
+            self._retry_at = 0.0
+            self.stats["last_error"] = None
+        self._finish(newest, True)
+    
+    def _send_backlog(self, item):
+        """Upsert the stories of a queued sprint plan into the backlog database"""
+        if self.backlog is None:
+            self._write_item(dict(item, last_error="no backlog database is configured"), self.failed_directory)
+            self._finish(item, False)
+            return
+        
+        with get_metrics().span("backlog_sync"):
+            stats = self.backlog.upsert(extract_backlog_items(item["content"]))
+        
+        with self._lock:
+            self.stats["requests"] += stats["requests"]
+        
+        # Rows already written are unchanged on the retry, so only the failed ones are sent again
+        if stats["failed"]:
+            self._record_failure([item], f"{stats['failed']} backlog rows could not be written")
+            return
+        
+        with self._lock:
+            self._retry_at = 0.0
+            self.stats["last_error"] = None
+        self._finish(item, True)
+    
+    def _record_failure(self, items, error):
+        """Count a failed attempt for each save and schedule the retry"""
+        print(f"⚠️ Notion save failed, will retry: {error}")
+        
+        attempts = 0
+        for item in items:
+            item["attempts"] += 1
+            item["last_error"] = error
+            attempts = max(attempts, item["attempts"])
+            
+            if item["attempts"] >= self.max_attempts:
+                self._write_item(item, self.failed_directory)
+                self._finish(item, False)
+            else:
+                self._write_item(item)
+        
+        with self._lock:
+            self.stats["last_error"] = error
+            self._retry_at = time.time() + backoff_delay(attempts - 1, self.base_delay, self.max_delay)
+    
+    def _record_error(self, items, error):
+        """Record an unexpected worker error, backing off even if the saves cannot be updated on disk"""
+        try:
+            if not items:
+                raise RuntimeError("no saves to update")
+            self._record_failure(items, error)
+        except Exception:
+            print(f"⚠️ Notion queue error, will retry: {error}")
+            with self._lock:
+                self.stats["last_error"] = error
+                self._retry_at = time.time() + self.max_delay
+    
+    def _finish(self, item, success):
+        """Report a save as done and remove it from the queue"""
+        try:
+            os.remove(self._item_path(item))
+        except FileNotFoundError:
+            pass
+        
+        with self._lock:
+            self.stats["sent" if success else "failed"] += 1
+            self._completed.append((item["id"], success))
+    
+    def _item_path(self, item, directory=None):
+        """Get the file path of a save"""
+        return os.path.join(directory or self.directory, f"{item['id']}.json")
+    
+    def _write_item(self, item, directory=None):
+        """Write a save to disk atomically"""
+        path = self._item_path(item, directory)
+        temp_path = path + ".tmp"
+        
+        with open(temp_path, "w") as f:
+            json.dump(item, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    
+    def _pending_files(self):
+        """Get the paths of pending saves, oldest first"""
+        names = sorted(name for name in os.listdir(self.directory) if name.endswith(".json"))
+        return [os.path.join(self.directory, name) for name in names]
+    
+    def _discard_partial_writes(self):
+        """Remove temporary files left by a write interrupted mid-way"""
+        for name in os.listdir(self.directory):
+            if name.endswith(".tmp"):
+                os.remove(os.path.join(self.directory, name))
+
+def create_notion_queue(config):
+    """
+    Creates a Notion save queue from configuration.
+    
+    Args:
+        config (ConfigManager): The application configuration
+    
+    Returns:
+        NotionSaveQueue: The running queue
+    """
+    return NotionSaveQueue(
+        directory=config.get_notion_queue_dir(),
+        max_attempts=config.get_notion_queue_max_attempts(),
+        sync=create_notion_sync(config),
+        backlog=create_notion_backlog(config)
+    )
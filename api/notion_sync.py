@@ -0,0 +1,356 @@
+"""
+Incremental Notion page sync for Agilow Scrum Master.
+"""
+
+import difflib
+import hashlib
+import json
+import math
+import os
+import threading
+
+from api.notion_blocks import MAX_CHILDREN_PER_REQUEST, markdown_to_blocks
+from api.notion_client import get_notion_client
+from api.notion_handler import iter_notion_blocks
+
+class NotionSyncError(Exception):
+    """A Notion request made during a sync failed"""
+
+def block_fingerprint(block):
+    """
+    Hashes the content of a Notion block.
+    
+    Blocks compiled from Markdown and the same blocks read back from
+    Notion hash alike: only the type, text, bold spans, to-do state and
+    code language are compared, not IDs or Notion's default annotations.
+    
+    Args:
+        block (dict): A Notion block object
+    
+    Returns:
+        str: Hex digest of the block's content
+    """
+    block_type = block.get("type")
+    body = block.get(block_type, {})
+    
+    text = []
+    for item in body.get("rich_text", []):
+        content = item.get("text", {}).get("content", item.get("plain_text", ""))
+        bold = bool(item.get("annotations", {}).get("bold"))
+        # Notion may split or merge adjacent runs, so join runs with the same style
+        if text and text[-1][1] == bold:
+            text[-1][0] += content
+        else:
+            text.append([content, bold])
+    
+    key = [block_type, text, body.get("checked"), body.get("language")]
+    return hashlib.sha1(json.dumps(key, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+class NotionPageSync:
+    """
+    Keeps a document on a Notion page in step with its latest version.
+    
+    Every block written for a document is recorded in a local index by
+    block ID and content hash. Syncing a new version diffs the indexed
+    blocks against the new ones and sends only the updates, inserts and
+    deletes needed, so re-saving a refined plan changes the page in place
+    instead of appending another copy.
+    
+    The index is trusted as long as Notion agrees with it. When a block
+    it names turns out to be gone, or an insert needs the block before
+    the document, the page is read to find which of the document's
+    blocks are still there and the sync continues from that. The index
+    is saved after every request, so a sync interrupted part-way is
+    picked up by the next one without duplicating blocks.
+    
+    Each document has its own index file, read the first time the
+    document is synced, so the cost of saving progress depends on the
+    size of that document rather than on everything ever synced.
+    """
+    
+    def __init__(self, index_dir="data/notion_sync_index", legacy_index_path="data/notion_sync_index.json"):
+        """
+        Initialize the sync.
+        
+        Args:
+            index_dir (str): Directory of the per-document block indexes
+            legacy_index_path (str): Single-file index written by earlier
+                versions, split into per-document files if present
+        """
+        self.index_dir = index_dir
+        self._lock = threading.Lock()
+        self._index = {}  # (page_id, key) -> entries, for documents read or written so far
+        
+        os.makedirs(index_dir, exist_ok=True)
+        if legacy_index_path and os.path.exists(legacy_index_path):
+            self._migrate(legacy_index_path)
+    
+    def sync(self, page_id, key, content):
+        """
+        Brings a document on a page up to date with new content.
+        
+        The first sync of a document appends it to the end of the page.
+        Blocks of the document deleted in Notion are forgotten once the
+        page has been read.
+        
+        Args:
+            page_id (str): The ID of the Notion page
+            key (str): Name of the document on the page, e.g. a session and meeting type
+            content (str): The document's Markdown
+        
+        Returns:
+            dict: Counts of blocks "created", "updated", "deleted" and
+                "unchanged", and of API "requests" made (reads included)
+        
+        Raises:
+            NotionSyncError: If a request fails; the index keeps the progress made
+        """
+        blocks = markdown_to_blocks(content)
+        hashes = [block_fingerprint(block) for block in blocks]
+        stats = {"created": 0, "updated": 0, "deleted": 0, "unchanged": 0, "requests": 0}
+        
+        entries = self._entries(page_id, key)
+        if entries:
+            try:
+                self._apply(page_id, key, entries, blocks, hashes, stats, verified=False)
+                return stats
+            except _StaleIndex:
+                # Carry on from what is actually on the page; changes already made stay counted
+                stats["unchanged"] = 0
+        
+        entries, anchor = self._read_document(page_id, self._entries(page_id, key), stats)
+        self._apply(page_id, key, entries, blocks, hashes, stats, verified=True, anchor=anchor)
+        return stats
+    
+    def _apply(self, page_id, key, old, blocks, hashes, stats, verified, anchor=None):
+        """
+        Turn the document's blocks `old` into `blocks` with the fewest requests.
+        
+        Unless `verified`, `old` comes from the index alone and _StaleIndex
+        is raised as soon as Notion disagrees with it.
+        """
+        # The document as it stands on the page, updated as each request succeeds
+        current = list(old)
+        self._save_entries(page_id, key, current)
+        
+        matcher = difflib.SequenceMatcher(None, [entry["hash"] for entry in old], hashes, autojunk=False)
+        position = 0  # Index in `current` of the first block not yet synced
+        
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                stats["unchanged"] += i2 - i1
+                position += i2 - i1
+                continue
+            
+            # Blocks of the same type are edited in place; the rest are deleted and re-created
+            if tag == "replace":
+                while i1 < i2 and j1 < j2 and old[i1]["type"] == blocks[j1]["type"]:
+                    self._update_block(current[position]["id"], blocks[j1], stats, verified)
+                    current[position] = _entry(current[position]["id"], blocks[j1], hashes[j1])
+                    self._save_entries(page_id, key, current)
+                    position += 1
+                    i1 += 1
+                    j1 += 1
+            
+            for _ in range(i1, i2):
+                self._delete_block(current[position]["id"], stats)
+                del current[position]
+                self._save_entries(page_id, key, current)
+            
+            if j1 < j2:
+                after = current[position - 1]["id"] if position else anchor
+                if after is None and current:
+                    if not verified:
+                        # The block before the document is only known from the page
+                        raise _StaleIndex()
+                    
+                    # Notion can only insert after a block, and nothing precedes the
+                    # document, so rewrite it from this point on at the end of the page
+                    for entry in current[position:]:
+                        self._delete_block(entry["id"], stats)
+                    del current[position:]
+                    self._save_entries(page_id, key, current)
+                    self._append_blocks(page_id, key, current, blocks[j1:], hashes[j1:], None, stats, verified)
+                    return
+                
+                position += self._append_blocks(page_id, key, current, blocks[j1:j2], hashes[j1:j2],
+                                                after, stats, verified, position)
+    
+    def _entries(self, page_id, key):
+        """Get a copy of the index entries of a document"""
+        with self._lock:
+            if (page_id, key) not in self._index:
+                self._index[(page_id, key)] = self._load_entries(page_id, key)
+            return list(self._index[(page_id, key)])
+    
+    def _load_entries(self, page_id, key):
+        """Read a document's index file"""
+        path = self._index_file(page_id, key)
+        if not os.path.exists(path):
+            return []
+        
+        try:
+            with open(path, "r") as f:
+                return json.load(f)["entries"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Could not load Notion sync index from {path}: {str(e)}")
+            return []
+    
+    def _read_document(self, page_id, entries, stats):
+        """
+        Find the document's indexed blocks that are still on the page.
+        
+        Returns:
+            tuple: The entries in page order, each with the block's current
+                hash, and the ID of the block just before the document
+                (None if it starts the page or is new)
+        """
+        if not entries:
+            return [], None
+        
+        wanted = {entry["id"] for entry in entries}
+        found = []
+        anchor = None
+        previous = None
+        read = 0
+        
+        try:
+            for block in iter_notion_blocks(page_id, page_size=MAX_CHILDREN_PER_REQUEST):
+                read += 1
+                if block["id"] in wanted:
+                    if not found:
+                        anchor = previous
+                    found.append(_entry(block["id"], block, block_fingerprint(block)))
+                    # Blocks further down the page are not needed
+                    if len(found) == len(wanted):
+                        break
+                previous = block["id"]
+        except Exception as e:
+            raise NotionSyncError(f"could not read page {page_id}: {str(e)}") from e
+        
+        # One request per page of results
+        stats["requests"] += max(math.ceil(read / MAX_CHILDREN_PER_REQUEST), 1)
+        return found, anchor
+    
+    def _append_blocks(self, page_id, key, current, blocks, hashes, after, stats, verified, position=None):
+        """Create blocks after a block (or at the end of the page), returning how many were created"""
+        if position is None:
+            position = len(current)
+        
+        created = 0
+        for start in range(0, len(blocks), MAX_CHILDREN_PER_REQUEST):
+            batch = blocks[start:start + MAX_CHILDREN_PER_REQUEST]
+            body = {"children": batch}
+            if after is not None:
+                body["after"] = after
+            
+            # Inserting after a block that is gone fails, which means the index is stale
+            results = self._request("patch", f"blocks/{page_id}/children", stats,
+                                    missing="raise" if verified or after is None else "stale", json=body)
+            results = results.get("results", [])
+            if len(results) != len(batch):
+                raise NotionSyncError(f"Notion created {len(results)} of {len(batch)} blocks")
+            
+            new_entries = [
+                _entry(result["id"], block, block_hash)
+                for result, block, block_hash in zip(results, batch, hashes[start:start + len(batch)])
+            ]
+            current[position:position] = new_entries
+            self._save_entries(page_id, key, current)
+            
+            position += len(new_entries)
+            created += len(new_entries)
+            after = new_entries[-1]["id"]
+        
+        stats["created"] += created
+        return created
+    
+    def _update_block(self, block_id, block, stats, verified):
+        """Replace the content of an existing block"""
+        block_type = block["type"]
+        self._request("patch", f"blocks/{block_id}", stats, missing="raise" if verified else "stale",
+                      json={block_type: block[block_type]})
+        stats["updated"] += 1
+    
+    def _delete_block(self, block_id, stats):
+        """Delete (archive) a block"""
+        self._request("delete", f"blocks/{block_id}", stats, missing="ignore")
+        stats["deleted"] += 1
+    
+    def _request(self, method, path, stats, missing="raise", **kwargs):
+        """
+        Send a request, raising NotionSyncError on failure.
+        
+        `missing` sets what a 400 or 404 (the block is gone or archived)
+        means: "raise" an error, "ignore" it, or "stale" to raise _StaleIndex.
+        """
+        stats["requests"] += 1
+        try:
+            response = getattr(get_notion_client(), method)(path, **kwargs)
+        except Exception as e:
+            raise NotionSyncError(f"{method.upper()} {path} failed: {str(e)}") from e
+        
+        if response.status_code in (400, 404):
+            if missing == "ignore":
+                return {}
+            if missing == "stale":
+                raise _StaleIndex()
+        if response.status_code >= 400:
+            raise NotionSyncError(f"{method.upper()} {path} failed with HTTP {response.status_code}: {response.text[:200]}")
+        return response.json() if response.content else {}
+    
+    def _save_entries(self, page_id, key, entries):
+        """Record a document's blocks and write its index file"""
+        with self._lock:
+            self._index[(page_id, key)] = list(entries)
+            self._write_entries(page_id, key, entries)
+    
+    def _write_entries(self, page_id, key, entries):
+        """Write a document's index file atomically"""
+        path = self._index_file(page_id, key)
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"page_id": page_id, "key": key, "entries": entries}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    
+    def _index_file(self, page_id, key):
+        """Get the index file of a document"""
+        name = hashlib.sha1(f"{page_id}\n{key}".encode("utf-8")).hexdigest()
+        return os.path.join(self.index_dir, f"{name}.json")
+    
+    def _migrate(self, legacy_index_path):
+        """Split a single-file index into per-document files and set the old file aside"""
+        try:
+            with open(legacy_index_path, "r") as f:
+                legacy = json.load(f)
+            
+            for page_id, documents in legacy.items():
+                for key, entries in documents.items():
+                    if not os.path.exists(self._index_file(page_id, key)):
+                        self._write_entries(page_id, key, entries)
+            os.replace(legacy_index_path, legacy_index_path + ".migrated")
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"⚠️ Could not migrate Notion sync index from {legacy_index_path}: {str(e)}")
+
+class _StaleIndex(Exception):
+    """The index names a block that is no longer where it says"""
+
+def _entry(block_id, block, block_hash):
+    """Index entry for a block"""
+    return {"id": block_id, "type": block.get("type"), "hash": block_hash}
+
+def create_notion_sync(config):
+    """
+    Creates a Notion page sync from configuration.
+    
+    Args:
+        config (ConfigManager): The application configuration
+    
+    Returns:
+        NotionPageSync: The sync, or None when saves should be appended
+    """
+    if config.get_notion_save_mode() != "sync":
+        return None
+    return NotionPageSync(config.get_notion_sync_index_dir())
@@ -6,11 +6,14 @@ An AI-powered Scrum Master assistant that maintains context across interactions
 and generates Agile documentation in Notion.
 """
 
+import argparse
 import sys
 import os
+import time
 import traceback
 from datetime import datetime
-import re
+
+from templates.meeting_parser import format_meeting_notes
 
 def main():
     try:
@@ -20,9 +23,16 @@ def main():
         
         # Import modules here to catch import errors
         from utils.config_manager import ConfigManager
-        from agents.scrum_master import get_scrum_master_response
+        from agents.scrum_master import get_scrum_master_response, set_response_cache
+        from agents.openai_client import configure_openai_client
+        from agents.resilience import configure_chat_caller
+        from api.notion_client import configure_notion_client
+        from api.notion_queue import create_notion_queue
+        from agents.response_cache import create_response_cache
         from api.notion_handler import append_to_notion_page
-        from memory.memory_manager import MemoryManager
+        from memory.memory_manager import create_memory_manager
+        from memory.digests import create_memory_digester
+        from utils.metrics import configure_metrics
         
         print("✅ Modules imported successfully")
         
@@ -34,8 +44,26 @@ def main():
             print(f"❌ Configuration error: {str(e)}")
             sys.exit(1)
         
+        # Share one pooled OpenAI client across all requests
+        configure_openai_client(config)
+        configure_chat_caller(config)
+        configure_notion_client(config)
+        configure_metrics(config)
+        set_response_cache(create_response_cache(config))
+        
+        # Notion saves are written to disk and sent by a background worker;
+        # saves left over from a previous run resume here
+        notion_queue = create_notion_queue(config)
+        if notion_queue.pending_count():
+            print(f"📤 Sending {notion_queue.pending_count()} Notion save(s) left from a previous session")
+        
         # Initialize memory manager
-        memory_manager = MemoryManager()
+        memory_manager = create_memory_manager(config, tail_size=config.get_memory_tail_size())
+        
+        # Old exchanges are summarized into per-sprint digests in the background, if enabled
+        digester = create_memory_digester(config, memory_manager)
+        if digester is not None:
+            digester.start()
         
         while True:
             # Main menu
@@ -47,10 +75,16 @@ def main():
             choice = input("\nEnter your choice (1-3): ")
             
             if choice == "1":
-                chat_with_scrum_master(config, memory_manager)
+                chat_with_scrum_master(config, memory_manager, notion_queue)
             elif choice == "2":
-                print("\nMeeting recording functionality coming soon!")
+                record_meeting(config, memory_manager, notion_queue)
             elif choice == "3":
+                if digester is not None:
+                    digester.close()
+                memory_manager.close()
+                left = notion_queue.close()
+                if left:
+                    print(f"\n📤 {left} Notion save(s) still pending; they will be sent next time")
                 print("\nGoodbye!")
                 sys.exit(0)
             else:
@@ -71,16 +105,23 @@ def main():
         print("\nError has been logged to error_log.txt")
         sys.exit(1)
 
-def chat_with_scrum_master(config, memory_manager):
+def chat_with_scrum_master(config, memory_manager, notion_queue):
     """Chat with the Scrum Master agent"""
-    from agents.scrum_master import get_scrum_master_response
-    from api.notion_handler import append_to_notion_page
+    from agents.engine import SyncScrumMasterEngine
+    from agents.scrum_master import ERROR_RESPONSE
+    from agents.summarizer import create_summarizer
+    from utils.intent_detector import MEETING_TYPES, create_intent_detector
+    from utils.metrics import get_metrics
+    from utils.tokens import count_tokens
     
     print("\nStarting chat with Scrum Master...")
-    print("(Type 'exit' to return to the main menu)")
+    print("(Type 'exit' to return to the main menu, 'queue' to see pending Notion saves, "
+          "'metrics' to see where time went)")
+    
+    metrics = get_metrics()
     
-    # Get context from memory manager
-    context = memory_manager.get_context_string()
+    # Agent calls and memory writes run on the engine's event loop
+    engine = SyncScrumMasterEngine(memory_manager)
     
     # Track the full conversation for Notion
     conversation = []
@@ -88,7 +129,19 @@ def chat_with_scrum_master(config, memory_manager):
     # Track meeting type
     meeting_type = None
     
+    # With Notion sync on, every save in this chat updates one document per meeting type
+    session_started = datetime.now().strftime("%Y%m%d%H%M%S")
+    
+    # Meeting types and save triggers are found with one scan per message
+    intent_detector = create_intent_detector(config)
+    
+    # Inputs too long for one request, such as pasted transcripts, are summarized in parts
+    summarizer = create_summarizer(config)
+    
     while True:
+        # Report Notion saves that finished in the background
+        report_notion_saves(notion_queue)
+        
         # Get user input
         user_input = input("\nYou: ")
         
@@ -97,307 +150,402 @@ def chat_with_scrum_master(config, memory_manager):
             print("\nReturning to main menu...")
             break
         
+        if user_input.lower() == 'queue':
+            print_notion_queue_status(notion_queue)
+            continue
+        
+        if user_input.lower() == 'metrics':
+            print("\n" + metrics.report())
+            continue
+        
+        turn_started = time.perf_counter()
+        
         # Add user input to conversation
         conversation.append({"role": "user", "content": user_input})
         
+        with metrics.span("intent"):
+            intents = intent_detector.detect(user_input)
+        
         # Detect meeting type if not already set
         if not meeting_type:
-            if any(term in user_input.lower() for term in ["sprint planning", "plan sprint", "planning", "epics", "user stories"]):
-                meeting_type = "sprint_planning"
-            elif any(term in user_input.lower() for term in ["standup", "stand-up", "daily", "status update"]):
-                meeting_type = "standup"
-            elif any(term in user_input.lower() for term in ["retro", "retrospective", "went well", "didn't go well"]):
-                meeting_type = "retrospective"
+            meeting_type = intent_detector.best(intents, MEETING_TYPES)
+        
+        # Check for save triggers in user input
+        save_requested = "save_request" in intents
+        
+        # Save requests depend on the conversation so far, never answer them from the cache
+        use_cache = not save_requested
         
         try:
-            # Generate response
-            response = get_scrum_master_response(user_input, context)
+            # Generate response with recent history plus relevant older exchanges
+            with metrics.span("memory_wait"):
+                try:
+                    engine.wait_for_memory()
+                except Exception as e:
+                    # The last exchange is missing from memory, but the turn can still be answered
+                    print(f"\n⚠️ Could not save the last exchange to memory: {str(e)}")
+            with metrics.span("context"):
+                context = memory_manager.get_prompt_context(user_input, relevant_k=config.get_retrieval_top_k())
+            
+            # False when a streamed reply broke off part-way
+            complete = True
+            if count_tokens(user_input) > config.get_summarize_input_tokens():
+                def show_progress(done, total):
+                    print(f"\r📚 Long input: summarized {done}/{total} parts", end="", flush=True)
+                
+                response = summarizer.summarize(user_input, meeting_type or "general", context=context,
+                                                on_progress=show_progress, use_cache=use_cache)
+                print(f"\n\nScrum Master: {response}")
+            elif config.get_stream_responses():
+                # Print tokens as they arrive and keep the full text for saving
+                stats = {}
+                print("\nScrum Master: ", end="", flush=True)
+                chunks = []
+                for chunk in engine.stream(user_input, context, stats=stats, use_cache=use_cache):
+                    print(chunk, end="", flush=True)
+                    chunks.append(chunk)
+                response = "".join(chunks)
+                source = "cached" if stats["cached"] else f"first token {stats['time_to_first_token']:.2f}s"
+                print(f"\n\n({source}, total {stats['total_time']:.2f}s, "
+                      f"prompt {stats['prompt_tokens']['total']} tokens)")
+                
+                complete = stats["complete"]
+                if not complete and response != ERROR_RESPONSE:
+                    print("⚠️ The response was cut off, so it won't be kept in memory.")
+            else:
+                print("\nThinking...", end="", flush=True)
+                response = engine.respond(user_input, context, use_cache=use_cache)
+                print("\r" + " " * 20 + "\r", end="")  # Clear the loading indicator
+                
+                # Display response
+                print(f"\nScrum Master: {response}")
             
             # Add response to conversation
             conversation.append({"role": "assistant", "content": response})
             
-            # Display response
-            print(f"\nScrum Master: {response}")
-            
-            # Check for save triggers in user input
-            user_save_triggers = ["save to notion", "save it in notion", "save in notion", "post to notion", 
-                                 "add to notion", "put in notion", "paste to notion", "save this"]
-            
-            # Check for save triggers in AI response
-            ai_save_triggers = ["saving", "save these", "save this", "saving to notion", "save to notion", 
-                               "saving into notion", "adding to notion", "append to notion"]
+            # From the user's message to the full response; save prompts are left out
+            metrics.observe("turn", time.perf_counter() - turn_started)
             
             # Check if user requested save
-            if any(trigger in user_input.lower() for trigger in user_save_triggers):
+            if save_requested:
                 save_confirm = input("\nWould you like me to save this to Notion now? (y/n): ")
                 if save_confirm.lower() in ['y', 'yes']:
-                    success = save_to_notion(config, conversation, meeting_type or "general")
+                    success = queue_notion_save(config, notion_queue, conversation, meeting_type or "general",
+                                                sync_key=f"chat-{session_started}-{meeting_type or 'general'}")
                     if success:
-                        print("\n✅ Successfully saved to Notion!")
-                        # After successful save, ask if they want to exit
+                        print("\n📤 Saving to Notion in the background...")
+                        # After queuing the save, ask if they want to exit
                         exit_confirm = input("\nWould you like to exit the chat now? (y/n): ")
                         if exit_confirm.lower() in ['y', 'yes']:
                             print("\nReturning to main menu...")
                             break
                     else:
-                        print("\n❌ Failed to save to Notion. Please try again.")
+                        print("\n❌ Could not save to Notion. Please try again.")
             
             # Check if AI mentioned saving
-            elif any(trigger in response.lower() for trigger in ai_save_triggers):
+            elif intent_detector.has_intent(response, "save_mention"):
                 save_confirm = input("\nThe Scrum Master mentioned saving to Notion. Would you like to proceed? (y/n): ")
                 if save_confirm.lower() in ['y', 'yes']:
-                    success = save_to_notion(config, conversation, meeting_type or "general")
+                    success = queue_notion_save(config, notion_queue, conversation, meeting_type or "general",
+                                                sync_key=f"chat-{session_started}-{meeting_type or 'general'}")
                     if success:
-                        print("\n✅ Successfully saved to Notion!")
-                        # After successful save, ask if they want to exit
+                        print("\n📤 Saving to Notion in the background...")
+                        # After queuing the save, ask if they want to exit
                         exit_confirm = input("\nWould you like to exit the chat now? (y/n): ")
                         if exit_confirm.lower() in ['y', 'yes']:
                             print("\nReturning to main menu...")
                             break
                     else:
-                        print("\n❌ Failed to save to Notion. Please try again.")
-            
-            # Save to memory
-            memory_manager.add_exchange(user_input, response)
+                        print("\n❌ Could not save to Notion. Please try again.")
             
-            # Update context for next iteration
-            context = memory_manager.get_context_string()
+            # Save to memory in the background (also updates the context builder),
+            # leaving failed or cut-off turns out so they never become context
+            if response != ERROR_RESPONSE and complete:
+                engine.record_exchange(user_input, response, meeting_type)
             
         except Exception as e:
             print(f"\n❌ Error: {str(e)}")
             print("Let's continue our conversation.")
     
+    # Let pending memory writes finish before leaving the chat; Notion saves
+    # keep going in the background
+    engine.close()
+    report_notion_saves(notion_queue)
+    
+    # Show what the response cache saved during this chat
+    from agents.scrum_master import get_response_cache
+    cache = get_response_cache()
+    if cache is not None and cache.stats["hits"] + cache.stats["misses"]:
+        print(f"\nResponse cache: {cache.stats['hits']} hits, {cache.stats['misses']} misses "
+              f"({cache.hit_ratio():.0%} hit ratio), saved {cache.stats['saved_seconds']:.1f}s")
+    
     print("\nReturning to main menu...")
 
-def format_sprint_planning(content, timestamp):
-    """Format sprint planning content for Notion"""
-    # Extract epics and user stories using regex patterns
-    epics_pattern = r"(?:Epic|📌 Sprint Epics)[^\n]*\n(.*?)(?:\n\n|\n(?:🚀|Final))"
-    epics_match = re.search(epics_pattern, content, re.DOTALL)
+def record_meeting(config, memory_manager, notion_queue):
+    """Transcribe a meeting recording and turn it into meeting notes"""
+    from recording.pipeline import RecordingPipeline
+    from recording.transcription import create_transcriber
+    from utils.intent_detector import MEETING_TYPES
     
-    formatted = f"# Sprint Planning ({timestamp})\n\n"
+    path = input("\nPath to the recording (WAV file): ").strip()
+    if not os.path.exists(path):
+        print(f"\n❌ File not found: {path}")
+        return
     
-    if epics_match:
-        epics_section = epics_match.group(1)
-        formatted += "## 📌 Sprint Epics\n\n"
-        
-        # Extract numbered/emoji epics
-        epic_pattern = r"(?:\d️⃣|\d+\.|[•●]) ([^\n]+)"
-        epics = re.findall(epic_pattern, epics_section)
-        
-        for i, epic in enumerate(epics, 1):
-            formatted += f"{i}. {epic.strip()}\n"
+    print("\nMeeting type: 1. Sprint planning  2. Standup  3. Retrospective  4. Other")
+    choice = input("Enter your choice (1-4): ").strip()
+    meeting_type = MEETING_TYPES[int(choice) - 1] if choice in ("1", "2", "3") else "general"
     
-    # Extract user stories
-    stories_pattern = r"(?:User Story|🔹 User Story)[^\n]*\n(.*?)(?:\n\n|$)"
-    stories_matches = re.findall(stories_pattern, content, re.DOTALL)
+    def show_progress(window, response):
+        print(f"\n📝 Notes for part {window.index} ({window.end / 60:.1f} min in):\n{response}")
     
-    if stories_matches:
-        formatted += "\n## 📝 User Stories\n\n"
-        
-        for i, story_section in enumerate(stories_matches, 1):
-            # Clean up the story text
-            story_text = story_section.strip()
-            formatted += f"### Story {i}\n{story_text}\n\n"
-    
-    # Extract final priorities if present
-    priorities_pattern = r"(?:Final Sprint Prioritization|📌 Final Sprint Prioritization)[^\n]*\n(.*?)(?:\n\n|$)"
-    priorities_match = re.search(priorities_pattern, content, re.DOTALL)
-    
-    if priorities_match:
-        formatted += "\n## 🚀 Sprint Priorities\n\n"
-        priorities_section = priorities_match.group(1)
-        
-        # Extract individual priorities
-        priority_pattern = r"(?:✔|✅|\d+\.) ([^\n]+)"
-        priorities = re.findall(priority_pattern, priorities_section)
-        
-        for i, priority in enumerate(priorities, 1):
-            formatted += f"{i}. {priority.strip()}\n"
+    try:
+        transcriber = create_transcriber(config)
+        try:
+            pipeline = RecordingPipeline(
+                transcriber,
+                meeting_type=meeting_type,
+                chunk_seconds=config.get_recording_chunk_seconds(),
+                window_tokens=config.get_recording_window_tokens(),
+                transcript_dir=config.get_recording_dir(),
+                on_window=show_progress
+            )
+            
+            print("\n🎙️ Transcribing; notes appear as each part is processed...")
+            name = os.path.splitext(os.path.basename(path))[0]
+            result = pipeline.run(path, name=name)
+        finally:
+            transcriber.close()
+    except Exception as e:
+        print(f"\n❌ Error processing recording: {str(e)}")
+        return
     
-    return formatted
+    print(f"\n✅ Processed {result.audio_seconds / 60:.1f} min of audio in {result.processing_seconds:.1f}s "
+          f"(real-time factor {result.real_time_factor:.2f})")
+    print(f"Transcript saved to {result.transcript_path}")
+    
+    content = result.to_markdown()
+    print(f"\n{content}")
+    memory_manager.add_exchange(f"Recorded meeting: {name}", content, meeting_type)
+    
+    save_confirm = input("\nWould you like to save these notes to Notion? (y/n): ")
+    if save_confirm.lower() in ['y', 'yes']:
+        notion_queue.enqueue(config.get_notion_page_id(), content)
+        print("\n📤 Saving to Notion in the background...")
+
+def format_sprint_planning(content, timestamp):
+    """Format sprint planning content for Notion"""
+    return format_meeting_notes(content, "sprint_planning", timestamp)
 
 def format_standup(content, timestamp):
     """Format standup content for Notion"""
-    formatted = f"# Daily Standup ({timestamp})\n\n"
+    return format_meeting_notes(content, "standup", timestamp)
+
+def format_retrospective(content, timestamp):
+    """Format retrospective content for Notion"""
+    return format_meeting_notes(content, "retrospective", timestamp)
+
+def queue_notion_save(config, notion_queue, conversation, meeting_type, sync_key=None):
+    """
+    Queue the conversation to be saved to Notion in the background, as a new version of `sync_key` if given.
     
-    # Extract status sections
-    done_pattern = r"(?:Done|Completed|✅ Done)[^\n]*(?:\n|:)(.*?)(?:\n\n|\n(?:In Progress|🔄|$))"
-    done_match = re.search(done_pattern, content, re.DOTALL)
+    Sprint planning stories are also queued for the backlog database, if one is configured.
+    """
+    from templates.meeting_notes import build_notion_content, select_final_output
+    from utils.metrics import get_metrics
     
-    in_progress_pattern = r"(?:In Progress|🔄 In Progress)[^\n]*(?:\n|:)(.*?)(?:\n\n|\n(?:To Do|🔜|$))"
-    in_progress_match = re.search(in_progress_pattern, content, re.DOTALL)
+    if not config.get_notion_api_key() or not config.get_notion_page_id():
+        print("❌ Notion API key or page ID not configured")
+        return False
     
-    todo_pattern = r"(?:To Do|🔜 To Do|Planned)[^\n]*(?:\n|:)(.*?)(?:\n\n|$)"
-    todo_match = re.search(todo_pattern, content, re.DOTALL)
+    with get_metrics().span("notion_format", meeting_type=meeting_type):
+        formatted_content = build_notion_content(conversation, meeting_type)
+    if formatted_content is None:
+        return False
     
-    blockers_pattern = r"(?:Blockers|❌ Blockers|Issues)[^\n]*(?:\n|:)(.*?)(?:\n\n|$)"
-    blockers_match = re.search(blockers_pattern, content, re.DOTALL)
+    print(f"Saving to Notion: {formatted_content[:100]}...")  # Print first 100 chars
+    notion_queue.enqueue(config.get_notion_page_id(), formatted_content, sync_key=sync_key)
     
-    # Add Done section
-    formatted += "## ✅ Done\n\n"
-    if done_match:
-        done_items = re.findall(r"(?:[-•✓✔]|\d+\.) ([^\n]+)", done_match.group(1))
-        for item in done_items:
-            formatted += f"- {item.strip()}\n"
-    else:
-        formatted += "- No completed items reported\n"
-    
-    # Add In Progress section
-    formatted += "\n## 🔄 In Progress\n\n"
-    if in_progress_match:
-        in_progress_items = re.findall(r"(?:[-•]|\d+\.) ([^\n]+)", in_progress_match.group(1))
-        for item in in_progress_items:
-            formatted += f"- {item.strip()}\n"
-    else:
-        formatted += "- No in-progress items reported\n"
-    
-    # Add To Do section
-    formatted += "\n## 🔜 To Do\n\n"
-    if todo_match:
-        todo_items = re.findall(r"(?:[-•]|\d+\.) ([^\n]+)", todo_match.group(1))
-        for item in todo_items:
-            formatted += f"- {item.strip()}\n"
-    else:
-        formatted += "- No upcoming items reported\n"
-    
-    # Add Blockers section if present
-    if blockers_match:
-        formatted += "\n## ❌ Blockers\n\n"
-        blocker_items = re.findall(r"(?:[-•]|\d+\.) ([^\n]+)", blockers_match.group(1))
-        for item in blocker_items:
-            formatted += f"- {item.strip()}\n"
+    # Only the plan being saved is parsed; the worker upserts its stories off the chat turn
+    if notion_queue.backlog is not None and meeting_type == "sprint_planning":
+        notion_queue.enqueue_backlog(select_final_output(conversation))
+    return True
+
+def report_notion_saves(notion_queue):
+    """Print the outcome of queued Notion saves that finished since the last report"""
+    for save_id, success in notion_queue.pop_completed():
+        if success:
+            print("\n✅ Successfully saved to Notion!")
+        else:
+            print("\n❌ Failed to save to Notion after several attempts. "
+                  f"The content is kept in {notion_queue.failed_directory}.")
     
-    return formatted
+    pending = notion_queue.pending_count()
+    if pending:
+        print(f"\n📤 {pending} Notion save(s) pending")
 
-def format_retrospective(content, timestamp):
-    """Format retrospective content for Notion"""
-    formatted = f"# Sprint Retrospective ({timestamp})\n\n"
+def print_notion_queue_status(notion_queue):
+    """Print the Notion save queue's depth and state"""
+    status = notion_queue.status()
+    print(f"\nNotion queue: {status['pending']} pending, {status['failed_saves']} failed, "
+          f"{status['sent']} sent this session")
+    
+    if status["sending"]:
+        print("Sending now...")
+    elif status["retry_in"] > 0:
+        print(f"Retrying in {status['retry_in']:.0f}s (last error: {status['last_error']})")
+
+def run_batch(args):
+    """Process an archive of meeting transcripts without the interactive menu"""
+    from utils.config_manager import ConfigManager
+    from agents.openai_client import configure_openai_client
+    from agents.resilience import configure_chat_caller
+    from agents.scrum_master import set_response_cache
+    from agents.response_cache import create_response_cache
+    from api.notion_client import configure_notion_client
+    from api.notion_sync import create_notion_sync
+    from agents.batch import BatchProcessor
+    from utils.intent_detector import create_intent_detector
+    from utils.metrics import configure_metrics
+    
+    if not args.output_dir and not args.notion:
+        print("❌ Choose where to write results: --output-dir and/or --notion")
+        sys.exit(2)
     
-    # Extract sections
-    went_well_pattern = r"(?:What Went Well|✅ What Went Well)[^\n]*(?:\n|:)(.*?)(?:\n\n|\n(?:What Didn't|What Did Not|⚠ What))"
-    went_well_match = re.search(went_well_pattern, content, re.DOTALL)
+    try:
+        config = ConfigManager()
+    except ValueError as e:
+        print(f"❌ Configuration error: {str(e)}")
+        sys.exit(1)
     
-    not_well_pattern = r"(?:What Didn't Go Well|What Did Not Go Well|⚠ What Didn't Go Well)[^\n]*(?:\n|:)(.*?)(?:\n\n|\n(?:What Changes|🔄 What Changes|Action))"
-    not_well_match = re.search(not_well_pattern, content, re.DOTALL)
+    configure_openai_client(config)
+    configure_chat_caller(config)
+    configure_notion_client(config)
+    configure_metrics(config)
+    set_response_cache(create_response_cache(config))
+    
+    processor = BatchProcessor(
+        workers=args.workers,
+        llm_concurrency=args.llm_concurrency,
+        notion_concurrency=args.notion_concurrency,
+        output_dir=args.output_dir,
+        notion_page_id=config.get_notion_page_id() if args.notion else None,
+        notion_sync=create_notion_sync(config),
+        checkpoint_path=args.checkpoint,
+        meeting_type=args.meeting_type,
+        summarize_input_tokens=config.get_summarize_input_tokens(),
+        summary_chunk_tokens=config.get_summary_chunk_tokens(),
+        intent_detector=create_intent_detector(config)
+    )
+    
+    print(f"Processing meetings from {args.source}...")
+    stats = processor.run(args.source)
+    
+    print(f"\n\n✅ {stats['processed']} processed, {stats['skipped']} already done, "
+          f"{stats['duplicates']} duplicate IDs skipped, {stats['failed']} failed "
+          f"in {stats['seconds']:.1f}s ({stats['meetings_per_minute']:.1f} meetings/min)")
+    if stats["failed"]:
+        print(f"Failed meetings are retried the next time you run with --checkpoint {args.checkpoint}")
+        sys.exit(1)
+
+def run_backlog(args):
+    """Import the stories of sprint planning notes into the backlog database"""
+    from utils.config_manager import ConfigManager
+    from api.notion_client import configure_notion_client
+    from api.notion_backlog import NotionBacklog, extract_backlog_items
+    from utils.metrics import configure_metrics
     
-    changes_pattern = r"(?:What Changes|🔄 What Changes|Action Items)[^\n]*(?:\n|:)(.*?)(?:\n\n|$)"
-    changes_match = re.search(changes_pattern, content, re.DOTALL)
+    try:
+        config = ConfigManager()
+    except ValueError as e:
+        print(f"❌ Configuration error: {str(e)}")
+        sys.exit(1)
     
-    # Add What Went Well section
-    formatted += "## ✅ What Went Well\n\n"
-    if went_well_match:
-        # Extract items with numbers, bullets, or emojis
-        went_well_items = re.findall(r"(?:\d️⃣|\d+\.|[•●✅]|^\d+\)) ([^\n]+)", went_well_match.group(1), re.MULTILINE)
-        for item in went_well_items:
-            formatted += f"- {item.strip()}\n"
-    else:
-        formatted += "- No positive items reported\n"
-    
-    # Add What Didn't Go Well section
-    formatted += "\n## ⚠️ What Didn't Go Well\n\n"
-    if not_well_match:
-        not_well_items = re.findall(r"(?:\d️⃣|\d+\.|[•●⚠]|^\d+\)) ([^\n]+)", not_well_match.group(1), re.MULTILINE)
-        for item in not_well_items:
-            formatted += f"- {item.strip()}\n"
-    else:
-        formatted += "- No improvement areas reported\n"
-    
-    # Add Changes section
-    formatted += "\n## 🔄 What Changes We're Making\n\n"
-    if changes_match:
-        changes_items = re.findall(r"(?:\d️⃣|\d+\.|[•●✅📌]|^\d+\)) ([^\n]+)", changes_match.group(1), re.MULTILINE)
-        for item in changes_items:
-            formatted += f"- {item.strip()}\n"
-    else:
-        formatted += "- No action items reported\n"
+    if not config.get_notion_backlog_database_id():
+        print("❌ Set NOTION_BACKLOG_DATABASE_ID to the database that holds the backlog")
+        sys.exit(2)
     
-    return formatted
-
-def save_to_notion(config, conversation, meeting_type):
-    """Save the conversation to Notion"""
-    from api.notion_handler import append_to_notion_page
+    configure_notion_client(config)
+    configure_metrics(config)
+    backlog = NotionBacklog(
+        config.get_notion_backlog_database_id(),
+        directory=config.get_notion_backlog_dir(),
+        max_workers=args.concurrency or config.get_notion_backlog_concurrency()
+    )
     
     try:
-        # Get Notion credentials
-        notion_api_key = config.get_notion_api_key()
-        notion_page_id = config.get_notion_page_id()
-        
-        if not notion_api_key or not notion_page_id:
-            print("❌ Notion API key or page ID not configured")
-            return False
-        
-        # Format the conversation based on meeting type
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if args.refresh:
+            print(f"Mirrored {backlog.refresh_mirror()} rows from the backlog database")
         
-        # Find the last two assistant messages
-        assistant_messages = []
-        for message in conversation:
-            if message["role"] == "assistant":
-                assistant_messages.append(message["content"])
+        items = []
+        for path in args.notes:
+            with open(path, "r", encoding="utf-8") as f:
+                items.extend(extract_backlog_items(f.read()))
+        print(f"Importing {len(items)} stories...")
         
-        # Get the last two messages (or just the last one if there's only one)
-        if len(assistant_messages) >= 2:
-            # Use the second-to-last message as it likely contains the actual content
-            final_output = assistant_messages[-2]
-        elif len(assistant_messages) == 1:
-            final_output = assistant_messages[0]
-        else:
-            print("❌ No assistant output found to save")
-            return False
-        
-        # Just add a simple header based on meeting type
-        if meeting_type == "sprint_planning":
-            formatted_content = f"# Sprint Planning ({timestamp})\n\n{final_output}"
-        elif meeting_type == "standup":
-            formatted_content = f"# Daily Standup ({timestamp})\n\n{final_output}"
-        elif meeting_type == "retrospective":
-            formatted_content = f"# Sprint Retrospective ({timestamp})\n\n{final_output}"
-        else:
-            formatted_content = f"# Meeting Notes ({timestamp})\n\n{final_output}"
+        def show_progress(done, total):
+            print(f"\r🗂️ Written {done}/{total} changed stories", end="", flush=True)
         
-        # Save to Notion
-        print(f"Saving to Notion: {formatted_content[:100]}...")  # Print first 100 chars
-        success = append_to_notion_page(notion_page_id, formatted_content)
-        
-        if success:
-            print("\n✅ Successfully saved to Notion!")
-            return True
-        else:
-            print("\n❌ Failed to save to Notion. Please try again.")
-            return False
-            
-    except Exception as e:
-        print(f"❌ Error saving to Notion: {str(e)}")
-        traceback.print_exc()
-        return False
+        start = time.perf_counter()
+        stats = backlog.upsert(items, on_progress=show_progress)
+    finally:
+        backlog.close()
+    
+    print(f"\n\n✅ {stats['created']} added, {stats['updated']} updated, {stats['unchanged']} unchanged, "
+          f"{stats['failed']} failed in {time.perf_counter() - start:.1f}s ({stats['requests']} Notion requests)")
+    if stats["failed"]:
+        sys.exit(1)
 
-# Update the Notion handler to debug and ensure it works
-def debug_append_to_notion_page(page_id, content):
-    """
-    Debug version of append_to_notion_page that prints what it's doing.
-    
-    Args:
-        page_id (str): The ID of the Notion page
-        content (str): The content to append
-        
-    Returns:
-        bool: True if successful, False otherwise
-    """
-    from api.notion_handler import append_to_notion_page
-    
-    print(f"\nAttempting to save to Notion page {page_id}")
-    print(f"Content to save: {content[:100]}...")  # Print first 100 chars
-    
-    try:
-        result = append_to_notion_page(page_id, content)
-        print(f"Notion API result: {result}")
-        return result
-    except Exception as e:
-        print(f"Notion API error: {str(e)}")
-        return False
+def parse_args(argv=None):
+    """Parse command-line arguments; no subcommand starts the interactive menu"""
+    parser = argparse.ArgumentParser(description="Agilow Scrum Master")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile the session (cProfile, tracemalloc, timing spans) and write a report on exit")
+    parser.add_argument("--profile-dir", default="data/profile", help="Directory of the profile report")
+    subcommands = parser.add_subparsers(dest="command")
+    
+    batch = subcommands.add_parser("batch", help="Process an archive of meeting transcripts")
+    batch.add_argument("source", help="Directory of .txt/.md transcripts or a JSONL file")
+    batch.add_argument("--output-dir", help="Write Markdown notes to this directory")
+    batch.add_argument("--notion", action="store_true", help="Append notes to the configured Notion page")
+    batch.add_argument("--workers", type=int, default=8, help="Meetings processed at once (default: 8)")
+    batch.add_argument("--llm-concurrency", type=int, default=4, help="Model calls in flight at once (default: 4)")
+    batch.add_argument("--notion-concurrency", type=int, default=1, help="Notion writes in flight at once (default: 1)")
+    batch.add_argument("--checkpoint", default="data/batch_checkpoint.jsonl",
+                       help="Progress log used to resume interrupted runs")
+    batch.add_argument("--meeting-type", choices=["sprint_planning", "standup", "retrospective", "general"],
+                       help="Treat every transcript as this meeting type instead of detecting it")
+    
+    backlog = subcommands.add_parser("backlog", help="Import sprint planning notes into the Notion backlog database")
+    backlog.add_argument("notes", nargs="+", help="Sprint planning notes (.txt/.md)")
+    backlog.add_argument("--concurrency", type=int, help="Rows written at once (default: NOTION_BACKLOG_CONCURRENCY)")
+    backlog.add_argument("--refresh", action="store_true",
+                         help="Reload the local mirror from Notion first, e.g. after editing rows there")
+    
+    return parser.parse_args(argv)
+
+def run(args):
+    """Run the chosen command"""
+    if args.command == "batch":
+        run_batch(args)
+    elif args.command == "backlog":
+        run_backlog(args)
+    else:
+        main()
 
 # Add this at the end of the file
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    if args.profile:
+        from utils.metrics import Profiler
+        
+        profiler = Profiler(args.profile_dir)
+        profiler.start()
+        try:
+            run(args)
+        finally:
+            # Written on every exit, including sys.exit from the menu
+            print(f"\n📊 Profile report written to {profiler.stop()}")
+    else:
+        run(args)
     
\ No newline at end of file
@@ -0,0 +1,217 @@
+"""
+Token-budgeted context building for Agilow Scrum Master.
+"""
+
+import re
+from collections import deque
+
+from utils.tokens import count_tokens, normalize_whitespace, truncate_to_tokens
+
+CONTEXT_HEADER = "Recent conversation history:\n\n"
+EMPTY_CONTEXT = "No previous conversation history."
+
+# Tokens for history older than the recent context: digests plus relevant exchanges
+RELEVANT_TOKEN_BUDGET = 1000
+
+BLANK_LINE_PATTERN = re.compile(r"\n\s*\n")
+
+def compact_text(text):
+    """Drop the blank lines and bold markers of a message; history needs its words, not its layout"""
+    return BLANK_LINE_PATTERN.sub("\n", normalize_whitespace(text).replace("**", ""))
+
+def render_exchange(exchange):
+    """
+    Render a single exchange as a compact context fragment.
+    
+    Timestamps are cut to the minute and messages are compacted, e.g.
+    "[2025-03-04 09:30] User: ...".
+    """
+    # "2025-03-04T09:30:12.345678" -> "2025-03-04 09:30"
+    timestamp = exchange.get("timestamp")
+    prefix = f"[{timestamp[:16].replace('T', ' ')}] " if timestamp else ""
+    user_input = compact_text(exchange.get("user_input", ""))
+    ai_response = compact_text(exchange.get("ai_response", ""))
+    
+    return f"{prefix}User: {user_input}\nScrum Master: {ai_response}\n\n"
+
+class ContextBuilder:
+    """Packs the most recent exchanges into a context string under a token budget"""
+    
+    def __init__(self, token_budget=2000):
+        """
+        Initialize the context builder.
+        
+        Each exchange is rendered once when it is added and the rendered
+        fragment is cached, so building the context on every turn only
+        joins cached strings.
+        
+        Args:
+            token_budget (int): Maximum number of tokens in the context
+        """
+        self.token_budget = token_budget
+        self.token_count = 0
+        self.included_timestamps = []
+        
+        self._header_tokens = count_tokens(CONTEXT_HEADER)
+        self._fragments = deque()  # (timestamp, fragment, tokens), oldest first
+        self._cached_tokens = 0
+        self._context = None  # (context, tokens) for the unlimited build
+    
+    def add_exchange(self, exchange):
+        """Render a new exchange and add it to the cache"""
+        fragment = render_exchange(exchange)
+        
+        # A single oversized exchange must not push everything else out
+        max_fragment_tokens = self.token_budget - self._header_tokens
+        tokens = count_tokens(fragment)
+        if tokens > max_fragment_tokens:
+            fragment = truncate_to_tokens(fragment, max_fragment_tokens)
+            tokens = count_tokens(fragment)
+        
+        self._fragments.append((exchange.get("timestamp"), fragment, tokens))
+        self._cached_tokens += tokens
+        
+        # Older fragments can never fit again once newer ones fill the budget
+        while self._fragments and self._cached_tokens - self._fragments[0][2] >= max_fragment_tokens:
+            _, _, dropped_tokens = self._fragments.popleft()
+            self._cached_tokens -= dropped_tokens
+        
+        self._context = None
+    
+    def load(self, exchanges_newest_first):
+        """
+        Reset the builder from stored history.
+        
+        Args:
+            exchanges_newest_first (iterable): Exchanges in reverse order;
+                iteration stops as soon as the budget is full
+        """
+        self.clear()
+        
+        recent = []
+        total = self._header_tokens
+        for exchange in exchanges_newest_first:
+            recent.append(exchange)
+            total += count_tokens(render_exchange(exchange))
+            if total >= self.token_budget:
+                break
+        
+        for exchange in reversed(recent):
+            self.add_exchange(exchange)
+    
+    def clear(self):
+        """Drop all cached fragments"""
+        self._fragments.clear()
+        self._cached_tokens = 0
+        self._context = None
+        self.token_count = 0
+        self.included_timestamps = []
+    
+    def build(self, limit=None):
+        """
+        Build the context string from the cached fragments.
+        
+        Args:
+            limit (int): Optional cap on the number of exchanges included
+        
+        Returns:
+            str: The context string; `token_count` holds its size and
+                `included_timestamps` the exchanges it covers
+        """
+        if limit is None and self._context is not None:
+            context, self.token_count, self.included_timestamps = self._context
+            return context
+        
+        selected = []
+        timestamps = []
+        used = self._header_tokens
+        for timestamp, fragment, tokens in reversed(self._fragments):
+            if limit is not None and len(selected) >= limit:
+                break
+            if used + tokens > self.token_budget:
+                break
+            selected.append(fragment)
+            timestamps.append(timestamp)
+            used += tokens
+        
+        if not selected:
+            context = EMPTY_CONTEXT
+            used = count_tokens(EMPTY_CONTEXT)
+        else:
+            selected.reverse()
+            context = CONTEXT_HEADER + "".join(selected)
+        
+        self.token_count = used
+        self.included_timestamps = timestamps
+        if limit is None:
+            self._context = (context, used, timestamps)
+        return context
+
+class MemoryContextMixin:
+    """
+    Prompt context assembly shared by the memory backends.
+    
+    Expects `context_builder` (ContextBuilder), `digest_store` (DigestStore
+    or None) and `_search_index(query, k, exclude_timestamps)`, which
+    returns up to k exchanges relevant to the query, best first, skipping
+    the given timestamps.
+    """
+    
+    def get_context_string(self, limit=None):
+        """Get context string for the AI, packed under the context token budget, after any digests"""
+        context = self.context_builder.build(limit)
+        
+        digests = self.digest_store.context() if self.digest_store is not None else ""
+        return f"{digests}\n{context}" if digests else context
+    
+    def get_prompt_context(self, query, relevant_k=3):
+        """
+        Get the full context for a turn: digests, relevant older exchanges, then recent history.
+        
+        Args:
+            query (str): The user's input for this turn
+            relevant_k (int): Number of relevant older exchanges (0 disables retrieval)
+        
+        Returns:
+            str: The context string to send with the user's input
+        """
+        context = self.context_builder.build()
+        
+        # Digests of older sprints take their share of the budget for older
+        # history first; relevant raw exchanges get what is left
+        digests = self.digest_store.context(query) if self.digest_store is not None else ""
+        
+        if relevant_k > 0:
+            budget = RELEVANT_TOKEN_BUDGET - count_tokens(digests)
+            relevant = self.get_relevant_context(query, k=relevant_k, token_budget=budget) if budget > 0 else ""
+            if relevant:
+                context = f"{relevant}\n{context}"
+        
+        # Digests change least often, so they go first
+        return f"{digests}\n{context}" if digests else context
+    
+    def get_relevant_context(self, query, k=3, token_budget=RELEVANT_TOKEN_BUDGET):
+        """
+        Get older exchanges relevant to a query as a context string.
+        
+        Exchanges already covered by the recent context are skipped.
+        
+        Args:
+            query (str): The text to match, usually the user's input
+            k (int): Maximum number of exchanges to include
+            token_budget (int): Token budget for the whole section
+        
+        Returns:
+            str: The relevant-history section, or "" if nothing matched
+        """
+        self.context_builder.build()
+        exchanges = self._search_index(query, k, exclude_timestamps=self.context_builder.included_timestamps)
+        
+        if not exchanges:
+            return ""
+        
+        # Split the budget evenly so one long exchange can't crowd out the rest
+        per_exchange = token_budget // len(exchanges)
+        context = "Relevant earlier conversation:\n\n"
+        context += "".join(truncate_to_tokens(render_exchange(e), per_exchange) for e in exchanges)
+        return context
@@ -0,0 +1,425 @@
+"""
+Rolling digests of old conversation memory for Agilow Scrum Master.
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import threading
+from datetime import datetime
+from itertools import islice
+
+from memory.context_builder import compact_text, render_exchange
+from memory.retrieval import Bm25Backend
+from templates.meeting_parser import MeetingNotes, parse_meeting_notes
+from utils.tokens import count_tokens, truncate_to_tokens
+
+DIGEST_SUMMARIZERS = ("off", "local", "agent")
+DIGEST_HEADER = "Summaries of earlier conversations:\n\n"
+
+# Section labels used by local digests, in the order they are written
+SECTION_LABELS = {
+    "epics": "Epics",
+    "stories": "Stories",
+    "priorities": "Priorities",
+    "done": "Done",
+    "in_progress": "In progress",
+    "todo": "To do",
+    "blockers": "Blockers",
+    "went_well": "Went well",
+    "not_well": "Didn't go well",
+    "changes": "Changes",
+}
+
+SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?])\s")
+
+# User requests listed in a local digest
+MAX_TOPICS = 5
+
+def sprint_key(timestamp, sprint_weeks=2):
+    """
+    Names the sprint an exchange belongs to.
+    
+    Sprints are counted in blocks of `sprint_weeks` ISO weeks from the
+    start of the ISO year, e.g. "2025-S05" for weeks 9-10 with two-week
+    sprints.
+    
+    Args:
+        timestamp (str): ISO timestamp of the exchange
+        sprint_weeks (int): Weeks per sprint
+    
+    Returns:
+        str: The sprint key
+    """
+    year, week, _ = datetime.fromisoformat(timestamp[:19]).isocalendar()
+    return f"{year}-S{(week - 1) // sprint_weeks + 1:02d}"
+
+def local_digest(exchanges, meeting_type, max_tokens=300):
+    """
+    Summarizes exchanges without calling the model.
+    
+    The notes in the assistant's responses (epics, stories, done items,
+    blockers and so on) are merged and listed after the first sentence
+    of the last few things the user asked about. Everything is listed
+    newest first, so the latest version of a plan survives truncation.
+    
+    Args:
+        exchanges (list): Exchanges to summarize, oldest first
+        meeting_type (str): Meeting type the exchanges were recorded for
+        max_tokens (int): Maximum length of the digest
+    
+    Returns:
+        str: The digest
+    """
+    notes = MeetingNotes()
+    topics = []
+    for exchange in exchanges:
+        notes.merge(parse_meeting_notes(exchange.get("ai_response", "")))
+        
+        topic = SENTENCE_END_PATTERN.split(compact_text(exchange.get("user_input", "")).replace("\n", " "), 1)[0]
+        if topic and topic not in topics:
+            topics.append(" ".join(topic.split()[:25]))
+    
+    lines = [f"Asked about: {'; '.join(reversed(topics[-MAX_TOPICS:]))}"] if topics else []
+    for section, label in SECTION_LABELS.items():
+        items = notes.stories if section == "stories" else notes.items(section)
+        if items:
+            lines.append(f"{label}: {'; '.join(item.splitlines()[0] for item in reversed(items))}")
+    
+    return truncate_to_tokens("\n".join(lines), max_tokens)
+
+def agent_digest(summarizer, max_tokens=300):
+    """
+    Makes a digest function that summarizes with the Scrum Master agent.
+    
+    Args:
+        summarizer (MapReduceSummarizer): Summarizer used for the request(s)
+        max_tokens (int): Maximum length of a digest
+    
+    Returns:
+        callable: `digest(exchanges, meeting_type)` returning the digest
+    """
+    def digest(exchanges, meeting_type):
+        transcript = "".join(render_exchange(exchange) for exchange in exchanges)
+        instructions = (
+            f"Condense this conversation into a digest for long-term memory of at most {max_tokens // 2} "
+            "words: keep decisions, epics, stories, owners, blockers and open questions, drop small talk."
+        )
+        return truncate_to_tokens(summarizer.summarize(transcript, meeting_type, instructions=instructions),
+                                  max_tokens)
+    
+    return digest
+
+def render_digest(digest):
+    """Render a digest as a context fragment"""
+    return (
+        f"[{digest['sprint']} {digest['meeting_type']}, {digest['start'][:10]} to {digest['end'][:10]}, "
+        f"{digest['count']} exchanges]\n{digest['summary']}\n\n"
+    )
+
+class DigestStore:
+    """
+    Digests of old exchanges, stored as a JSON Lines file next to the memory journal.
+    
+    Each digest covers the exchanges of one sprint and meeting type up
+    to a point in time; `covered_until` is the newest timestamp covered,
+    so exchanges at or before it can be dropped from the raw log.
+    """
+    
+    def __init__(self, file_path):
+        """
+        Initialize the store and load its digests.
+        
+        Args:
+            file_path (str): Path of the digest file
+        """
+        self.file_path = file_path
+        self.digests = []
+        self.covered_until = None
+        self.backend = Bm25Backend()
+        
+        # Digests are added by the background digester while turns read them
+        self._lock = threading.Lock()
+        
+        if os.path.exists(file_path):
+            with open(file_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self._register(json.loads(line))
+                    except ValueError:
+                        # A line cut short by an interrupted write
+                        continue
+    
+    def __len__(self):
+        return len(self.digests)
+    
+    def add(self, digests):
+        """
+        Store new digests, syncing them to disk before returning.
+        
+        Args:
+            digests (list): Digest dicts
+        """
+        directory = os.path.dirname(self.file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        with open(self.file_path, "a", encoding="utf-8") as f:
+            for digest in digests:
+                f.write(json.dumps(digest, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        
+        with self._lock:
+            for digest in digests:
+                self._register(digest)
+    
+    def context(self, query=None, token_budget=500, k=3):
+        """
+        Get digests as a context section.
+        
+        Args:
+            query (str): If given, the digests most relevant to it are
+                chosen; otherwise the most recent ones
+            token_budget (int): Token budget for the whole section
+            k (int): Maximum number of digests
+        
+        Returns:
+            str: The section, or "" if there are no digests
+        """
+        with self._lock:
+            chosen = []
+            if query:
+                chosen = [number for score, number in self.backend.search(query, k) if score > 0]
+            if not chosen:
+                chosen = list(range(len(self.digests)))[-k:]
+            
+            # Oldest first, like the rest of the context
+            chosen = [self.digests[number] for number in sorted(chosen)]
+        
+        fragments = []
+        used = count_tokens(DIGEST_HEADER)
+        for digest in chosen:
+            fragment = render_digest(digest)
+            tokens = count_tokens(fragment)
+            if used + tokens > token_budget:
+                continue
+            fragments.append(fragment)
+            used += tokens
+        
+        return DIGEST_HEADER + "".join(fragments) if fragments else ""
+    
+    def _register(self, digest):
+        """Add a loaded or new digest to the in-memory structures"""
+        self.backend.add(len(self.digests), self.backend.vectorize(f"{digest['meeting_type']} {digest['summary']}"))
+        self.digests.append(digest)
+        if self.covered_until is None or digest["end"] > self.covered_until:
+            self.covered_until = digest["end"]
+
+class MemoryDigester:
+    """
+    Compacts old memory into per-sprint, per-meeting-type digests.
+    
+    Everything but the newest `keep_recent` exchanges is grouped by
+    sprint and meeting type, each group is summarized into a digest, and
+    the digested exchanges are then dropped from the raw log. Digests
+    are saved before anything is dropped, so an interrupted compaction
+    never loses exchanges; at worst the next one drops exchanges that
+    were already digested.
+    
+    Compaction can run in a background thread that checks every
+    `interval` seconds whether at least `batch_size` exchanges are due.
+    """
+    
+    def __init__(self, memory_manager, store, summarize=None, keep_recent=200, batch_size=50,
+                 interval=600.0, sprint_weeks=2):
+        """
+        Initialize the digester.
+        
+        Args:
+            memory_manager (MemoryManager or SqliteMemoryManager): Memory to compact
+            store (DigestStore): Where digests are kept
+            summarize (callable): `summarize(exchanges, meeting_type)` returning
+                a digest; defaults to local_digest, which needs no model calls
+            keep_recent (int): Newest exchanges always kept raw
+            batch_size (int): Minimum exchanges due before a background compaction
+            interval (float): Seconds between background checks
+            sprint_weeks (int): Weeks per sprint when grouping exchanges
+        """
+        self.memory_manager = memory_manager
+        self.store = store
+        self.summarize = summarize or local_digest
+        self.keep_recent = keep_recent
+        self.batch_size = batch_size
+        self.interval = interval
+        self.sprint_weeks = sprint_weeks
+        
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def compact(self, min_exchanges=1):
+        """
+        Digests every exchange older than the newest `keep_recent`.
+        
+        Args:
+            min_exchanges (int): Do nothing unless at least this many are due
+        
+        Returns:
+            dict: Counts of "digested" exchanges, new "digests" and
+                "dropped" raw exchanges
+        """
+        with self._lock:
+            stats = {"digested": 0, "digests": 0, "dropped": 0}
+            due = self._due()
+            
+            if len(due) >= min_exchanges:
+                groups = {}
+                for exchange in due:
+                    key = (sprint_key(exchange["timestamp"], self.sprint_weeks),
+                           exchange.get("meeting_type") or "general")
+                    groups.setdefault(key, []).append(exchange)
+                
+                digests = []
+                for (sprint, meeting_type), exchanges in groups.items():
+                    digests.append({
+                        "sprint": sprint,
+                        "meeting_type": meeting_type,
+                        "start": exchanges[0]["timestamp"],
+                        "end": exchanges[-1]["timestamp"],
+                        "count": len(exchanges),
+                        "summary": self._summarize(exchanges, meeting_type),
+                        "created": datetime.now().isoformat(),
+                    })
+                
+                # Newest-covered last, so `covered_until` only moves forward
+                digests.sort(key=lambda digest: digest["end"])
+                self.store.add(digests)
+                stats["digested"] = len(due)
+                stats["digests"] = len(digests)
+            
+            if self.store.covered_until is not None:
+                stats["dropped"] = self.memory_manager.drop_exchanges_until(self.store.covered_until)
+            return stats
+    
+    def start(self):
+        """Start compacting in a background thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="memory-digester", daemon=True)
+            self._thread.start()
+    
+    def close(self):
+        """Stop the background thread, letting a compaction in progress finish"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def _due(self):
+        """Get the exchanges to digest: those older than the newest `keep_recent` and not yet covered"""
+        covered_until = self.store.covered_until
+        
+        due = []
+        for exchange in islice(self.memory_manager.iter_history(reverse=True), self.keep_recent, None):
+            if covered_until is not None and exchange.get("timestamp", "") <= covered_until:
+                # Everything older is covered too; it is only waiting to be dropped
+                break
+            if exchange.get("timestamp"):
+                due.append(exchange)
+        
+        due.reverse()
+        return due
+    
+    def _summarize(self, exchanges, meeting_type):
+        """Summarize a group, falling back to a local digest if the summarizer fails"""
+        try:
+            return self.summarize(exchanges, meeting_type)
+        except Exception as e:
+            print(f"⚠️ Could not summarize {len(exchanges)} exchanges for a digest, using a local one: {str(e)}")
+            return local_digest(exchanges, meeting_type)
+    
+    def _run(self):
+        """Background loop"""
+        while not self._stop.wait(self.interval):
+            try:
+                stats = self.compact(min_exchanges=self.batch_size)
+                if stats["digested"]:
+                    print(f"\n🗜️ Digested {stats['digested']} old exchanges into {stats['digests']} summaries")
+            except Exception as e:
+                print(f"\n⚠️ Memory compaction failed: {str(e)}")
+
+def digest_path(user_name, memory_dir="data"):
+    """Get the path of a user's digest file"""
+    return os.path.join(memory_dir, f"{user_name}_digests.jsonl")
+
+def create_memory_digester(config, memory_manager):
+    """
+    Creates the memory digester from configuration.
+    
+    Args:
+        config (ConfigManager): The application configuration
+        memory_manager (MemoryManager or SqliteMemoryManager): Memory to compact
+    
+    Returns:
+        MemoryDigester: The digester, or None if digests are turned off
+    """
+    mode = config.get_memory_digests()
+    if mode not in DIGEST_SUMMARIZERS:
+        raise ValueError(f"Unknown memory digest mode: {mode}. Expected one of {', '.join(DIGEST_SUMMARIZERS)}.")
+    if mode == "off" or memory_manager.digest_store is None:
+        return None
+    
+    summarize = None
+    if mode == "agent":
+        from agents.summarizer import create_summarizer
+        summarize = agent_digest(create_summarizer(config))
+    
+    return MemoryDigester(
+        memory_manager,
+        memory_manager.digest_store,
+        summarize=summarize,
+        keep_recent=config.get_memory_digest_keep_recent(),
+        interval=config.get_memory_digest_interval(),
+        sprint_weeks=config.get_sprint_weeks()
+    )
+
+def main(argv=None):
+    """Command-line entry point for offline compaction"""
+    parser = argparse.ArgumentParser(prog="python -m memory.digests",
+                                     description="Summarize old memory into digests.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    
+    compact = subcommands.add_parser("compact", help="Digest all but the newest exchanges of each user")
+    compact.add_argument("users", nargs="*",
+                         help="Users to compact (default: every data/<user>_memory.jsonl)")
+    compact.add_argument("--keep-recent", type=int, default=200, help="Newest exchanges kept raw (default: 200)")
+    compact.add_argument("--sprint-weeks", type=int, default=2, help="Weeks per sprint (default: 2)")
+    
+    args = parser.parse_args(argv)
+    
+    from memory.memory_manager import MemoryManager
+    
+    users = args.users or sorted(
+        os.path.basename(path)[:-len("_memory.jsonl")] for path in glob.glob(os.path.join("data", "*_memory.jsonl"))
+    )
+    if not users:
+        print("No JSON Lines memory found in data/")
+        return 0
+    
+    for user_name in users:
+        memory_manager = MemoryManager(user_name, tail_size=0, digest_store=DigestStore(digest_path(user_name)))
+        try:
+            digester = MemoryDigester(memory_manager, memory_manager.digest_store, keep_recent=args.keep_recent,
+                                      sprint_weeks=args.sprint_weeks)
+            stats = digester.compact()
+        finally:
+            memory_manager.close()
+        print(f"✅ {user_name}: digested {stats['digested']} exchanges into {stats['digests']} summaries, "
+              f"dropped {stats['dropped']} raw exchanges")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,69 +4,529 @@ Memory management for Agilow Scrum Master.
 
 import os
 import json
+import shutil
+import time
+import threading
 from datetime import datetime
+from itertools import islice
 
-class MemoryManager:
+from memory.context_builder import ContextBuilder, MemoryContextMixin
+from memory.retrieval import RetrievalIndex
+
+FSYNC_POLICIES = ("always", "interval", "never")
+MEMORY_BACKENDS = ("jsonl", "sqlite")
+
+# Block size used when reading the journal backwards
+READ_BLOCK_SIZE = 64 * 1024
+
+class MemoryManager(MemoryContextMixin):
     """Manages conversation memory for the Scrum Master agent"""
     
-    def __init__(self, user_name="user"):
-        """Initialize the memory manager"""
+    def __init__(self, user_name="user", fsync_policy="interval", fsync_interval=1.0, tail_size=None,
+                 context_token_budget=2000, retrieval_backend=None, digest_store=None):
+        """
+        Initialize the memory manager.
+        
+        Memory is stored as an append-only JSON Lines journal with one
+        exchange per line, so each turn costs a single small write no
+        matter how long the history is.
+        
+        Args:
+            user_name (str): Name used to key the memory files
+            fsync_policy (str): "always" to fsync after every exchange,
+                "interval" to fsync at most every `fsync_interval` seconds,
+                or "never" to leave flushing to the operating system
+            fsync_interval (float): Seconds between fsyncs for "interval"
+            tail_size (int): If set, only the last `tail_size` exchanges are
+                read at startup and kept in memory; older exchanges are
+                paged in from disk through `iter_history`
+            context_token_budget (int): Token budget for `get_context_string`
+            retrieval_backend: Scoring backend for the retrieval index,
+                defaults to BM25 (see memory.retrieval)
+            digest_store (DigestStore): Summaries of digested exchanges to
+                include in the context (see memory.digests)
+        """
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync_policy}. Expected one of {', '.join(FSYNC_POLICIES)}.")
+        
         self.user_name = user_name
         self.conversation_history = []
-        self.file_path = f"data/{user_name}_memory.json"
+        self.file_path = f"data/{user_name}_memory.jsonl"
+        self.legacy_file_path = f"data/{user_name}_memory.json"
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self.tail_size = tail_size
+        self.context_builder = ContextBuilder(context_token_budget)
+        self.digest_store = digest_store
+        
+        self._journal = None
+        self._last_fsync = 0.0
+        
+        # Digested exchanges are dropped from a background thread while turns append
+        self._lock = threading.Lock()
         
         # Create data directory if it doesn't exist
         os.makedirs("data", exist_ok=True)
         
+        # Convert the old single-file JSON memory before loading
+        self._migrate_legacy_memory()
+        
         # Load existing memory if available
         self.load_memory()
+        
+        # Index every stored exchange for relevance search
+        self.retrieval_index = RetrievalIndex(f"data/{user_name}_index.jsonl", backend=retrieval_backend)
+        self._sync_retrieval_index()
     
-    def add_exchange(self, user_input, ai_response):
+    def add_exchange(self, user_input, ai_response, meeting_type=None):
         """Add a conversation exchange to memory"""
         exchange = {
             "timestamp": datetime.now().isoformat(),
             "user_input": user_input,
             "ai_response": ai_response
         }
+        if meeting_type:
+            exchange["meeting_type"] = meeting_type
         
-        self.conversation_history.append(exchange)
-        self.save_memory()
+        with self._lock:
+            self.conversation_history.append(exchange)
+            self._append_to_journal(exchange)
+            self.retrieval_index.add_exchange(exchange)
+            
+            # Keep only the tail in memory when loading lazily
+            if self.tail_size is not None and len(self.conversation_history) > self.tail_size:
+                # Slicing from the end would keep everything for a tail of 0
+                del self.conversation_history[:len(self.conversation_history) - self.tail_size]
+        
+        self.context_builder.add_exchange(exchange)
     
     def get_recent_history(self, limit=5):
         """Get recent conversation history"""
+        if self.tail_size is not None and limit > len(self.conversation_history):
+            # Page older exchanges in from disk
+            recent = list(islice(self.iter_history(reverse=True), limit))
+            recent.reverse()
+            return recent
+        
         return self.conversation_history[-limit:] if self.conversation_history else []
     
+    def iter_history(self, reverse=False):
+        """
+        Iterate over the full stored history without loading it all.
+        
+        Args:
+            reverse (bool): Yield newest exchanges first
+        
+        Returns:
+            generator: Exchanges streamed from the journal on disk
+        """
+        if not os.path.exists(self.file_path):
+            return
+        
+        if self._journal is not None:
+            self._journal.flush()
+        
+        if reverse:
+            lines = self._iter_journal_lines_reversed()
+        else:
+            lines = self._iter_journal_lines()
+        
+        for line in lines:
+            exchange = self._parse_line(line)
+            if exchange is not None:
+                yield exchange
+    
+    def get_history_between(self, start=None, end=None, meeting_type=None, limit=None):
+        """
+        Get exchanges from a time range, oldest first.
+        
+        The journal is scanned from the start; the SQLite backend answers
+        this from an index instead (see memory.sqlite_store).
+        
+        Args:
+            start (str): ISO timestamp or date the range starts at (inclusive)
+            end (str): ISO timestamp or date the range ends before (exclusive)
+            meeting_type (str): Only exchanges recorded for this meeting type
+            limit (int): Maximum number of exchanges to return
+        
+        Returns:
+            list: Matching exchanges
+        """
+        exchanges = (
+            e for e in self.iter_history()
+            if (start is None or e.get("timestamp", "") >= start)
+            and (end is None or e.get("timestamp", "") < end)
+            and (meeting_type is None or e.get("meeting_type") == meeting_type)
+        )
+        return list(islice(exchanges, limit))
+    
+    def search(self, query, k=10, start=None, end=None, meeting_type=None):
+        """
+        Search exchanges by relevance to a query, best matches first.
+        
+        Args:
+            query (str): The words to look for
+            k (int): Maximum number of exchanges to return
+            start (str): Only exchanges at or after this ISO timestamp or date
+            end (str): Only exchanges before this ISO timestamp or date
+            meeting_type (str): Only exchanges recorded for this meeting type
+        
+        Returns:
+            list: Matching exchanges
+        """
+        if start is None and end is None and meeting_type is None:
+            return self._search_index(query, k)
+        
+        # Filters are applied after ranking, so widen the search until enough results pass
+        limit = k * 4
+        while True:
+            results = self._search_index(query, limit)
+            matches = [
+                e for e in results
+                if (start is None or e.get("timestamp", "") >= start)
+                and (end is None or e.get("timestamp", "") < end)
+                and (meeting_type is None or e.get("meeting_type") == meeting_type)
+            ]
+            if len(matches) >= k or len(results) < limit:
+                return matches[:k]
+            limit *= 4
+    
+    def drop_exchanges_until(self, timestamp):
+        """
+        Remove exchanges at or before a timestamp, e.g. once they have been digested.
+        
+        The journal and the retrieval index, which holds its own copy of
+        every exchange, are rewritten to temporary files without them while
+        new exchanges keep being added. Only the final swap, which carries
+        over anything added in the meantime, holds the lock.
+        
+        Args:
+            timestamp (str): ISO timestamp of the newest exchange to remove
+        
+        Returns:
+            int: Number of exchanges removed
+        """
+        with self._lock:
+            oldest = next(self.iter_history(), None)
+            if oldest is None or oldest.get("timestamp", "") > timestamp:
+                return 0
+            
+            journal_size = os.path.getsize(self.file_path)
+            index_mark = len(self.retrieval_index)
+        
+        tmp_path = f"{self.file_path}.tmp"
+        dropped = self._copy_journal_after(timestamp, journal_size, tmp_path)
+        rebuilt_index = self.retrieval_index.prepare_drop(timestamp, index_mark)
+        
+        with self._lock:
+            self._close_journal()
+            with open(tmp_path, "ab") as tmp, open(self.file_path, "rb") as journal:
+                # Exchanges added while the copy was made
+                journal.seek(journal_size)
+                shutil.copyfileobj(journal, tmp)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            os.replace(tmp_path, self.file_path)
+            
+            self.retrieval_index.commit_drop(rebuilt_index, index_mark)
+            self.conversation_history = [e for e in self.conversation_history if e.get("timestamp", "") > timestamp]
+        
+        return dropped
+    
+    def _copy_journal_after(self, timestamp, size, tmp_path):
+        """
+        Copy the first `size` bytes of the journal to a new file, leaving out exchanges up to a timestamp.
+        
+        Exchanges are journaled in time order, so the ones to leave out are
+        a prefix and the rest is copied as is.
+        
+        Returns:
+            int: Number of exchanges left out
+        """
+        dropped = 0
+        with open(self.file_path, "rb") as journal, open(tmp_path, "wb") as tmp:
+            while journal.tell() < size:
+                position = journal.tell()
+                exchange = self._parse_line(journal.readline())
+                if exchange is None:
+                    continue
+                if exchange.get("timestamp", "") > timestamp:
+                    journal.seek(position)
+                    remaining = size - position
+                    while remaining > 0:
+                        block = journal.read(min(READ_BLOCK_SIZE, remaining))
+                        if not block:
+                            break
+                        tmp.write(block)
+                        remaining -= len(block)
+                    break
+                dropped += 1
+        return dropped
+    
     def save_memory(self):
-        """Save memory to file"""
-        with open(self.file_path, "w") as f:
-            json.dump(self.conversation_history, f, indent=2)
+        """Save memory to file by compacting the journal"""
+        self.compact()
+    
+    def compact(self):
+        """Rewrite the journal keeping only valid entries"""
+        # An exchange appended between the snapshot and the swap would be lost
+        with self._lock:
+            self._close_journal()
+            self._write_snapshot(self.iter_history())
     
     def load_memory(self):
-        """Load memory from file"""
+        """Load memory from file, recovering from a torn or corrupt journal"""
+        self.conversation_history = []
+        
+        if os.path.exists(self.file_path):
+            if self.tail_size is not None:
+                self._load_tail()
+            else:
+                self._load_all()
+        
+        if self.tail_size is not None:
+            self.context_builder.load(self.iter_history(reverse=True))
+        else:
+            self.context_builder.load(reversed(self.conversation_history))
+    
+    def _load_all(self):
+        """Load the whole journal into memory"""
+        skipped = 0
+        good_end = 0
+        torn_tail = False
+        
         try:
-            if os.path.exists(self.file_path):
-                with open(self.file_path, "r") as f:
-                    self.conversation_history = json.load(f)
+            with open(self.file_path, "rb") as f:
+                offset = 0
+                for raw_line in f:
+                    offset += len(raw_line)
+                    
+                    if not raw_line.endswith(b"\n"):
+                        # Last write was interrupted before the newline
+                        torn_tail = True
+                        break
+                    
+                    line = raw_line.strip()
+                    if not line:
+                        good_end = offset
+                        continue
+                    
+                    try:
+                        self.conversation_history.append(json.loads(line))
+                    except ValueError:
+                        skipped += 1
+                    good_end = offset
         except Exception as e:
             print(f"Error loading memory: {str(e)}")
             self.conversation_history = []
+            return
+        
+        if torn_tail:
+            print("Recovered memory journal: discarded an incomplete last entry")
+            # Cut the partial line off so the next append starts cleanly
+            with open(self.file_path, "r+b") as f:
+                f.truncate(good_end)
+        
+        if skipped:
+            print(f"Recovered memory journal: skipped {skipped} corrupt entries")
+            self.compact()
+    
+    def close(self):
+        """Flush and close the journal and index files"""
+        self._close_journal()
+        self.retrieval_index.close()
     
-    def get_context_string(self, limit=5):
-        """Get context string for the AI"""
-        recent_history = self.get_recent_history(limit)
+    def _search_index(self, query, k, **kwargs):
+        """Search the retrieval index, which a digest pass may be swapping out"""
+        with self._lock:
+            return self.retrieval_index.search(query, k, **kwargs)
+    
+    def _sync_retrieval_index(self):
+        """Index any exchanges written since the index was last updated"""
+        last_timestamp = self.retrieval_index.last_timestamp
         
-        if not recent_history:
-            return "No previous conversation history."
+        missing = []
+        for exchange in self.iter_history(reverse=True):
+            if last_timestamp is not None and exchange.get("timestamp", "") <= last_timestamp:
+                break
+            missing.append(exchange)
         
-        context = "Recent conversation history:\n\n"
+        if missing:
+            print(f"Indexing {len(missing)} exchanges for retrieval...")
         
-        for exchange in recent_history:
-            timestamp = exchange.get("timestamp", "Unknown time")
-            user_input = exchange.get("user_input", "")
-            ai_response = exchange.get("ai_response", "")
+        for exchange in reversed(missing):
+            self.retrieval_index.add_exchange(exchange)
+    
+    def _load_tail(self):
+        """Load only the last `tail_size` exchanges by reading the journal backwards"""
+        try:
+            self._repair_torn_tail()
+            tail = list(islice(self.iter_history(reverse=True), self.tail_size))
+        except Exception as e:
+            print(f"Error loading memory: {str(e)}")
+            return
+        
+        tail.reverse()
+        self.conversation_history = tail
+    
+    def _repair_torn_tail(self):
+        """Truncate an incomplete last line left by an interrupted write"""
+        with open(self.file_path, "r+b") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+            
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+            
+            # Walk back to the last complete line
+            position = size
+            while position > 0:
+                read_size = min(READ_BLOCK_SIZE, position)
+                position -= read_size
+                f.seek(position)
+                newline = f.read(read_size).rfind(b"\n")
+                if newline != -1:
+                    position += newline + 1
+                    break
+            
+            f.truncate(position)
+            print("Recovered memory journal: discarded an incomplete last entry")
+    
+    def _iter_journal_lines(self):
+        """Yield raw journal lines from oldest to newest"""
+        with open(self.file_path, "rb") as f:
+            for line in f:
+                yield line
+    
+    def _iter_journal_lines_reversed(self):
+        """Yield raw journal lines from newest to oldest, reading fixed-size blocks from the end"""
+        with open(self.file_path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            remainder = b""
+            
+            while position > 0:
+                read_size = min(READ_BLOCK_SIZE, position)
+                position -= read_size
+                f.seek(position)
+                lines = (f.read(read_size) + remainder).split(b"\n")
+                
+                # The first piece may be the end of a line from an earlier block
+                remainder = lines.pop(0)
+                for line in reversed(lines):
+                    yield line
             
-            context += f"Time: {timestamp}\n"
-            context += f"User: {user_input}\n"
-            context += f"Scrum Master: {ai_response}\n\n"
+            if remainder:
+                yield remainder
+    
+    def _parse_line(self, line):
+        """Parse a journal line, returning None for blank or corrupt lines"""
+        line = line.strip()
+        if not line:
+            return None
         
-        return context
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+    
+    def _write_snapshot(self, exchanges):
+        """
+        Atomically replace the journal with the given exchanges.
+        
+        The snapshot is written to a temporary file and swapped in with
+        os.replace, so a crash mid-write leaves the old journal intact.
+        """
+        tmp_path = f"{self.file_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for exchange in exchanges:
+                f.write(json.dumps(exchange, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        
+        os.replace(tmp_path, self.file_path)
+    
+    def _append_to_journal(self, exchange):
+        """Append a single exchange to the journal"""
+        if self._journal is None:
+            self._journal = open(self.file_path, "a", encoding="utf-8")
+        
+        self._journal.write(json.dumps(exchange, ensure_ascii=False) + "\n")
+        self._journal.flush()
+        
+        now = time.monotonic()
+        if self.fsync_policy == "always" or (
+            self.fsync_policy == "interval" and now - self._last_fsync >= self.fsync_interval
+        ):
+            os.fsync(self._journal.fileno())
+            self._last_fsync = now
+    
+    def _close_journal(self):
+        """Close the open journal handle, syncing it to disk"""
+        if self._journal is not None:
+            self._journal.flush()
+            if self.fsync_policy != "never":
+                os.fsync(self._journal.fileno())
+            self._journal.close()
+            self._journal = None
+    
+    def _migrate_legacy_memory(self):
+        """Convert a pre-journal JSON memory file into the journal format"""
+        if os.path.exists(self.file_path) or not os.path.exists(self.legacy_file_path):
+            return
+        
+        try:
+            with open(self.legacy_file_path, "r") as f:
+                history = json.load(f)
+        except Exception as e:
+            print(f"Error migrating memory: {str(e)}")
+            return
+        
+        self._write_snapshot(history)
+        
+        # Keep the original file around rather than deleting it
+        os.replace(self.legacy_file_path, f"{self.legacy_file_path}.migrated")
+        print(f"Migrated {len(history)} exchanges to {self.file_path}")
+
+def create_memory_manager(config, user_name="user", tail_size=None):
+    """
+    Creates the memory manager for the configured storage backend.
+    
+    Args:
+        config (ConfigManager): The application configuration
+        user_name (str): Name whose memory to open
+        tail_size (int): Exchanges kept in memory by the JSON Lines backend
+            (see MemoryManager); ignored by the SQLite backend
+    
+    Returns:
+        MemoryManager or SqliteMemoryManager: The memory manager
+    """
+    backend = config.get_memory_backend()
+    if backend not in MEMORY_BACKENDS:
+        raise ValueError(f"Unknown memory backend: {backend}. Expected one of {', '.join(MEMORY_BACKENDS)}.")
+    
+    # Digests are loaded whenever they are on, even where no digester runs
+    digest_store = None
+    if config.get_memory_digests() != "off":
+        from memory.digests import DigestStore, digest_path
+        digest_store = DigestStore(digest_path(user_name))
+    
+    if backend == "sqlite":
+        from memory.sqlite_store import SqliteMemoryManager
+        
+        return SqliteMemoryManager(
+            user_name=user_name,
+            db_path=config.get_memory_db_path(),
+            context_token_budget=config.get_context_token_budget(),
+            digest_store=digest_store
+        )
+    
+    return MemoryManager(
+        user_name=user_name,
+        tail_size=tail_size,
+        context_token_budget=config.get_context_token_budget(),
+        digest_store=digest_store
+    )
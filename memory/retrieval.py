@@ -0,0 +1,325 @@
+"""
+Retrieval over long-term conversation memory for Agilow Scrum Master.
+"""
+
+import os
+import re
+import json
+import math
+import heapq
+from collections import Counter, defaultdict
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by can do for from has have he i if in into is it its
+me my no not of on or our so that the their them then there these they this to
+us was we were what when which who will with would you your
+""".split())
+
+class Bm25Backend:
+    """
+    Sparse BM25 scoring backend.
+    
+    Backends turn text into a JSON-serializable vector, keep the vectors
+    they are given, and score stored vectors against a query. Any object
+    with the same `vectorize`/`add`/`search`/`empty` methods can be passed
+    to `RetrievalIndex` instead, e.g. one backed by an embedding model.
+    """
+    
+    def __init__(self, k1=1.5, b=0.75):
+        """Initialize an empty BM25 backend"""
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)  # term -> [(chunk_id, term frequency)]
+        self.chunk_lengths = []
+        self.total_length = 0
+    
+    def empty(self):
+        """Get a new, empty backend with the same settings"""
+        return Bm25Backend(self.k1, self.b)
+    
+    def vectorize(self, text):
+        """Convert text into a term-frequency vector"""
+        terms = [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS and len(t) > 1]
+        return dict(Counter(terms))
+    
+    def add(self, chunk_id, vector):
+        """Add a vector under the given chunk id (ids must be added in order)"""
+        for term, frequency in vector.items():
+            self.postings[term].append((chunk_id, frequency))
+        
+        length = sum(vector.values())
+        self.chunk_lengths.append(length)
+        self.total_length += length
+    
+    def search(self, query, k):
+        """
+        Score stored chunks against a query.
+        
+        Args:
+            query (str): The query text
+            k (int): Number of results to return
+        
+        Returns:
+            list: (score, chunk_id) tuples, best first
+        """
+        count = len(self.chunk_lengths)
+        if not count:
+            return []
+        
+        average_length = self.total_length / count or 1
+        scores = defaultdict(float)
+        
+        for term in self.vectorize(query):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, frequency in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.chunk_lengths[chunk_id] / average_length)
+                scores[chunk_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+        
+        return heapq.nlargest(k, ((score, chunk_id) for chunk_id, score in scores.items()))
+
+class RetrievalIndex:
+    """Incremental, persisted retrieval index over stored exchanges"""
+    
+    def __init__(self, file_path, backend=None, chunk_words=200):
+        """
+        Initialize the retrieval index.
+        
+        The index is an append-only JSON Lines file; each line holds one
+        exchange together with the vectors of its chunks. Vectors are read
+        back into the backend at startup and exchanges are read from disk
+        by offset only when they are returned from a search.
+        
+        Args:
+            file_path (str): Path of the index file
+            backend: Scoring backend, defaults to `Bm25Backend`
+            chunk_words (int): Maximum words per indexed chunk
+        """
+        self.file_path = file_path
+        self.backend = backend or Bm25Backend()
+        self.chunk_words = chunk_words
+        
+        self.last_timestamp = None
+        self._offsets = []  # exchange number -> byte offset in the index file
+        self._chunk_owner = []  # chunk id -> exchange number
+        self._file = None
+        
+        self.load()
+    
+    def __len__(self):
+        return len(self._offsets)
+    
+    def load(self):
+        """Load vectors from the index file, dropping a torn last line"""
+        if not os.path.exists(self.file_path):
+            return
+        
+        offset = 0
+        with open(self.file_path, "rb") as f:
+            for raw_line in f:
+                if not raw_line.endswith(b"\n"):
+                    break
+                
+                try:
+                    entry = json.loads(raw_line)
+                except ValueError:
+                    offset += len(raw_line)
+                    continue
+                
+                self._register(offset, entry)
+                offset += len(raw_line)
+        
+        if offset != os.path.getsize(self.file_path):
+            with open(self.file_path, "r+b") as f:
+                f.truncate(offset)
+    
+    def add_exchange(self, exchange):
+        """Index a new exchange and append it to the index file"""
+        text = f"{exchange.get('user_input', '')}\n{exchange.get('ai_response', '')}"
+        entry = {
+            "exchange": exchange,
+            "vectors": [self.backend.vectorize(chunk) for chunk in self._chunk(text)]
+        }
+        
+        self._write_entry(json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n", entry)
+    
+    def search(self, query, k=3, exclude_timestamps=()):
+        """
+        Find the stored exchanges most relevant to a query.
+        
+        Args:
+            query (str): The query text
+            k (int): Maximum number of exchanges to return
+            exclude_timestamps (iterable): Timestamps of exchanges to skip,
+                e.g. those already in the recent context
+        
+        Returns:
+            list: Matching exchanges, most relevant first
+        """
+        exclude = set(exclude_timestamps)
+        
+        # Fetch extra chunks since several may belong to the same exchange
+        candidates = self.backend.search(query, (k + len(exclude)) * 4)
+        
+        numbers = []
+        for score, chunk_id in candidates:
+            number = self._chunk_owner[chunk_id]
+            if score > 0 and number not in numbers:
+                numbers.append(number)
+        
+        results = []
+        for number in numbers:
+            exchange = self._read_exchange(number)
+            if exchange.get("timestamp") in exclude:
+                continue
+            results.append(exchange)
+            if len(results) >= k:
+                break
+        
+        return results
+    
+    def clear(self):
+        """Remove every exchange from the index, e.g. before re-indexing a rewritten journal"""
+        self.close()
+        with open(self.file_path, "wb"):
+            pass
+        
+        self.backend = self.backend.empty()
+        self.last_timestamp = None
+        self._offsets = []
+        self._chunk_owner = []
+    
+    def prepare_drop(self, timestamp, mark):
+        """
+        Build a copy of the index without the exchanges at or before a timestamp.
+        
+        Only the first `mark` exchanges are looked at, so this can run while
+        new exchanges are added; stored vectors are reused rather than
+        recomputed. Pass the result to `commit_drop` to swap it in.
+        
+        Args:
+            timestamp (str): ISO timestamp of the newest exchange to drop
+            mark (int): Number of exchanges indexed when the drop started (`len(index)`)
+        
+        Returns:
+            RetrievalIndex: The rebuilt index, backed by a temporary file
+        """
+        rebuilt_path = f"{self.file_path}.tmp"
+        if os.path.exists(rebuilt_path):
+            os.remove(rebuilt_path)
+        rebuilt = RetrievalIndex(rebuilt_path, backend=self.backend.empty(), chunk_words=self.chunk_words)
+        
+        if not mark:
+            return rebuilt
+        
+        with open(self.file_path, "rb") as f:
+            # Exchanges are indexed in time order, so the ones to drop are a prefix
+            low, high = 0, mark
+            while low < high:
+                middle = (low + high) // 2
+                f.seek(self._offsets[middle])
+                if json.loads(f.readline())["exchange"].get("timestamp", "") <= timestamp:
+                    low = middle + 1
+                else:
+                    high = middle
+            
+            if low < mark:
+                end = self._offsets[mark] if mark < len(self._offsets) else None
+                rebuilt._copy_entries(f, self._offsets[low], end)
+        
+        return rebuilt
+    
+    def commit_drop(self, rebuilt, mark):
+        """
+        Swap in an index built by `prepare_drop`.
+        
+        Exchanges added since `mark` are copied over first, so the caller
+        should hold whatever lock serializes `add_exchange`.
+        
+        Args:
+            rebuilt (RetrievalIndex): Result of `prepare_drop`
+            mark (int): The `mark` given to `prepare_drop`
+        
+        Returns:
+            int: Number of exchanges dropped
+        """
+        dropped = mark - len(rebuilt)
+        if self._file is not None:
+            self._file.flush()
+        
+        if mark < len(self._offsets):
+            with open(self.file_path, "rb") as f:
+                rebuilt._copy_entries(f, self._offsets[mark], None)
+        
+        rebuilt.close()
+        self.close()
+        os.replace(rebuilt.file_path, self.file_path)
+        
+        self.backend = rebuilt.backend
+        self.last_timestamp = rebuilt.last_timestamp
+        self._offsets = rebuilt._offsets
+        self._chunk_owner = rebuilt._chunk_owner
+        return dropped
+    
+    def close(self):
+        """Close the index file"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def _write_entry(self, line, entry):
+        """Append an encoded entry to the index file and register it"""
+        if self._file is None:
+            self._file = open(self.file_path, "ab")
+        
+        offset = self._file.tell()
+        self._file.write(line)
+        self._file.flush()
+        
+        self._register(offset, entry)
+    
+    def _copy_entries(self, source, start, end):
+        """Append the entries of another index file between two offsets (None for the end)"""
+        source.seek(start)
+        while end is None or source.tell() < end:
+            line = source.readline()
+            if not line.endswith(b"\n"):
+                break
+            
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            self._write_entry(line, entry)
+    
+    def _register(self, offset, entry):
+        """Add a parsed index entry to the in-memory structures"""
+        number = len(self._offsets)
+        self._offsets.append(offset)
+        
+        for vector in entry["vectors"]:
+            self.backend.add(len(self._chunk_owner), vector)
+            self._chunk_owner.append(number)
+        
+        self.last_timestamp = entry["exchange"].get("timestamp")
+    
+    def _read_exchange(self, number):
+        """Read a single exchange back from the index file"""
+        if self._file is not None:
+            self._file.flush()
+        
+        with open(self.file_path, "rb") as f:
+            f.seek(self._offsets[number])
+            return json.loads(f.readline())["exchange"]
+    
+    def _chunk(self, text):
+        """Split text into chunks of at most `chunk_words` words"""
+        words = text.split()
+        if not words:
+            return [""]
+        return [" ".join(words[i:i + self.chunk_words]) for i in range(0, len(words), self.chunk_words)]
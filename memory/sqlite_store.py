@@ -0,0 +1,448 @@
+"""
+SQLite-backed conversation memory for Agilow Scrum Master.
+
+Migrate existing JSON Lines memory with:
+    python -m memory.sqlite_store migrate [--db data/memory.db] [user ...]
+"""
+
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+from memory.context_builder import ContextBuilder, MemoryContextMixin
+from memory.retrieval import STOPWORDS, TOKEN_PATTERN
+
+# fsync policies of the JSON Lines journal and the SQLite setting closest to each
+SYNCHRONOUS_MODES = {"always": "FULL", "interval": "NORMAL", "never": "OFF"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS exchanges (
+    id INTEGER PRIMARY KEY,
+    user_name TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    meeting_type TEXT,
+    user_input TEXT NOT NULL,
+    ai_response TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS exchanges_user_time ON exchanges (user_name, timestamp);
+CREATE INDEX IF NOT EXISTS exchanges_user_type_time ON exchanges (user_name, meeting_type, timestamp);
+"""
+
+# External-content index kept in step with the table by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS exchanges_fts USING fts5(
+    user_input, ai_response, content='exchanges', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS exchanges_fts_insert AFTER INSERT ON exchanges BEGIN
+    INSERT INTO exchanges_fts (rowid, user_input, ai_response)
+    VALUES (new.id, new.user_input, new.ai_response);
+END;
+CREATE TRIGGER IF NOT EXISTS exchanges_fts_delete AFTER DELETE ON exchanges BEGIN
+    INSERT INTO exchanges_fts (exchanges_fts, rowid, user_input, ai_response)
+    VALUES ('delete', old.id, old.user_input, old.ai_response);
+END;
+"""
+
+COLUMNS = "timestamp, meeting_type, user_input, ai_response"
+
+class SqliteMemoryManager(MemoryContextMixin):
+    """
+    Conversation memory stored in a shared SQLite database.
+    
+    A drop-in alternative to `MemoryManager`: every user's exchanges
+    live in one table indexed by user, timestamp and meeting type, with
+    an FTS5 full-text index over their text. Nothing is loaded at
+    startup beyond what the recent context needs, and date-range and
+    keyword queries run against the indexes instead of scanning the
+    whole history.
+    """
+    
+    def __init__(self, user_name="user", db_path="data/memory.db", fsync_policy="interval",
+                 context_token_budget=2000, digest_store=None):
+        """
+        Initialize the memory manager.
+        
+        Args:
+            user_name (str): Name whose exchanges this manager reads and writes
+            db_path (str): Path of the SQLite database, shared by all users
+            fsync_policy (str): "always", "interval" or "never", mapped to
+                SQLite's FULL, NORMAL and OFF synchronous modes
+            context_token_budget (int): Token budget for `get_context_string`
+            digest_store (DigestStore): Summaries of digested exchanges to
+                include in the context (see memory.digests)
+        """
+        if fsync_policy not in SYNCHRONOUS_MODES:
+            raise ValueError(f"Unknown fsync policy: {fsync_policy}. Expected one of {', '.join(SYNCHRONOUS_MODES)}.")
+        
+        self.user_name = user_name
+        self.file_path = db_path
+        self.fsync_policy = fsync_policy
+        self.context_builder = ContextBuilder(context_token_budget)
+        self.digest_store = digest_store
+        
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        # Writes come from background threads, so one connection is shared under a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={SYNCHRONOUS_MODES[fsync_policy]}")
+        self._conn.executescript(SCHEMA)
+        self.full_text_search = self._create_fts_index()
+        
+        self.load_memory()
+    
+    def add_exchange(self, user_input, ai_response, meeting_type=None):
+        """Add a conversation exchange to memory"""
+        exchange = {
+            "timestamp": datetime.now().isoformat(),
+            "user_input": user_input,
+            "ai_response": ai_response
+        }
+        if meeting_type:
+            exchange["meeting_type"] = meeting_type
+        
+        self.insert_exchanges([exchange])
+        self.context_builder.add_exchange(exchange)
+    
+    def insert_exchanges(self, exchanges):
+        """
+        Store exchanges in one transaction without touching the context.
+        
+        Args:
+            exchanges (iterable): Exchange dicts with "timestamp", "user_input",
+                "ai_response" and optionally "meeting_type"
+        
+        Returns:
+            int: Number of exchanges stored
+        """
+        rows = (
+            (self.user_name, e.get("timestamp", ""), e.get("meeting_type"),
+             e.get("user_input", ""), e.get("ai_response", ""))
+            for e in exchanges
+        )
+        with self._lock, self._conn:
+            cursor = self._conn.executemany(
+                f"INSERT INTO exchanges (user_name, {COLUMNS}) VALUES (?, ?, ?, ?, ?)", rows
+            )
+        return cursor.rowcount
+    
+    def get_recent_history(self, limit=5):
+        """Get recent conversation history"""
+        recent = self._query(
+            f"SELECT {COLUMNS} FROM exchanges WHERE user_name = ? ORDER BY timestamp DESC, id DESC LIMIT ?",
+            (self.user_name, limit)
+        )
+        recent.reverse()
+        return recent
+    
+    def iter_history(self, reverse=False):
+        """
+        Iterate over the full stored history without loading it all.
+        
+        Args:
+            reverse (bool): Yield newest exchanges first
+        
+        Returns:
+            generator: Exchanges read from the database in pages
+        """
+        order = "DESC" if reverse else "ASC"
+        comparison = "<" if reverse else ">"
+        last = None
+        
+        while True:
+            if last is None:
+                where, params = "user_name = ?", (self.user_name,)
+            else:
+                where = f"user_name = ? AND (timestamp, id) {comparison} (?, ?)"
+                params = (self.user_name, *last)
+            
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT id, {COLUMNS} FROM exchanges WHERE {where} "
+                    f"ORDER BY timestamp {order}, id {order} LIMIT 500",
+                    params
+                ).fetchall()
+            
+            if not rows:
+                return
+            
+            for row in rows:
+                yield _row_to_exchange(row)
+            last = (rows[-1]["timestamp"], rows[-1]["id"])
+    
+    def get_history_between(self, start=None, end=None, meeting_type=None, limit=None):
+        """
+        Get exchanges from a time range, oldest first.
+        
+        Args:
+            start (str): ISO timestamp or date the range starts at (inclusive)
+            end (str): ISO timestamp or date the range ends before (exclusive)
+            meeting_type (str): Only exchanges recorded for this meeting type
+            limit (int): Maximum number of exchanges to return
+        
+        Returns:
+            list: Matching exchanges
+        """
+        where, params = self._filters(start, end, meeting_type)
+        sql = f"SELECT {COLUMNS} FROM exchanges WHERE {where} ORDER BY timestamp, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self._query(sql, params)
+    
+    def search(self, query, k=10, start=None, end=None, meeting_type=None):
+        """
+        Full-text search over exchanges, best matches first.
+        
+        Any word of the query may match; exchanges matching more and
+        rarer words rank higher. Without FTS5 support in the SQLite
+        build, exchanges containing any word are returned newest first.
+        
+        Args:
+            query (str): The words to look for
+            k (int): Maximum number of exchanges to return
+            start (str): Only exchanges at or after this ISO timestamp or date
+            end (str): Only exchanges before this ISO timestamp or date
+            meeting_type (str): Only exchanges recorded for this meeting type
+        
+        Returns:
+            list: Matching exchanges
+        """
+        terms = [t for t in dict.fromkeys(TOKEN_PATTERN.findall(query.lower())) if t not in STOPWORDS and len(t) > 1]
+        if not terms:
+            return []
+        
+        where, params = self._filters(start, end, meeting_type, prefix="e.")
+        
+        if self.full_text_search:
+            match = " OR ".join('"' + t.replace('"', '""') + '"' for t in terms)
+            return self._query(
+                f"SELECT e.timestamp, e.meeting_type, e.user_input, e.ai_response "
+                f"FROM exchanges_fts JOIN exchanges e ON e.id = exchanges_fts.rowid "
+                f"WHERE exchanges_fts MATCH ? AND {where} ORDER BY bm25(exchanges_fts) LIMIT ?",
+                [match, *params, k]
+            )
+        
+        like = " OR ".join("(e.user_input LIKE ? OR e.ai_response LIKE ?)" for _ in terms)
+        for term in terms:
+            params += [f"%{term}%", f"%{term}%"]
+        return self._query(
+            f"SELECT e.timestamp, e.meeting_type, e.user_input, e.ai_response FROM exchanges e "
+            f"WHERE {where} AND ({like}) ORDER BY e.timestamp DESC LIMIT ?",
+            [*params, k]
+        )
+    
+    def count(self):
+        """Get the number of stored exchanges for this user"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM exchanges WHERE user_name = ?", (self.user_name,)
+            ).fetchone()[0]
+    
+    def drop_exchanges_until(self, timestamp):
+        """
+        Remove this user's exchanges at or before a timestamp, e.g. once they have been digested.
+        
+        The freed pages are reused for new exchanges; the database file
+        only shrinks when it is vacuumed.
+        
+        Args:
+            timestamp (str): ISO timestamp of the newest exchange to remove
+        
+        Returns:
+            int: Number of exchanges removed
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM exchanges WHERE user_name = ? AND timestamp <= ?", (self.user_name, timestamp)
+            )
+        return cursor.rowcount
+    
+    def save_memory(self):
+        """Checkpoint the write-ahead log into the database file"""
+        self.compact()
+    
+    def compact(self):
+        """Checkpoint the write-ahead log and truncate it"""
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    
+    def load_memory(self):
+        """Rebuild the recent context from the database"""
+        self.context_builder.load(self.iter_history(reverse=True))
+    
+    def close(self):
+        """Checkpoint and close the database connection"""
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+            except sqlite3.Error:
+                pass
+            self._conn.close()
+            self._conn = None
+    
+    def _search_index(self, query, k, exclude_timestamps=()):
+        """Search for the relevant-history section, skipping the given exchanges"""
+        exclude = set(exclude_timestamps)
+        return [e for e in self.search(query, k + len(exclude)) if e["timestamp"] not in exclude][:k]
+    
+    def _create_fts_index(self):
+        """Create the full-text index, returning False if this SQLite build lacks FTS5"""
+        try:
+            with self._conn:
+                exists = self._conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'exchanges_fts'"
+                ).fetchone()
+                self._conn.executescript(FTS_SCHEMA)
+                if not exists:
+                    # Index rows written before the index existed
+                    self._conn.execute("INSERT INTO exchanges_fts (exchanges_fts) VALUES ('rebuild')")
+        except sqlite3.OperationalError as e:
+            print(f"⚠️ Full-text search unavailable, falling back to LIKE queries: {str(e)}")
+            return False
+        return True
+    
+    def _filters(self, start, end, meeting_type, prefix=""):
+        """Build the WHERE clause and parameters for user, time range and meeting type"""
+        clauses = [f"{prefix}user_name = ?"]
+        params = [self.user_name]
+        
+        if start is not None:
+            clauses.append(f"{prefix}timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append(f"{prefix}timestamp < ?")
+            params.append(end)
+        if meeting_type is not None:
+            clauses.append(f"{prefix}meeting_type = ?")
+            params.append(meeting_type)
+        
+        return " AND ".join(clauses), params
+    
+    def _existing_keys(self, start, end):
+        """Get (timestamp, user_input, ai_response) of the exchanges stored between two timestamps, inclusive"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT timestamp, user_input, ai_response FROM exchanges "
+                "WHERE user_name = ? AND timestamp BETWEEN ? AND ?",
+                (self.user_name, start, end)
+            ).fetchall()
+        return {tuple(row) for row in rows}
+    
+    def _query(self, sql, params):
+        """Run a query and return its rows as exchange dicts"""
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [_row_to_exchange(row) for row in rows]
+
+def _row_to_exchange(row):
+    """Convert a database row to the exchange dict used by the JSON Lines journal"""
+    exchange = {
+        "timestamp": row["timestamp"],
+        "user_input": row["user_input"],
+        "ai_response": row["ai_response"]
+    }
+    if row["meeting_type"]:
+        exchange["meeting_type"] = row["meeting_type"]
+    return exchange
+
+def _exchange_key(exchange):
+    """Identify an exchange by its timestamp and messages"""
+    return (exchange.get("timestamp", ""), exchange.get("user_input", ""), exchange.get("ai_response", ""))
+
+def _new_exchanges(target, batch):
+    """Drop the exchanges of a batch that the database already holds"""
+    timestamps = [exchange.get("timestamp", "") for exchange in batch]
+    existing = target._existing_keys(min(timestamps), max(timestamps))
+    
+    new = []
+    for exchange in batch:
+        key = _exchange_key(exchange)
+        if key not in existing:
+            # Also guards against the same exchange twice in the journal
+            existing.add(key)
+            new.append(exchange)
+    return new
+
+def migrate_from_jsonl(user_name, db_path="data/memory.db", memory_dir="data"):
+    """
+    Copies a user's JSON Lines memory into the SQLite database.
+    
+    Exchanges the database already holds (same timestamp and messages)
+    are skipped, so running the migration again only copies what is new,
+    even where the two histories interleave. The JSON Lines journal is
+    left in place.
+    
+    Args:
+        user_name (str): The user whose memory to copy
+        db_path (str): Path of the SQLite database
+        memory_dir (str): Directory holding the JSON Lines journals
+    
+    Returns:
+        int: Number of exchanges copied
+    """
+    journal_path = os.path.join(memory_dir, f"{user_name}_memory.jsonl")
+    target = SqliteMemoryManager(user_name=user_name, db_path=db_path)
+    
+    try:
+        copied = 0
+        batch = []
+        with open(journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    exchange = json.loads(line)
+                except ValueError:
+                    # Blank, torn or corrupt lines are skipped as the journal loader does
+                    continue
+                
+                batch.append(exchange)
+                if len(batch) >= 1000:
+                    copied += target.insert_exchanges(_new_exchanges(target, batch))
+                    batch = []
+        if batch:
+            copied += target.insert_exchanges(_new_exchanges(target, batch))
+        
+        target.compact()
+        return copied
+    finally:
+        target.close()
+
+def main(argv=None):
+    """Command-line entry point for the migration tool"""
+    parser = argparse.ArgumentParser(prog="python -m memory.sqlite_store",
+                                     description="Manage the SQLite memory store.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    
+    migrate = subcommands.add_parser("migrate", help="Copy JSON Lines memory into the SQLite database")
+    migrate.add_argument("users", nargs="*",
+                         help="Users to migrate (default: every data/<user>_memory.jsonl)")
+    migrate.add_argument("--db", default=os.getenv("MEMORY_DB_PATH", "data/memory.db"),
+                         help="Path of the SQLite database")
+    
+    args = parser.parse_args(argv)
+    
+    users = args.users or sorted(
+        os.path.basename(path)[:-len("_memory.jsonl")] for path in glob.glob(os.path.join("data", "*_memory.jsonl"))
+    )
+    if not users:
+        print("No JSON Lines memory found in data/")
+        return 0
+    
+    for user_name in users:
+        copied = migrate_from_jsonl(user_name, args.db)
+        print(f"✅ {user_name}: copied {copied} exchanges to {args.db}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,3 @@
+"""
+Meeting recording modules for Agilow Scrum Master.
+"""
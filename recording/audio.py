@@ -0,0 +1,76 @@
+"""
+Audio input for meeting recordings.
+"""
+
+import wave
+
+class AudioChunk:
+    """A slice of PCM audio read from a recording"""
+    
+    def __init__(self, frames, start, duration, sample_rate, channels, sample_width):
+        """
+        Initialize the chunk.
+        
+        Args:
+            frames (bytes): Interleaved little-endian PCM frames
+            start (float): Offset of the chunk in the recording, in seconds
+            duration (float): Length of the chunk in seconds
+            sample_rate (int): Frames per second
+            channels (int): Number of interleaved channels
+            sample_width (int): Bytes per sample
+        """
+        self.frames = frames
+        self.start = start
+        self.duration = duration
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width
+    
+    @property
+    def end(self):
+        """Offset of the end of the chunk, in seconds"""
+        return self.start + self.duration
+
+def iter_wave_chunks(source, chunk_seconds=30.0):
+    """
+    Reads a WAV recording a chunk at a time.
+    
+    Only one chunk is held in memory at once, so hour-long recordings
+    are read in constant memory.
+    
+    Args:
+        source (str): Path of a WAV file, or a binary file object such as
+            a pipe for a recording that is still being written
+        chunk_seconds (float): Length of each chunk in seconds
+    
+    Yields:
+        AudioChunk: Consecutive chunks of the recording
+    """
+    with wave.open(source, "rb") as recording:
+        sample_rate = recording.getframerate()
+        channels = recording.getnchannels()
+        sample_width = recording.getsampwidth()
+        frames_per_chunk = max(int(sample_rate * chunk_seconds), 1)
+        
+        position = 0
+        while True:
+            frames = recording.readframes(frames_per_chunk)
+            if not frames:
+                return
+            
+            count = len(frames) // (channels * sample_width)
+            yield AudioChunk(frames, position / sample_rate, count / sample_rate, sample_rate, channels, sample_width)
+            position += count
+
+def wave_duration(path):
+    """
+    Gets the length of a WAV recording without reading its audio.
+    
+    Args:
+        path (str): Path of the WAV file
+    
+    Returns:
+        float: Length in seconds
+    """
+    with wave.open(path, "rb") as recording:
+        return recording.getnframes() / recording.getframerate()
@@ -0,0 +1,279 @@
+"""
+Streaming meeting recording pipeline for Agilow Scrum Master.
+"""
+
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from recording.audio import iter_wave_chunks
+from templates.meeting_notes import MEETING_TITLES, NOTE_FORMATS
+from templates.meeting_parser import MEETING_SECTIONS, MeetingNotes, parse_meeting_notes
+from utils.tokens import count_tokens, truncate_to_tokens
+
+class TranscriptWindow:
+    """A stretch of transcript sent to the agent as one request"""
+    
+    def __init__(self, index, text, start, end):
+        self.index = index
+        self.text = text
+        self.start = start
+        self.end = end
+
+class TranscriptSegmenter:
+    """
+    Groups transcript segments into windows for the agent.
+    
+    A window closes when the next segment would push it past
+    `max_tokens`, or when the speaker pauses for at least
+    `pause_seconds` after the window has reached `min_tokens`.
+    """
+    
+    def __init__(self, max_tokens=800, min_tokens=200, pause_seconds=2.0):
+        """
+        Initialize the segmenter.
+        
+        Args:
+            max_tokens (int): Maximum tokens in a window
+            min_tokens (int): Tokens a window needs before a pause can close it
+            pause_seconds (float): Silence that counts as a natural break
+        """
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens
+        self.pause_seconds = pause_seconds
+        self._segments = []
+        self._tokens = 0
+        self._count = 0
+    
+    def add(self, segment):
+        """
+        Adds a transcript segment.
+        
+        Args:
+            segment (TranscriptSegment): The next segment
+        
+        Returns:
+            TranscriptWindow: A finished window, or None if the current one is still open
+        """
+        tokens = count_tokens(segment.text)
+        window = None
+        
+        if self._segments:
+            pause = segment.start - self._segments[-1].end
+            if self._tokens + tokens > self.max_tokens or (pause >= self.pause_seconds and self._tokens >= self.min_tokens):
+                window = self.flush()
+        
+        self._segments.append(segment)
+        self._tokens += tokens
+        return window
+    
+    def flush(self):
+        """Close the current window, returning it (or None if it is empty)"""
+        if not self._segments:
+            return None
+        
+        segments, self._segments, self._tokens = self._segments, [], 0
+        self._count += 1
+        return TranscriptWindow(
+            self._count,
+            " ".join(segment.text for segment in segments),
+            segments[0].start,
+            segments[-1].end
+        )
+
+class RecordingResult:
+    """Outcome of processing a recording"""
+    
+    def __init__(self, meeting_type, notes, summaries, transcript_path, audio_seconds, processing_seconds):
+        self.meeting_type = meeting_type
+        self.notes = notes
+        self.summaries = summaries
+        self.transcript_path = transcript_path
+        self.audio_seconds = audio_seconds
+        self.processing_seconds = processing_seconds
+    
+    @property
+    def real_time_factor(self):
+        """Processing time divided by recording length; below 1.0 is faster than real time"""
+        if not self.audio_seconds:
+            return 0.0
+        return self.processing_seconds / self.audio_seconds
+    
+    def to_markdown(self, timestamp=None):
+        """
+        Renders the meeting notes as Markdown.
+        
+        Meeting types the parser understands are rendered from the merged
+        notes; other meetings list the agent's summary of each window.
+        
+        Args:
+            timestamp (str): Timestamp shown in the title, defaults to now
+        
+        Returns:
+            str: The formatted notes
+        """
+        timestamp = timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if self.meeting_type in MEETING_SECTIONS:
+            return self.notes.to_markdown(self.meeting_type, timestamp)
+        
+        title = MEETING_TITLES.get(self.meeting_type, "Meeting Notes")
+        return f"# {title} ({timestamp})\n\n" + "\n\n".join(self.summaries)
+
+class RecordingPipeline:
+    """
+    Transcribes a recording and turns it into meeting notes as it plays.
+    
+    Audio is read and transcribed a chunk at a time, and each transcript
+    window is handed to a background worker that asks the Scrum Master
+    agent for notes while transcription carries on. The hand-off queue is
+    bounded, so a slow agent applies backpressure instead of letting
+    windows pile up, and the transcript itself is streamed to disk. Memory
+    use therefore does not grow with the length of the recording.
+    """
+    
+    def __init__(self, transcriber, analyze=None, meeting_type="general", chunk_seconds=30.0,
+                 window_tokens=800, max_pending_windows=2, transcript_dir="data/recordings", on_window=None):
+        """
+        Initialize the pipeline.
+        
+        Args:
+            transcriber (Transcriber): Speech-to-text backend
+            analyze (callable): `analyze(prompt, context)` returning the agent's
+                notes for a window; defaults to the Scrum Master agent
+            meeting_type (str): "sprint_planning", "standup", "retrospective" or "general"
+            chunk_seconds (float): Audio read and transcribed per step
+            window_tokens (int): Maximum transcript tokens sent to the agent at once
+            max_pending_windows (int): Windows allowed to wait for the agent
+            transcript_dir (str): Directory the transcript is written to
+            on_window (callable): Called as `on_window(window, response)` as
+                each window's notes arrive
+        """
+        self.transcriber = transcriber
+        self.analyze = analyze or _ask_scrum_master
+        self.meeting_type = meeting_type
+        self.chunk_seconds = chunk_seconds
+        self.window_tokens = window_tokens
+        self.max_pending_windows = max_pending_windows
+        self.transcript_dir = transcript_dir
+        self.on_window = on_window
+    
+    def run(self, source, name=None):
+        """
+        Processes a recording.
+        
+        Args:
+            source (str): Path of a WAV file, or a binary file object
+            name (str): Name for the transcript file, defaults to a timestamp
+        
+        Returns:
+            RecordingResult: The notes, transcript location and timings
+        """
+        start_time = time.perf_counter()
+        name = name or datetime.now().strftime("meeting_%Y%m%d_%H%M%S")
+        os.makedirs(self.transcript_dir, exist_ok=True)
+        transcript_path = os.path.join(self.transcript_dir, f"{name}.txt")
+        
+        notes = MeetingNotes()
+        summaries = []
+        windows = queue.Queue(maxsize=self.max_pending_windows)
+        worker = threading.Thread(target=self._analyze_windows, args=(windows, notes, summaries), daemon=True)
+        worker.start()
+        
+        segmenter = TranscriptSegmenter(max_tokens=self.window_tokens, min_tokens=self.window_tokens // 4)
+        audio_seconds = 0.0
+        
+        try:
+            with open(transcript_path, "w", encoding="utf-8") as transcript:
+                for chunk in iter_wave_chunks(source, self.chunk_seconds):
+                    for segment in self.transcriber.transcribe(chunk):
+                        transcript.write(f"[{_format_offset(segment.start)}] {segment.text}\n")
+                        
+                        window = segmenter.add(segment)
+                        if window is not None:
+                            _put_window(windows, window, worker)
+                    
+                    transcript.flush()
+                    audio_seconds = chunk.end
+                
+                window = segmenter.flush()
+                if window is not None:
+                    _put_window(windows, window, worker)
+        finally:
+            # Let the worker finish the windows already queued
+            _put_window(windows, None, worker)
+            worker.join()
+        
+        return RecordingResult(
+            self.meeting_type, notes, summaries, transcript_path,
+            audio_seconds, time.perf_counter() - start_time
+        )
+    
+    def _analyze_windows(self, windows, notes, summaries):
+        """Worker loop: get notes for each window until the end marker arrives"""
+        previous = ""
+        
+        while True:
+            window = windows.get()
+            if window is None:
+                return
+            
+            # Any failure is reported and skipped; the worker must keep draining the queue
+            # or the producer blocks on a full queue
+            try:
+                response = self.analyze(self._build_prompt(window), previous)
+                notes.merge(parse_meeting_notes(response))
+                summaries.append(response)
+                
+                # Earlier notes give the next window context without resending the transcript
+                previous = truncate_to_tokens(response, 300)
+                
+                if self.on_window is not None:
+                    self.on_window(window, response)
+            except Exception as e:
+                print(f"\n❌ Error analyzing transcript window {window.index}: {str(e)}")
+    
+    def _build_prompt(self, window):
+        """Build the agent request for a transcript window"""
+        title = MEETING_TITLES.get(self.meeting_type, "meeting")
+        instructions = NOTE_FORMATS.get(
+            self.meeting_type,
+            "Summarize the decisions, action items and open questions as '- ' bullet items."
+        )
+        
+        return (
+            f"Here is part {window.index} of a {title} transcript "
+            f"({_format_offset(window.start)}-{_format_offset(window.end)}). "
+            f"Extract only what this part adds to the meeting notes. {instructions}\n\n"
+            f"Transcript:\n{window.text}"
+        )
+
+def _put_window(windows, window, worker):
+    """Queue a window for the worker, giving up if the worker has stopped"""
+    while worker.is_alive():
+        try:
+            windows.put(window, timeout=1.0)
+            return
+        except queue.Full:
+            continue
+    
+    if window is not None:
+        raise RuntimeError("the transcript analysis worker stopped unexpectedly")
+
+def _ask_scrum_master(prompt, context):
+    """Get meeting notes for a transcript window from the Scrum Master agent"""
+    from agents.scrum_master import ERROR_RESPONSE, get_scrum_master_response
+    
+    response = get_scrum_master_response(prompt, context, show_progress=False, use_cache=False)
+    if response == ERROR_RESPONSE:
+        raise RuntimeError("the Scrum Master agent could not process this part")
+    return response
+
+def _format_offset(seconds):
+    """Format a recording offset as h:mm:ss or m:ss"""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
@@ -0,0 +1,128 @@
+"""
+Pluggable speech-to-text backends for meeting recordings.
+"""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+WHISPER_SAMPLE_RATE = 16000
+
+class TranscriptSegment:
+    """A piece of transcribed speech with its position in the recording"""
+    
+    def __init__(self, text, start, end):
+        self.text = text
+        self.start = start
+        self.end = end
+
+class Transcriber:
+    """
+    Base class for transcription backends.
+    
+    Backends receive the recording one `AudioChunk` at a time, in order,
+    and return the speech found in that chunk, with offsets relative to
+    the start of the recording.
+    """
+    
+    def transcribe(self, chunk):
+        """
+        Transcribes one chunk of audio.
+        
+        Args:
+            chunk (AudioChunk): The audio to transcribe
+        
+        Returns:
+            list: TranscriptSegment objects, in order
+        """
+        raise NotImplementedError
+    
+    def close(self):
+        """Release any resources held by the backend"""
+
+class FasterWhisperTranscriber(Transcriber):
+    """
+    Local transcription with faster-whisper.
+    
+    Requires the optional `faster-whisper` package; the model is loaded on
+    the first chunk so creating the transcriber stays cheap.
+    """
+    
+    def __init__(self, model_size="base", device="cpu", compute_type="int8", language=None):
+        """
+        Initialize the transcriber.
+        
+        Args:
+            model_size (str): Whisper model name or local model path
+            device (str): "cpu" or "cuda"
+            compute_type (str): Model precision, e.g. "int8" or "float16"
+            language (str): Spoken language code, or None to detect it
+        """
+        self.model_size = model_size
+        self.device = device
+        self.compute_type = compute_type
+        self.language = language
+        self._model = None
+    
+    def transcribe(self, chunk):
+        if self._model is None:
+            try:
+                from faster_whisper import WhisperModel
+            except ImportError:
+                raise ImportError("faster-whisper is not installed. Run: pip install faster-whisper")
+            self._model = WhisperModel(self.model_size, device=self.device, compute_type=self.compute_type)
+        
+        segments, _ = self._model.transcribe(_to_whisper_audio(chunk), language=self.language, vad_filter=True)
+        return [
+            TranscriptSegment(segment.text.strip(), chunk.start + segment.start, chunk.start + segment.end)
+            for segment in segments if segment.text.strip()
+        ]
+
+def _to_whisper_audio(chunk):
+    """Convert a chunk to the mono 16 kHz float32 samples Whisper expects"""
+    if numpy is None:
+        raise ImportError("numpy is required for local transcription")
+    
+    dtypes = {1: numpy.uint8, 2: numpy.int16, 4: numpy.int32}
+    if chunk.sample_width not in dtypes:
+        raise ValueError(f"Unsupported sample width: {chunk.sample_width} bytes")
+    
+    samples = numpy.frombuffer(chunk.frames, dtype=dtypes[chunk.sample_width]).astype(numpy.float32)
+    if chunk.sample_width == 1:
+        samples = (samples - 128.0) / 128.0
+    else:
+        samples /= float(2 ** (8 * chunk.sample_width - 1))
+    
+    if chunk.channels > 1:
+        samples = samples.reshape(-1, chunk.channels).mean(axis=1)
+    
+    if chunk.sample_rate != WHISPER_SAMPLE_RATE:
+        count = int(len(samples) * WHISPER_SAMPLE_RATE / chunk.sample_rate)
+        positions = numpy.linspace(0, len(samples) - 1, count)
+        samples = numpy.interp(positions, numpy.arange(len(samples)), samples).astype(numpy.float32)
+    
+    return samples
+
+# Backends selectable through TRANSCRIBER_BACKEND
+TRANSCRIBERS = {
+    "faster-whisper": FasterWhisperTranscriber,
+}
+
+def create_transcriber(config):
+    """
+    Creates the configured transcription backend.
+    
+    Args:
+        config (ConfigManager): The application configuration
+    
+    Returns:
+        Transcriber: The backend
+    """
+    backend = config.get_transcriber_backend()
+    if backend not in TRANSCRIBERS:
+        raise ValueError(f"Unknown transcriber backend '{backend}'. Choose one of: {', '.join(TRANSCRIBERS)}")
+    
+    if backend == "faster-whisper":
+        return FasterWhisperTranscriber(model_size=config.get_whisper_model())
+    return TRANSCRIBERS[backend]()
@@ -0,0 +1,64 @@
+"""
+Meeting notes templates for Agilow Scrum Master.
+"""
+
+from datetime import datetime
+
+MEETING_TITLES = {
+    "sprint_planning": "Sprint Planning",
+    "standup": "Daily Standup",
+    "retrospective": "Sprint Retrospective",
+}
+
+# Headings the agent is asked to use so the meeting parser can read its notes
+NOTE_FORMATS = {
+    "sprint_planning": "Use a 'Sprint Epics:' heading with numbered epics, a 'User Story:' heading before "
+                       "each user story, and a 'Final Sprint Prioritization:' heading with numbered priorities.",
+    "standup": "Use the headings 'Done:', 'In Progress:', 'To Do:' and 'Blockers:', each followed by "
+               "'- ' bullet items.",
+    "retrospective": "Use the headings 'What Went Well:', 'What Didn't Go Well:' and 'What Changes:', each "
+                     "followed by '- ' bullet items.",
+}
+
+def select_final_output(conversation):
+    """
+    Picks the assistant message that holds the conversation's result.
+    
+    Args:
+        conversation (list): Messages with "role" and "content" keys
+    
+    Returns:
+        str: The message, or None if the assistant has not replied yet
+    """
+    # Find the assistant messages
+    assistant_messages = [message["content"] for message in conversation if message["role"] == "assistant"]
+    
+    # Get the last two messages (or just the last one if there's only one)
+    if len(assistant_messages) >= 2:
+        # Use the second-to-last message as it likely contains the actual content
+        return assistant_messages[-2]
+    if assistant_messages:
+        return assistant_messages[0]
+    return None
+
+def build_notion_content(conversation, meeting_type):
+    """
+    Builds the Notion content for a conversation.
+    
+    Args:
+        conversation (list): Messages with "role" and "content" keys
+        meeting_type (str): The detected meeting type, or "general"
+    
+    Returns:
+        str: Markdown content with a meeting header, or None if there is nothing to save
+    """
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    
+    final_output = select_final_output(conversation)
+    if final_output is None:
+        print("❌ No assistant output found to save")
+        return None
+    
+    # Just add a simple header based on meeting type
+    title = MEETING_TITLES.get(meeting_type, "Meeting Notes")
+    return f"# {title} ({timestamp})\n\n{final_output}"
@@ -0,0 +1,219 @@
+"""
+Meeting notes parser for Agilow Scrum Master.
+"""
+
+import re
+
+from api.notion_blocks import markdown_to_blocks
+from templates.meeting_notes import MEETING_TITLES
+
+# Section headings, checked with a single pattern; the group name is the section.
+# The lookahead and backreference consume the leading symbols atomically, so
+# a failed match is never retried from every position inside the prefix.
+HEADING_PATTERN = re.compile(
+    r"^(?=(?P<prefix>[\W\d_]*))(?P=prefix)(?:"
+    r"(?P<priorities>Final Sprint Prioriti[sz]ation|Sprint Priorities)"
+    r"|(?P<epics>(?:Sprint )?Epics?)"
+    r"|(?P<stories>User Story)"
+    r"|(?P<done>Done|Completed)"
+    r"|(?P<in_progress>In Progress)"
+    r"|(?P<todo>To Do|Planned)"
+    r"|(?P<blockers>Blockers|Issues)"
+    r"|(?P<went_well>What Went Well)"
+    r"|(?P<not_well>What (?:Didn't|Did Not) Go Well)"
+    r"|(?P<changes>What Changes|Action Items)"
+    r")(?P<rest>.*)$"
+)
+ITEM_PATTERN = re.compile(r"^(?:\d️?⃣|\d+[.)]|[-*•●✓✔✅⚠📌])️?\s+(.*)$")
+LABEL_END_PATTERN = re.compile(r"^[^\w]*$|:\W*$")
+STORY_LABEL_PATTERN = re.compile(r"^[\s#\d]*[:.)\-–]?\s*")
+
+MEETING_SECTIONS = {
+    "sprint_planning": ("epics", "stories", "priorities"),
+    "standup": ("done", "in_progress", "todo", "blockers"),
+    "retrospective": ("went_well", "not_well", "changes"),
+}
+
+# Headings and the fallback line for sections rendered even when empty
+SECTION_HEADINGS = {
+    "epics": ("📌 Sprint Epics", None),
+    "priorities": ("🚀 Sprint Priorities", None),
+    "done": ("✅ Done", "No completed items reported"),
+    "in_progress": ("🔄 In Progress", "No in-progress items reported"),
+    "todo": ("🔜 To Do", "No upcoming items reported"),
+    "blockers": ("❌ Blockers", None),
+    "went_well": ("✅ What Went Well", "No positive items reported"),
+    "not_well": ("⚠️ What Didn't Go Well", "No improvement areas reported"),
+    "changes": ("🔄 What Changes We're Making", "No action items reported"),
+}
+
+NUMBERED_SECTIONS = {"epics", "priorities"}
+
+class MeetingNotes:
+    """
+    Structured content extracted from an assistant response.
+    
+    `sections` maps a section name (e.g. "done", "epics") to its list
+    items, and `stories` holds the text of each user story.
+    """
+    
+    def __init__(self):
+        self.sections = {}
+        self.stories = []
+    
+    def items(self, section):
+        """Get the items of a section, or an empty list if it was not found"""
+        return self.sections.get(section, [])
+    
+    def merge(self, other):
+        """
+        Adds another set of notes to these, e.g. notes from the next part of a meeting.
+        
+        Items and stories already present are not repeated.
+        
+        Args:
+            other (MeetingNotes): The notes to add
+        """
+        for section, items in other.sections.items():
+            existing = self.sections.setdefault(section, [])
+            seen = {item.lower() for item in existing}
+            for item in items:
+                if item.lower() not in seen:
+                    existing.append(item)
+                    seen.add(item.lower())
+        
+        self.stories.extend(story for story in other.stories if story not in self.stories)
+    
+    def to_markdown(self, meeting_type, timestamp):
+        """
+        Renders the notes as Markdown for a meeting type.
+        
+        Args:
+            meeting_type (str): "sprint_planning", "standup" or "retrospective"
+            timestamp (str): Timestamp shown in the title
+        
+        Returns:
+            str: The formatted notes
+        """
+        parts = [f"# {MEETING_TITLES.get(meeting_type, 'Meeting Notes')} ({timestamp})\n"]
+        
+        for section in MEETING_SECTIONS.get(meeting_type, ()):
+            if section == "stories":
+                if self.stories:
+                    parts.append("\n## 📝 User Stories\n")
+                    parts.extend(f"\n### Story {i}\n{story}\n" for i, story in enumerate(self.stories, 1))
+                continue
+            
+            heading, fallback = SECTION_HEADINGS[section]
+            items = self.items(section)
+            
+            # Sections without a fallback are only shown when the response had them
+            if fallback is None and section not in self.sections:
+                continue
+            
+            parts.append(f"\n## {heading}\n\n")
+            if section in NUMBERED_SECTIONS:
+                parts.extend(f"{i}. {item}\n" for i, item in enumerate(items, 1))
+            else:
+                parts.extend(f"- {item}\n" for item in items)
+            
+            if not items and fallback is not None:
+                parts.append(f"- {fallback}\n")
+        
+        return "".join(parts)
+    
+    def to_blocks(self, meeting_type, timestamp):
+        """
+        Renders the notes as Notion blocks for a meeting type.
+        
+        Args:
+            meeting_type (str): "sprint_planning", "standup" or "retrospective"
+            timestamp (str): Timestamp shown in the title
+        
+        Returns:
+            list: Notion block objects
+        """
+        return markdown_to_blocks(self.to_markdown(meeting_type, timestamp))
+
+def parse_meeting_notes(content):
+    """
+    Parses an assistant response into meeting notes in a single pass.
+    
+    Each line is classified once as a section heading, a list item or
+    text. Items belong to the most recent heading; a blank line after
+    a section's first item ends the section. Lines following a
+    "User Story" heading, up to the next blank line, form that story.
+    
+    Args:
+        content (str): The assistant response
+    
+    Returns:
+        MeetingNotes: The extracted notes
+    """
+    notes = MeetingNotes()
+    section = None
+    story = None
+    
+    def finish_story():
+        if story:
+            notes.stories.append("\n".join(story))
+    
+    for line in content.splitlines():
+        line = line.strip()
+        
+        if not line:
+            if story:
+                finish_story()
+                story = None
+            if section and notes.sections.get(section):
+                section = None
+            continue
+        
+        item = ITEM_PATTERN.match(line)
+        heading = HEADING_PATTERN.match(line)
+        
+        # A marked line is only a heading when it is just a label, e.g. "✅ Done:"
+        if heading and (item is None or LABEL_END_PATTERN.search(heading.group("rest"))):
+            finish_story()
+            story = None
+            section = _heading_section(heading)
+            
+            if section == "stories":
+                # "User Story 2: As a user..." starts the story on the heading line
+                text = heading.group("rest")[STORY_LABEL_PATTERN.match(heading.group("rest")).end():].strip()
+                story = [text] if text else []
+                section = None
+            else:
+                notes.sections.setdefault(section, [])
+            continue
+        
+        if story is not None:
+            story.append(line)
+        elif item and section:
+            text = item.group(1).strip()
+            if text:
+                notes.sections[section].append(text)
+    
+    finish_story()
+    return notes
+
+def _heading_section(match):
+    """Get the section name of a heading match"""
+    for name, value in match.groupdict().items():
+        if name not in ("prefix", "rest") and value is not None:
+            return name
+    return None
+
+def format_meeting_notes(content, meeting_type, timestamp):
+    """
+    Formats an assistant response as meeting notes.
+    
+    Args:
+        content (str): The assistant response
+        meeting_type (str): "sprint_planning", "standup" or "retrospective"
+        timestamp (str): Timestamp shown in the title
+    
+    Returns:
+        str: Markdown meeting notes
+    """
+    return parse_meeting_notes(content).to_markdown(meeting_type, timestamp)
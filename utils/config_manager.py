@@ -17,6 +17,61 @@ class ConfigManager:
         self.notion_page_id = os.getenv("NOTION_PAGE_ID")
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         
+        # Optional settings
+        self.memory_backend = os.getenv("MEMORY_BACKEND", "jsonl")
+        self.memory_db_path = os.getenv("MEMORY_DB_PATH", "data/memory.db")
+        self.memory_tail_size = os.getenv("MEMORY_TAIL_SIZE")
+        self.memory_digests = os.getenv("MEMORY_DIGESTS", "off")
+        self.memory_digest_keep_recent = os.getenv("MEMORY_DIGEST_KEEP_RECENT", "200")
+        self.memory_digest_interval = os.getenv("MEMORY_DIGEST_INTERVAL", "600")
+        self.sprint_weeks = os.getenv("SPRINT_WEEKS", "2")
+        self.context_token_budget = os.getenv("CONTEXT_TOKEN_BUDGET", "2000")
+        self.retrieval_top_k = os.getenv("RETRIEVAL_TOP_K", "3")
+        self.openai_max_connections = os.getenv("OPENAI_MAX_CONNECTIONS", "10")
+        self.openai_max_keepalive_connections = os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "5")
+        self.openai_keepalive_expiry = os.getenv("OPENAI_KEEPALIVE_EXPIRY", "60")
+        self.openai_timeout = os.getenv("OPENAI_TIMEOUT", "60")
+        self.stream_responses = os.getenv("STREAM_RESPONSES", "true")
+        self.openai_model_chain = os.getenv("OPENAI_MODEL_CHAIN", "gpt-4")
+        self.openai_max_retries = os.getenv("OPENAI_MAX_RETRIES", "4")
+        self.openai_backoff_base = os.getenv("OPENAI_BACKOFF_BASE", "1")
+        self.openai_backoff_max = os.getenv("OPENAI_BACKOFF_MAX", "30")
+        self.openai_requests_per_minute = os.getenv("OPENAI_REQUESTS_PER_MINUTE", "0")
+        self.openai_tokens_per_minute = os.getenv("OPENAI_TOKENS_PER_MINUTE", "0")
+        self.circuit_breaker_threshold = os.getenv("CIRCUIT_BREAKER_THRESHOLD", "5")
+        self.circuit_breaker_reset = os.getenv("CIRCUIT_BREAKER_RESET", "30")
+        self.response_cache_enabled = os.getenv("RESPONSE_CACHE_ENABLED", "true")
+        self.response_cache_max_entries = os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256")
+        self.response_cache_ttl = os.getenv("RESPONSE_CACHE_TTL", str(7 * 24 * 3600))
+        self.response_cache_path = os.getenv("RESPONSE_CACHE_PATH", "data/response_cache.db")
+        self.notion_base_url = os.getenv("NOTION_BASE_URL", "https://api.notion.com/v1")
+        self.notion_timeout = os.getenv("NOTION_TIMEOUT", "30")
+        self.notion_max_retries = os.getenv("NOTION_MAX_RETRIES", "5")
+        self.notion_requests_per_second = os.getenv("NOTION_REQUESTS_PER_SECOND", "3")
+        self.notion_queue_dir = os.getenv("NOTION_QUEUE_DIR", "data/notion_queue")
+        self.notion_queue_max_attempts = os.getenv("NOTION_QUEUE_MAX_ATTEMPTS", "8")
+        self.notion_save_mode = os.getenv("NOTION_SAVE_MODE", "append")
+        self.notion_sync_index_dir = os.getenv("NOTION_SYNC_INDEX_DIR", "data/notion_sync_index")
+        self.notion_backlog_database_id = os.getenv("NOTION_BACKLOG_DATABASE_ID", "")
+        self.notion_backlog_concurrency = os.getenv("NOTION_BACKLOG_CONCURRENCY", "3")
+        self.notion_backlog_dir = os.getenv("NOTION_BACKLOG_DIR", "data/notion_backlog")
+        self.team_name = os.getenv("TEAM_NAME", "")
+        self.intent_keywords_path = os.getenv("INTENT_KEYWORDS_PATH", "data/intent_keywords.json")
+        self.transcriber_backend = os.getenv("TRANSCRIBER_BACKEND", "faster-whisper")
+        self.whisper_model = os.getenv("WHISPER_MODEL", "base")
+        self.recording_chunk_seconds = os.getenv("RECORDING_CHUNK_SECONDS", "30")
+        self.recording_window_tokens = os.getenv("RECORDING_WINDOW_TOKENS", "800")
+        self.recording_dir = os.getenv("RECORDING_DIR", "data/recordings")
+        self.summarize_input_tokens = os.getenv("SUMMARIZE_INPUT_TOKENS", "6000")
+        self.summary_chunk_tokens = os.getenv("SUMMARY_CHUNK_TOKENS", "3000")
+        self.summary_max_workers = os.getenv("SUMMARY_MAX_WORKERS", "4")
+        self.server_host = os.getenv("SERVER_HOST", "127.0.0.1")
+        self.server_port = os.getenv("SERVER_PORT", "5000")
+        self.server_max_workers = os.getenv("SERVER_MAX_WORKERS", "8")
+        self.server_queue_timeout = os.getenv("SERVER_QUEUE_TIMEOUT", "2")
+        self.server_max_sessions = os.getenv("SERVER_MAX_SESSIONS", "1000")
+        self.metrics_path = os.getenv("METRICS_PATH", "")
+        
         # Validate required environment variables
         self._validate_config()
         
@@ -48,3 +103,215 @@ class ConfigManager:
     def get_notion_page_id(self):
         """Get the Notion page ID"""
         return self.notion_page_id
+    
+    def get_memory_backend(self):
+        """Get the memory storage backend: "jsonl" (one journal per user) or "sqlite" (one shared database)"""
+        return self.memory_backend.lower()
+    
+    def get_memory_db_path(self):
+        """Get the path of the SQLite memory database"""
+        return self.memory_db_path
+    
+    def get_memory_tail_size(self):
+        """Get how many recent exchanges to load at startup (None loads everything)"""
+        return int(self.memory_tail_size) if self.memory_tail_size else None
+    
+    def get_memory_digests(self):
+        """Get how old memory is summarized into digests: "off", "local" (no model calls) or "agent" (the model)"""
+        return self.memory_digests.lower()
+    
+    def get_memory_digest_keep_recent(self):
+        """Get how many of the newest exchanges are always kept raw"""
+        return int(self.memory_digest_keep_recent)
+    
+    def get_memory_digest_interval(self):
+        """Get the seconds between background memory compactions"""
+        return float(self.memory_digest_interval)
+    
+    def get_sprint_weeks(self):
+        """Get the length of a sprint in weeks"""
+        return int(self.sprint_weeks)
+    
+    def get_context_token_budget(self):
+        """Get the token budget for conversation context sent to the agent"""
+        return int(self.context_token_budget)
+    
+    def get_retrieval_top_k(self):
+        """Get how many relevant past exchanges to retrieve into context (0 disables retrieval)"""
+        return int(self.retrieval_top_k)
+    
+    def get_openai_max_connections(self):
+        """Get the maximum number of pooled OpenAI connections"""
+        return int(self.openai_max_connections)
+    
+    def get_openai_max_keepalive_connections(self):
+        """Get the number of idle OpenAI connections kept alive"""
+        return int(self.openai_max_keepalive_connections)
+    
+    def get_openai_keepalive_expiry(self):
+        """Get how long idle OpenAI connections stay open, in seconds"""
+        return float(self.openai_keepalive_expiry)
+    
+    def get_openai_timeout(self):
+        """Get the OpenAI request timeout, in seconds"""
+        return float(self.openai_timeout)
+    
+    def get_openai_model_chain(self):
+        """Get the models to try in order, from a comma-separated list"""
+        return tuple(model.strip() for model in self.openai_model_chain.split(",") if model.strip())
+    
+    def get_openai_max_retries(self):
+        """Get how many times a failing OpenAI call is retried per model"""
+        return int(self.openai_max_retries)
+    
+    def get_openai_backoff_base(self):
+        """Get the backoff delay before the first OpenAI retry, in seconds"""
+        return float(self.openai_backoff_base)
+    
+    def get_openai_backoff_max(self):
+        """Get the maximum backoff delay between OpenAI retries, in seconds"""
+        return float(self.openai_backoff_max)
+    
+    def get_openai_requests_per_minute(self):
+        """Get the client-side OpenAI request limit (0 disables it)"""
+        return int(self.openai_requests_per_minute)
+    
+    def get_openai_tokens_per_minute(self):
+        """Get the client-side OpenAI token limit (0 disables it)"""
+        return int(self.openai_tokens_per_minute)
+    
+    def get_circuit_breaker_threshold(self):
+        """Get how many consecutive failures open a model's circuit breaker"""
+        return int(self.circuit_breaker_threshold)
+    
+    def get_circuit_breaker_reset(self):
+        """Get how long an open circuit breaker waits before a trial call, in seconds"""
+        return float(self.circuit_breaker_reset)
+    
+    def get_stream_responses(self):
+        """Get whether agent responses are streamed to the terminal as they arrive"""
+        return self.stream_responses.lower() in ("1", "true", "yes")
+    
+    def get_response_cache_enabled(self):
+        """Get whether agent responses are cached"""
+        return self.response_cache_enabled.lower() in ("1", "true", "yes")
+    
+    def get_response_cache_max_entries(self):
+        """Get the maximum number of responses kept in the in-memory cache"""
+        return int(self.response_cache_max_entries)
+    
+    def get_response_cache_ttl(self):
+        """Get how long cached responses stay valid, in seconds"""
+        return float(self.response_cache_ttl)
+    
+    def get_response_cache_path(self):
+        """Get the path of the on-disk response cache (None keeps the cache in memory only)"""
+        return self.response_cache_path or None
+    
+    def get_notion_base_url(self):
+        """Get the Notion API base URL"""
+        return self.notion_base_url
+    
+    def get_notion_timeout(self):
+        """Get the Notion request timeout, in seconds"""
+        return float(self.notion_timeout)
+    
+    def get_notion_max_retries(self):
+        """Get how many times a rate-limited or failed Notion request is retried"""
+        return int(self.notion_max_retries)
+    
+    def get_notion_requests_per_second(self):
+        """Get the client-side Notion request rate (0 disables the limiter)"""
+        return float(self.notion_requests_per_second)
+    
+    def get_notion_queue_dir(self):
+        """Get the directory holding pending Notion saves"""
+        return self.notion_queue_dir
+    
+    def get_notion_queue_max_attempts(self):
+        """Get how many failed attempts a queued Notion save gets before it is set aside"""
+        return int(self.notion_queue_max_attempts)
+    
+    def get_notion_save_mode(self):
+        """Get how saves reach Notion: "append" adds a copy each time, "sync" updates the saved copy in place"""
+        return self.notion_save_mode.lower()
+    
+    def get_notion_sync_index_dir(self):
+        """Get the directory of the per-document indexes of blocks written by Notion sync"""
+        return self.notion_sync_index_dir
+    
+    def get_notion_backlog_database_id(self):
+        """Get the ID of the Notion database that holds the backlog (empty disables backlog sync)"""
+        return self.notion_backlog_database_id
+    
+    def get_notion_backlog_concurrency(self):
+        """Get how many backlog rows are written to Notion at once"""
+        return int(self.notion_backlog_concurrency)
+    
+    def get_notion_backlog_dir(self):
+        """Get the directory of the backlog ID map and database mirror"""
+        return self.notion_backlog_dir
+    
+    def get_team_name(self):
+        """Get the team this instance serves (empty for no team-specific settings)"""
+        return self.team_name or None
+    
+    def get_intent_keywords_path(self):
+        """Get the path of the JSON file with per-team intent keywords"""
+        return self.intent_keywords_path or None
+    
+    def get_transcriber_backend(self):
+        """Get the speech-to-text backend used for meeting recordings"""
+        return self.transcriber_backend
+    
+    def get_whisper_model(self):
+        """Get the Whisper model name or path for local transcription"""
+        return self.whisper_model
+    
+    def get_recording_chunk_seconds(self):
+        """Get how many seconds of audio are transcribed per step"""
+        return float(self.recording_chunk_seconds)
+    
+    def get_recording_window_tokens(self):
+        """Get the maximum transcript tokens sent to the agent in one request"""
+        return int(self.recording_window_tokens)
+    
+    def get_recording_dir(self):
+        """Get the directory meeting transcripts are written to"""
+        return self.recording_dir
+    
+    def get_summarize_input_tokens(self):
+        """Get the input size, in tokens, above which messages are summarized in parts"""
+        return int(self.summarize_input_tokens)
+    
+    def get_summary_chunk_tokens(self):
+        """Get the maximum tokens in each part of a summarized input"""
+        return int(self.summary_chunk_tokens)
+    
+    def get_summary_max_workers(self):
+        """Get how many parts of a long input are summarized at once"""
+        return int(self.summary_max_workers)
+    
+    def get_server_host(self):
+        """Get the host the web server binds to"""
+        return self.server_host
+    
+    def get_server_port(self):
+        """Get the port the web server listens on"""
+        return int(self.server_port)
+    
+    def get_server_max_workers(self):
+        """Get the maximum number of agent turns the web server runs at once"""
+        return int(self.server_max_workers)
+    
+    def get_server_queue_timeout(self):
+        """Get how long a web request may wait for a worker before being rejected, in seconds"""
+        return float(self.server_queue_timeout)
+    
+    def get_server_max_sessions(self):
+        """Get the maximum number of chat sessions the web server keeps open"""
+        return int(self.server_max_sessions)
+    
+    def get_metrics_path(self):
+        """Get the JSON Lines file timing events are written to (empty keeps them in memory only)"""
+        return self.metrics_path
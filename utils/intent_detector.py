@@ -0,0 +1,170 @@
+"""
+Keyword-based intent detection for Agilow Scrum Master.
+"""
+
+import json
+import os
+import re
+
+MEETING_TYPES = ("sprint_planning", "standup", "retrospective")
+
+# Intents and the phrases that signal them; meeting types are listed in priority order
+DEFAULT_KEYWORDS = {
+    "sprint_planning": ["sprint planning", "plan sprint", "planning", "epics", "user stories"],
+    "standup": ["standup", "stand-up", "daily", "status update"],
+    "retrospective": ["retro", "retrospective", "went well", "didn't go well"],
+    # The user asks for a save
+    "save_request": ["save to notion", "save it in notion", "save in notion", "post to notion",
+                     "add to notion", "put in notion", "paste to notion", "save this"],
+    # The agent's response talks about saving
+    "save_mention": ["saving", "save these", "save this", "saving to notion", "save to notion",
+                     "saving into notion", "adding to notion", "append to notion"],
+}
+
+class IntentDetector:
+    """
+    Finds every intent keyword in a text with one compiled pattern per intent.
+    
+    Each intent's keywords are compiled into an alternation shaped like
+    a trie, so phrases sharing a prefix are tried together and one scan
+    of the lowercased text finds the longest keyword of that intent at
+    each position, instead of lowercasing and searching once per keyword.
+    Intents are scanned separately, so a phrase of one intent is still
+    found where it overlaps a longer phrase of another.
+    """
+    
+    def __init__(self, keywords=None):
+        """
+        Initialize the detector.
+        
+        Args:
+            keywords (dict): Intent name to list of phrases, defaults to DEFAULT_KEYWORDS
+        """
+        self.keywords = {intent: list(phrases) for intent, phrases in (keywords or DEFAULT_KEYWORDS).items()}
+        
+        self._patterns = {
+            intent: re.compile(_trie_pattern({phrase.lower() for phrase in phrases}))
+            for intent, phrases in self.keywords.items() if phrases
+        }
+    
+    def detect(self, text, intents=None):
+        """
+        Scores the intents found in a text.
+        
+        Args:
+            text (str): The text to scan
+            intents (tuple): Only score these intents (default: all)
+        
+        Returns:
+            dict: Intent name to number of keyword matches, for intents that matched
+        """
+        scores = {}
+        if not text:
+            return scores
+        
+        text = text.lower()
+        for intent, pattern in self._patterns.items():
+            if intents is not None and intent not in intents:
+                continue
+            
+            count = len(pattern.findall(text))
+            if count:
+                scores[intent] = count
+        return scores
+    
+    def best(self, scores, intents):
+        """
+        Picks the highest-scoring intent among candidates.
+        
+        Args:
+            scores (dict): Scores from `detect`
+            intents (tuple): Candidate intents in priority order, used to break ties
+        
+        Returns:
+            str: The best intent, or None if none of the candidates matched
+        """
+        best_intent = None
+        for intent in intents:
+            if scores.get(intent, 0) > scores.get(best_intent, 0):
+                best_intent = intent
+        return best_intent
+    
+    def has_intent(self, text, intent):
+        """Check whether a text contains any keyword of an intent, stopping at the first match"""
+        pattern = self._patterns.get(intent)
+        if not text or pattern is None:
+            return False
+        return pattern.search(text.lower()) is not None
+
+def _trie_pattern(phrases):
+    """
+    Builds a regular expression matching any of the phrases.
+    
+    The phrases are arranged in a trie and each node becomes a
+    non-capturing group of its children, so the pattern branches only
+    where phrases differ. Optional suffixes are greedy, making every
+    match the longest phrase starting at that position.
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = True
+    
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        if "" in node:
+            # A phrase ends here; longer phrases continue optionally
+            return f"(?:{body})?" if len(branches) == 1 else f"{body}?"
+        return body
+    
+    return build(trie)
+
+def load_intent_keywords(path=None, team=None):
+    """
+    Loads intent keywords, applying a team's overrides.
+    
+    The file is JSON mapping "default" and team names to
+    `{intent: [phrases]}`. A team's list for an intent replaces the
+    default list for that intent; intents it does not mention keep theirs.
+    
+    Args:
+        path (str): Path of the keyword file, or None to use the built-in keywords
+        team (str): Team whose overrides to apply
+    
+    Returns:
+        dict: Intent name to list of phrases
+    """
+    keywords = {intent: list(phrases) for intent, phrases in DEFAULT_KEYWORDS.items()}
+    if not path or not os.path.exists(path):
+        return keywords
+    
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not load intent keywords from {path}: {str(e)}")
+        return keywords
+    
+    keywords.update(data.get("default", {}))
+    if team:
+        keywords.update(data.get(team, {}))
+    return keywords
+
+def create_intent_detector(config, team=None):
+    """
+    Creates an intent detector from configuration.
+    
+    Args:
+        config (ConfigManager): The application configuration
+        team (str): Team whose keyword overrides to use
+    
+    Returns:
+        IntentDetector: The detector
+    """
+    return IntentDetector(load_intent_keywords(config.get_intent_keywords_path(), team or config.get_team_name()))
@@ -0,0 +1,310 @@
+"""
+Timing metrics and profiling for Agilow Scrum Master.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Durations kept per series for percentiles
+MAX_SAMPLES = 1000
+
+METRIC_PREFIX = "agilow_"
+
+class Metrics:
+    """
+    Records how long each stage of a turn takes.
+    
+    Stages are timed with `span`; anything else worth counting, such as
+    tokens sent to the model, goes through `count`. Each series (a name
+    plus its labels) keeps a count, a total and its latest durations for
+    percentiles. If `path` is set, every span and count is also written
+    there as a JSON line as it happens.
+    """
+    
+    def __init__(self, path=None):
+        """
+        Initialize the recorder.
+        
+        Args:
+            path (str): JSON Lines file for individual events, or None to
+                only keep aggregates in memory
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._spans = {}  # (name, labels) -> {"count", "total", "max", "samples"}
+        self._counters = {}  # (name, labels) -> value
+        self._file = None
+        
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(path, "a", encoding="utf-8")
+    
+    @contextmanager
+    def span(self, name, **labels):
+        """
+        Times a block of code.
+        
+        The block can add fields to the yielded dict, e.g. token counts;
+        they are written with the event but not aggregated.
+        
+        Args:
+            name (str): The stage, e.g. "llm" or "memory_persist"
+            **labels: Labels that split the series, e.g. method="POST"
+        
+        Yields:
+            dict: Extra fields for the event
+        """
+        fields = {}
+        start = time.perf_counter()
+        try:
+            yield fields
+        finally:
+            self.observe(name, time.perf_counter() - start, fields, **labels)
+    
+    def observe(self, name, seconds, fields=None, **labels):
+        """Record a duration measured elsewhere"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            series = self._spans.get(key)
+            if series is None:
+                series = self._spans[key] = {"count": 0, "total": 0.0, "max": 0.0,
+                                             "samples": deque(maxlen=MAX_SAMPLES)}
+            series["count"] += 1
+            series["total"] += seconds
+            series["max"] = max(series["max"], seconds)
+            series["samples"].append(seconds)
+        
+        self._write({"span": name, "seconds": round(seconds, 6), **labels, **(fields or {})})
+    
+    def count(self, name, value=1, **labels):
+        """Add to a counter, e.g. tokens sent to the model"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        
+        self._write({"counter": name, "value": value, **labels})
+    
+    def summary(self):
+        """
+        Get the aggregates of every series.
+        
+        Returns:
+            dict: "spans" maps (name, labels) to count, total, mean, p50,
+                p95 and max seconds; "counters" maps (name, labels) to values
+        """
+        with self._lock:
+            spans = {}
+            for key, series in self._spans.items():
+                samples = sorted(series["samples"])
+                spans[key] = {
+                    "count": series["count"],
+                    "total": series["total"],
+                    "mean": series["total"] / series["count"],
+                    "p50": _percentile(samples, 0.5),
+                    "p95": _percentile(samples, 0.95),
+                    "max": series["max"],
+                }
+            return {"spans": spans, "counters": dict(self._counters)}
+    
+    def to_prometheus(self):
+        """
+        Render the aggregates in the Prometheus text format.
+        
+        Spans become summaries named `agilow_<name>_seconds` and
+        counters `agilow_<name>_total`, labelled as they were recorded.
+        
+        Returns:
+            str: The metrics text
+        """
+        summary = self.summary()
+        lines = []
+        
+        names = sorted({name for name, _ in summary["spans"]})
+        for name in names:
+            metric = f"{METRIC_PREFIX}{name}_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for (series_name, labels), stats in sorted(summary["spans"].items()):
+                if series_name != name:
+                    continue
+                for quantile in ("0.5", "0.95"):
+                    value = stats["p50"] if quantile == "0.5" else stats["p95"]
+                    lines.append(f"{metric}{_labels(labels, quantile=quantile)} {value:.6f}")
+                lines.append(f"{metric}_sum{_labels(labels)} {stats['total']:.6f}")
+                lines.append(f"{metric}_count{_labels(labels)} {stats['count']}")
+        
+        names = sorted({name for name, _ in summary["counters"]})
+        for name in names:
+            metric = f"{METRIC_PREFIX}{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (series_name, labels), value in sorted(summary["counters"].items()):
+                if series_name == name:
+                    lines.append(f"{metric}{_labels(labels)} {value}")
+        
+        return "\n".join(lines) + "\n"
+    
+    def report(self):
+        """Render the aggregates as a table for the terminal"""
+        summary = self.summary()
+        if not summary["spans"] and not summary["counters"]:
+            return "No metrics recorded."
+        
+        lines = [f"{'stage':<34}{'count':>7}{'mean':>10}{'p50':>10}{'p95':>10}{'max':>10}{'total':>10}"]
+        for (name, labels), stats in sorted(summary["spans"].items()):
+            label = name + (f" {','.join(f'{k}={v}' for k, v in labels)}" if labels else "")
+            lines.append(
+                f"{label[:33]:<34}{stats['count']:>7}{stats['mean']:>9.3f}s{stats['p50']:>9.3f}s"
+                f"{stats['p95']:>9.3f}s{stats['max']:>9.3f}s{stats['total']:>9.2f}s"
+            )
+        
+        for (name, labels), value in sorted(summary["counters"].items()):
+            label = name + (f" {','.join(f'{k}={v}' for k, v in labels)}" if labels else "")
+            lines.append(f"{label[:33]:<34}{value:>7}")
+        
+        return "\n".join(lines)
+    
+    def close(self):
+        """Close the events file"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+    
+    def _write(self, event):
+        """Write an event to the events file, if there is one"""
+        if self._file is None:
+            return
+        
+        line = json.dumps({"time": round(time.time(), 3), **event}, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line)
+                self._file.flush()
+
+def _percentile(samples, fraction):
+    """Get a percentile of sorted samples"""
+    if not samples:
+        return 0.0
+    return samples[min(int(fraction * len(samples)), len(samples) - 1)]
+
+def _labels(labels, **extra):
+    """Render labels in the Prometheus format"""
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+def _escape(value):
+    """Escape a label value"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class Profiler:
+    """
+    Opt-in cProfile and tracemalloc profiling of a session.
+    
+    cProfile only sees the thread that started it (the interactive
+    menu and chat loop); work on background threads shows up in the
+    timing spans instead.
+    """
+    
+    def __init__(self, output_dir="data/profile", trace_memory=True):
+        """
+        Initialize the profiler.
+        
+        Args:
+            output_dir (str): Directory the session report is written to
+            trace_memory (bool): Also trace memory allocations (slower)
+        """
+        self.output_dir = output_dir
+        self.trace_memory = trace_memory
+        self._profile = None
+        self._started = None
+    
+    def start(self):
+        """Start profiling"""
+        import cProfile
+        import tracemalloc
+        
+        if self.trace_memory:
+            tracemalloc.start(10)
+        self._profile = cProfile.Profile()
+        self._started = time.perf_counter()
+        self._profile.enable()
+    
+    def stop(self, metrics=None):
+        """
+        Stop profiling and write the session report.
+        
+        The directory gets `report.txt` (timing spans, top functions by
+        cumulative time and top allocations), `profile.pstats` for tools
+        such as snakeviz, and `metrics.prom`.
+        
+        Args:
+            metrics (Metrics): Timing spans to include, defaults to the shared recorder
+        
+        Returns:
+            str: Path of the report
+        """
+        import io
+        import pstats
+        import tracemalloc
+        
+        self._profile.disable()
+        elapsed = time.perf_counter() - self._started
+        metrics = metrics or get_metrics()
+        os.makedirs(self.output_dir, exist_ok=True)
+        
+        self._profile.dump_stats(os.path.join(self.output_dir, "profile.pstats"))
+        functions = io.StringIO()
+        pstats.Stats(self._profile, stream=functions).sort_stats("cumulative").print_stats(30)
+        
+        sections = [
+            f"Session profile ({elapsed:.1f}s, {time.strftime('%Y-%m-%d %H:%M:%S')})",
+            "\n== Timing spans ==\n" + metrics.report(),
+            "\n== Functions by cumulative time (main thread) ==\n" + functions.getvalue().strip(),
+        ]
+        
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            top = "\n".join(str(stat) for stat in snapshot.statistics("lineno")[:20])
+            sections.append(f"\n== Memory (current {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB) ==\n{top}")
+        
+        path = os.path.join(self.output_dir, "report.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(sections) + "\n")
+        with open(os.path.join(self.output_dir, "metrics.prom"), "w", encoding="utf-8") as f:
+            f.write(metrics.to_prometheus())
+        
+        return path
+
+_metrics = Metrics()
+_metrics_lock = threading.Lock()
+
+def get_metrics():
+    """Get the shared metrics recorder"""
+    return _metrics
+
+def set_metrics(metrics):
+    """Replace the shared metrics recorder, closing the previous one"""
+    global _metrics
+    with _metrics_lock:
+        previous, _metrics = _metrics, metrics
+    
+    if previous is not metrics:
+        previous.close()
+
+def configure_metrics(config):
+    """
+    Creates the shared metrics recorder from configuration.
+    
+    Args:
+        config (ConfigManager): The application configuration
+    """
+    set_metrics(Metrics(config.get_metrics_path() or None))
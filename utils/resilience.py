@@ -0,0 +1,197 @@
+"""
+Retry, rate limiting and circuit breaking helpers for Agilow Scrum Master.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because its circuit breaker is open"""
+
+def backoff_delay(attempt, base_delay=1.0, max_delay=30.0):
+    """
+    Gets the delay before a retry using exponential backoff with full jitter.
+    
+    Args:
+        attempt (int): The retry number, starting at 0
+        base_delay (float): Delay in seconds for the first retry
+        max_delay (float): Upper bound on the delay in seconds
+    
+    Returns:
+        float: Seconds to wait
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+def parse_retry_after(value):
+    """
+    Parses a Retry-After header.
+    
+    Args:
+        value (str): Header value, either seconds or an HTTP date
+    
+    Returns:
+        float: Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+    
+    The bucket refills continuously at `rate` tokens per second up to
+    `capacity`. Callers take tokens before making a request and wait when
+    the bucket is empty.
+    """
+    
+    def __init__(self, rate, capacity=None):
+        """
+        Initialize the bucket.
+        
+        Args:
+            rate (float): Tokens added per second
+            capacity (float): Maximum burst size, defaults to one second of `rate`
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def per_minute(cls, amount):
+        """Create a bucket allowing `amount` tokens per minute, or None if `amount` is 0"""
+        if not amount:
+            return None
+        return cls(amount / 60.0, capacity=amount)
+    
+    def reserve(self, amount=1):
+        """
+        Take tokens from the bucket, going into debt if necessary.
+        
+        Args:
+            amount (float): Tokens to take; capped at the bucket capacity
+        
+        Returns:
+            float: Seconds the caller must wait before proceeding
+        """
+        amount = min(amount, self.capacity)
+        
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+    
+    def acquire(self, amount=1):
+        """Take tokens, sleeping until they are available"""
+        delay = self.reserve(amount)
+        if delay > 0:
+            time.sleep(delay)
+    
+    async def acquire_async(self, amount=1):
+        """Take tokens, awaiting until they are available"""
+        delay = self.reserve(amount)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+class CircuitBreaker:
+    """
+    Circuit breaker for a remote dependency.
+    
+    After `failure_threshold` consecutive failures the breaker opens and
+    refuses calls for `recovery_timeout` seconds. It then lets a single
+    trial call through; success closes it again, failure re-opens it.
+    Callers must end every allowed call with `record_success`,
+    `record_failure` or `release`, passing `release` the token `allow`
+    returned.
+    """
+    
+    def __init__(self, failure_threshold=5, recovery_timeout=30.0):
+        """
+        Initialize the breaker.
+        
+        Args:
+            failure_threshold (int): Consecutive failures that open the breaker
+            recovery_timeout (float): Seconds to stay open before a trial call
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial = None  # Token of the trial call in flight while half open
+        self._lock = threading.Lock()
+    
+    def allow(self):
+        """
+        Check whether a call may go ahead.
+        
+        Returns:
+            False if the call is refused, otherwise a truthy token for
+            `release`; only the trial call of an open breaker gets a token
+            that `release` acts on
+        """
+        with self._lock:
+            if self.state == "closed":
+                return True
+            
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                # Let one trial call through
+                self.state = "half_open"
+                self._trial = object()
+                return self._trial
+            
+            return False
+    
+    def record_success(self):
+        """Record a successful call"""
+        with self._lock:
+            self._failures = 0
+            self.state = "closed"
+            self._trial = None
+    
+    def record_failure(self):
+        """Record a failed call"""
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self._trial = None
+    
+    def release(self, token):
+        """
+        End a call that recorded neither success nor failure.
+        
+        A trial call that was cancelled or raised something unexpected
+        would otherwise leave the breaker half open, refusing every call;
+        it goes back to open with the next call allowed as a new trial.
+        Any other call, e.g. one that started while the breaker was closed,
+        leaves the breaker as it is.
+        
+        Args:
+            token: What `allow` returned for the call
+        """
+        with self._lock:
+            if self.state == "half_open" and token is self._trial:
+                self.state = "open"
+                self._opened_at = time.monotonic() - self.recovery_timeout
+                self._trial = None
@@ -0,0 +1,88 @@
+"""
+Token counting helpers for Agilow Scrum Master.
+"""
+
+import re
+import textwrap
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Rough characters-per-token ratio for English text with GPT tokenizers
+CHARS_PER_TOKEN = 4
+
+TRAILING_SPACE_PATTERN = re.compile(r"[ \t]+$", re.MULTILINE)
+BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+
+_encoding = None
+
+def _get_encoding():
+    """Get the shared tiktoken encoding, or None if tiktoken is unavailable"""
+    global _encoding
+    if _encoding is None and tiktoken is not None:
+        _encoding = tiktoken.get_encoding("cl100k_base")
+    return _encoding
+
+def count_tokens(text):
+    """
+    Counts the tokens in a piece of text.
+    
+    Uses tiktoken when it is installed and falls back to a
+    characters-per-token estimate otherwise.
+    
+    Args:
+        text (str): The text to measure
+    
+    Returns:
+        int: The number of tokens
+    """
+    if not text:
+        return 0
+    
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def truncate_to_tokens(text, max_tokens, marker=" …[truncated]"):
+    """
+    Truncates text so that it fits within a token limit.
+    
+    Args:
+        text (str): The text to truncate
+        max_tokens (int): The maximum number of tokens to keep
+        marker (str): Appended when the text is cut
+    
+    Returns:
+        str: The original text, or a truncated copy ending in `marker`
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+    
+    keep = max(max_tokens - count_tokens(marker), 0)
+    
+    encoding = _get_encoding()
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text)[:keep]) + marker
+    
+    return text[:keep * CHARS_PER_TOKEN] + marker
+
+def normalize_whitespace(text):
+    """
+    Removes whitespace that costs tokens without changing the meaning.
+    
+    Common indentation, trailing spaces and runs of blank lines are
+    dropped; indentation inside the text, such as nested list items,
+    is kept.
+    
+    Args:
+        text (str): The text to normalize
+    
+    Returns:
+        str: The normalized text
+    """
+    text = TRAILING_SPACE_PATTERN.sub("", textwrap.dedent(text))
+    return BLANK_LINES_PATTERN.sub("\n\n", text).strip()
@@ -0,0 +1,191 @@
+"""
+Load test for the multi-team server against local stub backends.
+
+Run with: python -m web.load_test --sessions 200 --turns 5 --concurrency 32
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+class StubChatCaller:
+    """Stands in for the OpenAI model chain, answering after a fixed delay"""
+    
+    models = ("stub",)
+    
+    def __init__(self, latency=0.2):
+        """
+        Initialize the stub.
+        
+        Args:
+            latency (float): Seconds each completion takes
+        """
+        self.latency = latency
+    
+    def create(self, client, messages, **kwargs):
+        """Return a canned completion shaped like the OpenAI response"""
+        time.sleep(self.latency)
+        return self._reply(messages)
+    
+    async def create_async(self, client, messages, **kwargs):
+        """Async version of `create`"""
+        import asyncio
+        
+        await asyncio.sleep(self.latency)
+        return self._reply(messages)
+    
+    def _reply(self, messages):
+        """Build a completion echoing the user's message"""
+        content = f"Noted: {messages[-1]['content'][:80]}. Next, agree on the sprint goal and owners."
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+def resident_memory():
+    """Get the resident memory of this process in bytes"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # Peak rather than current outside Linux, still good enough for growth per session
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def percentile(samples, fraction):
+    """Get a percentile of sorted samples"""
+    if not samples:
+        return 0.0
+    return samples[min(int(fraction * len(samples)), len(samples) - 1)]
+
+def run_load_test(sessions=200, turns=5, concurrency=32, latency=0.2, max_workers=8, queue_timeout=2.0,
+                  max_sessions=1000):
+    """
+    Runs simulated team members against an in-process server.
+    
+    The server runs on a local port with the real session registry, memory
+    and worker pool; only the model is replaced by `StubChatCaller` and
+    nothing is saved to Notion. Memory files go to a temporary directory.
+    
+    Args:
+        sessions (int): Team members to simulate, one session each
+        turns (int): Messages each member sends, one after another
+        concurrency (int): Members talking at once
+        latency (float): Seconds the stub model takes per reply
+        max_workers (int): Server worker limit (SERVER_MAX_WORKERS)
+        queue_timeout (float): Server queue timeout (SERVER_QUEUE_TIMEOUT)
+        max_sessions (int): Server session limit (SERVER_MAX_SESSIONS)
+    
+    Returns:
+        dict: "sessions_per_second", "requests_per_second", "p50" and "p99"
+            latency in seconds, "rejected" (503) and "failed" counts, and
+            "memory_per_session" in bytes
+    """
+    from werkzeug.serving import make_server
+    
+    from agents.resilience import set_chat_caller
+    from utils.config_manager import ConfigManager
+    from web.server import create_app
+    
+    workdir = tempfile.mkdtemp(prefix="agilow-load-")
+    os.chdir(workdir)
+    for name, value in (("OPENAI_API_KEY", "stub"), ("NOTION_API_KEY", "stub"), ("NOTION_PAGE_ID", "stub")):
+        os.environ.setdefault(name, value)
+    # Every turn must reach the stub, or the cache hides the server's own cost
+    os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+    
+    config = ConfigManager()
+    app = create_app(config, max_workers=max_workers, queue_timeout=queue_timeout, max_sessions=max_sessions)
+    set_chat_caller(StubChatCaller(latency))
+    
+    # One access log line per request would swamp the report
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    port = server.server_port
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    latencies = []
+    counts = {"rejected": 0, "failed": 0}
+    results_lock = threading.Lock()
+    
+    def simulate(number):
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        try:
+            for turn in range(turns):
+                body = json.dumps({"message": f"Standup update {turn}: finished story {number}-{turn}, no blockers"})
+                start = time.perf_counter()
+                connection.request("POST", f"/sessions/team{number % 20}/user{number}/messages", body,
+                                   {"Content-Type": "application/json"})
+                response = connection.getresponse()
+                response.read()
+                elapsed = time.perf_counter() - start
+                
+                with results_lock:
+                    if response.status == 200:
+                        latencies.append(elapsed)
+                    elif response.status == 503:
+                        counts["rejected"] += 1
+                    else:
+                        counts["failed"] += 1
+        finally:
+            connection.close()
+    
+    memory_before = resident_memory()
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for future in [executor.submit(simulate, number) for number in range(sessions)]:
+                future.result()
+        elapsed = time.perf_counter() - start
+        memory_after = resident_memory()
+        open_sessions = len(app.config["SESSION_REGISTRY"])
+    finally:
+        server.shutdown()
+        app.config["SESSION_REGISTRY"].close_all()
+    
+    latencies.sort()
+    return {
+        "sessions_per_second": sessions / elapsed,
+        "requests_per_second": len(latencies) / elapsed,
+        "p50": percentile(latencies, 0.5),
+        "p99": percentile(latencies, 0.99),
+        "rejected": counts["rejected"],
+        "failed": counts["failed"],
+        "memory_per_session": (memory_after - memory_before) / max(open_sessions, 1),
+        "open_sessions": open_sessions,
+    }
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(prog="python -m web.load_test",
+                                     description="Load test the multi-team server against a stub model.")
+    parser.add_argument("--sessions", type=int, default=200, help="Team members to simulate (default: 200)")
+    parser.add_argument("--turns", type=int, default=5, help="Messages per member (default: 5)")
+    parser.add_argument("--concurrency", type=int, default=32, help="Members talking at once (default: 32)")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub model latency in seconds (default: 0.2)")
+    parser.add_argument("--max-workers", type=int, default=8, help="Server worker limit (default: 8)")
+    parser.add_argument("--queue-timeout", type=float, default=2.0, help="Server queue timeout (default: 2)")
+    parser.add_argument("--max-sessions", type=int, default=1000, help="Server session limit (default: 1000)")
+    args = parser.parse_args(argv)
+    
+    print(f"🚦 {args.sessions} sessions x {args.turns} turns, {args.concurrency} at once, "
+          f"stub latency {args.latency}s, {args.max_workers} workers")
+    results = run_load_test(args.sessions, args.turns, args.concurrency, args.latency, args.max_workers,
+                            args.queue_timeout, args.max_sessions)
+    
+    print(f"Sessions/sec:       {results['sessions_per_second']:.1f}")
+    print(f"Requests/sec:       {results['requests_per_second']:.1f}")
+    print(f"Latency p50 / p99:  {results['p50'] * 1000:.0f} / {results['p99'] * 1000:.0f} ms")
+    print(f"Rejected (503):     {results['rejected']}")
+    print(f"Failed:             {results['failed']}")
+    print(f"Memory per session: {results['memory_per_session'] / 1024:.0f} KiB "
+          f"({results['open_sessions']} open)")
+    return 0 if not results["failed"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,361 @@
+"""
+HTTP server hosting many concurrent Scrum Master sessions.
+
+Run with: python -m web.server
+"""
+
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+from flask import Flask, jsonify, request
+
+from agents.openai_client import configure_openai_client
+from agents.resilience import configure_chat_caller
+from agents.response_cache import create_response_cache
+from agents.scrum_master import ERROR_RESPONSE, get_scrum_master_response, set_response_cache
+from agents.summarizer import create_summarizer
+from api.notion_client import configure_notion_client
+from api.notion_handler import append_to_notion_page
+from api.notion_sync import NotionSyncError, create_notion_sync
+from memory.memory_manager import create_memory_manager
+from templates.meeting_notes import build_notion_content
+from utils.config_manager import ConfigManager
+from utils.intent_detector import MEETING_TYPES, create_intent_detector
+from utils.tokens import count_tokens
+
+SESSION_KEY_PATTERN = re.compile(r"[^A-Za-z0-9_-]")
+
+# Messages of a session kept for Notion saves, which only use the latest replies
+MAX_CONVERSATION_MESSAGES = 20
+
+class SessionBusyError(Exception):
+    """Raised when closing a session that is serving a request"""
+
+class ChatSession:
+    """A single team member's conversation, with its own memory"""
+    
+    def __init__(self, memory_manager):
+        self.memory_manager = memory_manager
+        self.conversation = deque(maxlen=MAX_CONVERSATION_MESSAGES)
+        self.meeting_type = None
+        self.started = time.strftime("%Y%m%d%H%M%S")
+        self.lock = threading.Lock()
+        # Requests holding the session, guarded by the registry lock
+        self.users = 0
+
+class SessionRegistry:
+    """
+    Keeps one `ChatSession` per team/user, closing the least recently used beyond a limit.
+    
+    Sessions are held with `acquire`/`release` (or `session`) for the length
+    of a request, and only sessions nobody holds are evicted, so the limit
+    can be exceeded while every session is busy. Memory is opened and closed
+    outside the registry lock; other requests for the same key wait until
+    it is done, so two managers never write to the same files.
+    """
+    
+    def __init__(self, config, max_sessions=1000):
+        """
+        Initialize the registry.
+        
+        Args:
+            config (ConfigManager): The application configuration, which
+                selects the memory backend and context token budget
+            max_sessions (int): Maximum idle sessions kept open at once
+        """
+        self.config = config
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._pending = {}  # key -> Event set once the key's memory is opened or closed
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._sessions)
+    
+    def acquire(self, team, user):
+        """Get the session for a team member, opening it if needed; pair with `release`"""
+        key = session_key(team, user)
+        
+        while True:
+            with self._lock:
+                session = self._sessions.get(key)
+                if session is not None:
+                    session.users += 1
+                    self._sessions.move_to_end(key)
+                    return session
+                
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = threading.Event()
+                    break
+            
+            # Someone else is opening or closing this key's memory
+            pending.wait()
+        
+        try:
+            session = ChatSession(create_memory_manager(self.config, user_name=key, tail_size=50))
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.set()
+        
+        with self._lock:
+            session.users += 1
+            self._sessions[key] = session
+            evicted = self._take_idle(exclude=key)
+        
+        self._close(evicted)
+        return session
+    
+    def release(self, session):
+        """Stop holding a session, closing idle sessions beyond the limit"""
+        with self._lock:
+            session.users -= 1
+            evicted = self._take_idle()
+        
+        self._close(evicted)
+    
+    @contextmanager
+    def session(self, team, user):
+        """Hold a team member's session for the duration of a block"""
+        session = self.acquire(team, user)
+        try:
+            yield session
+        finally:
+            self.release(session)
+    
+    def close(self, team, user):
+        """
+        Close a session.
+        
+        Returns:
+            bool: False if it was not open
+        
+        Raises:
+            SessionBusyError: If it is serving a request
+        """
+        key = session_key(team, user)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                return False
+            if session.users:
+                raise SessionBusyError(f"Session {key} is busy")
+            
+            del self._sessions[key]
+            self._pending[key] = threading.Event()
+        
+        self._close([(key, session)])
+        return True
+    
+    def close_all(self):
+        """Close every open session"""
+        with self._lock:
+            sessions = list(self._sessions.items())
+            self._sessions.clear()
+            for key, _ in sessions:
+                self._pending[key] = threading.Event()
+        
+        self._close(sessions)
+    
+    def _take_idle(self, exclude=None):
+        """Remove idle sessions beyond the limit, oldest first; call with the lock held"""
+        evicted = []
+        excess = len(self._sessions) - self.max_sessions
+        for key, session in list(self._sessions.items()):
+            if excess <= 0:
+                break
+            if session.users or key == exclude:
+                continue
+            
+            del self._sessions[key]
+            self._pending[key] = threading.Event()
+            evicted.append((key, session))
+            excess -= 1
+        return evicted
+    
+    def _close(self, sessions):
+        """Close the memory of removed sessions and let waiting requests reopen them"""
+        for key, session in sessions:
+            try:
+                session.memory_manager.close()
+            finally:
+                with self._lock:
+                    pending = self._pending.pop(key)
+                pending.set()
+
+def session_key(team, user):
+    """Build a filesystem-safe memory key for a team member"""
+    return f"{SESSION_KEY_PATTERN.sub('_', team)}__{SESSION_KEY_PATTERN.sub('_', user)}"
+
+def create_app(config, max_workers=8, queue_timeout=2.0, max_sessions=1000):
+    """
+    Creates the Flask app.
+    
+    At most `max_workers` agent turns run at once across all sessions.
+    Requests that cannot get a worker within `queue_timeout` seconds are
+    rejected with 503 and a Retry-After header instead of queuing without
+    bound.
+    
+    Args:
+        config (ConfigManager): The application configuration
+        max_workers (int): Maximum concurrent agent turns
+        queue_timeout (float): Seconds a request may wait for a worker
+        max_sessions (int): Maximum sessions kept open at once
+    
+    Returns:
+        Flask: The configured app
+    """
+    app = Flask(__name__)
+    
+    # Every session shares the pooled OpenAI and Notion clients and the response cache
+    configure_openai_client(config)
+    configure_chat_caller(config)
+    configure_notion_client(config)
+    set_response_cache(create_response_cache(config))
+    
+    registry = SessionRegistry(config, max_sessions)
+    notion_sync = create_notion_sync(config)
+    summarizer = create_summarizer(config)
+    workers = threading.BoundedSemaphore(max_workers)
+    stats = {"in_flight": 0, "completed": 0, "rejected": 0}
+    stats_lock = threading.Lock()
+    
+    app.config["SESSION_REGISTRY"] = registry
+    
+    # One compiled intent detector per team, built from its keyword overrides
+    detectors = {}
+    detectors_lock = threading.Lock()
+    
+    def get_detector(team):
+        with detectors_lock:
+            if team not in detectors:
+                detectors[team] = create_intent_detector(config, team)
+            return detectors[team]
+    
+    @app.route("/health", methods=["GET"])
+    def health():
+        with stats_lock:
+            return jsonify(sessions=len(registry), max_workers=max_workers, **stats)
+    
+    @app.route("/sessions/<team>/<user>/messages", methods=["POST"])
+    def post_message(team, user):
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            payload = {}
+        
+        message = payload.get("message")
+        user_input = message.strip() if isinstance(message, str) else ""
+        if not user_input:
+            return jsonify(error="'message' is required"), 400
+        
+        # Backpressure: reject rather than pile up when all workers are busy
+        if not workers.acquire(timeout=queue_timeout):
+            with stats_lock:
+                stats["rejected"] += 1
+            response = jsonify(error="Server busy, please retry")
+            response.status_code = 503
+            response.headers["Retry-After"] = str(max(int(queue_timeout), 1))
+            return response
+        
+        with stats_lock:
+            stats["in_flight"] += 1
+        
+        try:
+            with registry.session(team, user) as session, session.lock:
+                # Turns within one session run in order
+                memory_manager = session.memory_manager
+                context = memory_manager.get_prompt_context(user_input, relevant_k=config.get_retrieval_top_k())
+                
+                start = time.perf_counter()
+                if count_tokens(user_input) > config.get_summarize_input_tokens():
+                    # Too long for one request: summarize in parts, then build the artifact
+                    meeting_type = payload.get("meeting_type") or session.meeting_type or "general"
+                    try:
+                        ai_response = summarizer.summarize(user_input, meeting_type, context=context)
+                    except Exception as e:
+                        print(f"❌ Error summarizing long input: {str(e)}")
+                        ai_response = ERROR_RESPONSE
+                else:
+                    ai_response = get_scrum_master_response(user_input, context, show_progress=False)
+                latency = time.perf_counter() - start
+                
+                session.conversation.append({"role": "user", "content": user_input})
+                session.conversation.append({"role": "assistant", "content": ai_response})
+                
+                if session.meeting_type is None:
+                    detector = get_detector(team)
+                    session.meeting_type = detector.best(detector.detect(user_input), MEETING_TYPES)
+                
+                saved = None
+                if payload.get("save_to_notion"):
+                    meeting_type = payload.get("meeting_type") or session.meeting_type or "general"
+                    content = build_notion_content(session.conversation, meeting_type)
+                    if content is None:
+                        saved = False
+                    elif notion_sync is not None:
+                        # Each save in a session updates that session's document for the meeting type
+                        try:
+                            notion_sync.sync(config.get_notion_page_id(),
+                                             f"{session_key(team, user)}-{session.started}-{meeting_type}", content)
+                            saved = True
+                        except NotionSyncError as e:
+                            print(f"❌ Notion sync failed: {str(e)}")
+                            saved = False
+                    else:
+                        saved = append_to_notion_page(config.get_notion_page_id(), content)
+                
+                if ai_response != ERROR_RESPONSE:
+                    memory_manager.add_exchange(user_input, ai_response, session.meeting_type)
+                context_tokens = memory_manager.context_builder.token_count
+            
+            return jsonify(
+                response=ai_response,
+                saved_to_notion=saved,
+                context_tokens=context_tokens,
+                latency=round(latency, 3)
+            )
+        finally:
+            workers.release()
+            with stats_lock:
+                stats["in_flight"] -= 1
+                stats["completed"] += 1
+    
+    @app.route("/sessions/<team>/<user>", methods=["DELETE"])
+    def delete_session(team, user):
+        try:
+            closed = registry.close(team, user)
+        except SessionBusyError:
+            return jsonify(error="Session is serving a request, please retry"), 409
+        if not closed:
+            return jsonify(error="Session not found"), 404
+        return jsonify(closed=True)
+    
+    return app
+
+def main():
+    """Run the server using settings from the environment"""
+    try:
+        config = ConfigManager()
+    except ValueError as e:
+        print(f"❌ Configuration error: {str(e)}")
+        sys.exit(1)
+    
+    app = create_app(
+        config,
+        max_workers=config.get_server_max_workers(),
+        queue_timeout=config.get_server_queue_timeout(),
+        max_sessions=config.get_server_max_sessions()
+    )
+    
+    try:
+        app.run(host=config.get_server_host(), port=config.get_server_port(), threaded=True)
+    finally:
+        app.config["SESSION_REGISTRY"].close_all()
+
+if __name__ == "__main__":
+    main()